@@ -1,31 +1,81 @@
 """
 API路由模块
 """
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from fastapi import APIRouter, HTTPException, Depends, Request, UploadFile, File, Header, Query
+from fastapi.responses import StreamingResponse, FileResponse, Response
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 from app.schemas.schemas import (
     GreenChemistryRequest,
+    SolventMixtureRequest,
     EcoScaleRequest,
     ChromatogramAnalysisRequest,
     ChromatogramAnalysisResponse,
+    TraceAnalysisRequest,
+    SequenceAnalysisRequest,
+    TraceCreateRequest,
+    StoredTraceAnalysisRequest,
     HPLCAnalysisCreate,
+    HPLCAnalysisBulkCreate,
     HPLCAnalysisResponse,
     APIResponse,
     # 新增完整评分系统的模型
+    ScoringParameters,
     FullScoreRequest,
+    LibraryScoreRequest,
+    LibraryBatchScoreRequest,
+    ReagentCreate,
+    ReagentUpdate,
     FullScoreResponse,
+    BatchScoreRequest,
+    CompareRequest,
+    ColumnarScoreRequest,
+    RescoreRequest,
+    ScoringJobRequest,
     WeightSchemesResponse,
     WeightDetailsResponse
 )
-from app.services.green_chemistry import analyzer
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.core.responses import api_response, FastJSONResponse
+from app.services.green_chemistry import analyzer, mixture_grid_size, solvent_mixture_landscape
 from app.services import scoring_service  # 导入评分服务
-from app.database.connection import get_db
-from app.database.models import HPLCAnalysis
-from sqlalchemy import select
+from app.services import batch_scoring
+from app.services import columnar_scoring
+from app.services import array_transport
+from app.services import analysis_listing
+from app.services import analysis_records
+from app.services import method_comparison
+from app.services import method_sessions
+from app.services import peak_detection
+from app.services import sequence_analysis
+from app.services.solvent_index import MAX_SEARCH_RESULTS
+from app.services import trace_store as traces
+from app.services.trace_store import trace_store, TraceNotFound, TraceIncomplete
+from app.services.executor import compute_executor, scoring_cost
+from app.services.job_queue import job_queue, job_summary, JOB_COMPLETED
+from app.services import method_import
+from app.services.ndjson_stream import score_ndjson, DuplexStreamingResponse, NDJSON_MEDIA_TYPE
+from app.services.result_cache import score_cache, cached_full_scores
+from app.database.connection import get_db, get_read_db
+from app.database.models import HPLCAnalysis, Reagent
+from app.services.reagent_library import reagent_library, resolve_method_reagents, reagent_values, LIBRARY_COLUMNS
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 
 router = APIRouter()
+logger = get_logger("api")
 
 
 @router.post("/green-chemistry/solvent-score", tags=["绿色化学"])
@@ -47,6 +97,48 @@ async def calculate_solvent_score(request: GreenChemistryRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/green-chemistry/solvent-score/mixtures", response_model=APIResponse, tags=["绿色化学"])
+async def calculate_solvent_mixture_scores(request: SolventMixtureRequest, accept: Optional[str] = Header(None)):
+    """
+    多组分混合溶剂的绿色化学评分（向量化）
+
+    一次计算任意多个N组分混合物，或二元/三元等比例网格上的全部组合，
+    用于溶剂选择界面绘制二元曲线和三元相图。
+    请求头 Accept: application/vnd.lcgauge.arrays 时返回二进制数组（fractions 为 (M, N)，评分未舍入）。
+    """
+    try:
+        if request.fractions is not None:
+            rows = len(request.fractions)
+        else:
+            # 网格点数 C(steps + N - 1, N - 1)，大网格同样进入进程池
+            rows = mixture_grid_size(len(request.solvents), request.grid_steps or 0)
+        result = await compute_executor.run(
+            solvent_mixture_landscape,
+            request.solvents,
+            fractions=request.fractions,
+            grid_steps=request.grid_steps,
+            volume_ml=request.volume_ml,
+            cost=rows * len(request.solvents)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+
+    meta = {
+        "kind": "solvent_mixtures",
+        "solvents": result.pop("solvents"),
+        "unknown_solvents": result.pop("unknown_solvents"),
+    }
+    if array_transport.wants_arrays(accept):
+        return Response(
+            content=array_transport.encode_arrays(result, {**meta, "rounded": False}),
+            media_type=array_transport.ARRAY_MEDIA_TYPE
+        )
+    return api_response(
+        message=f"混合溶剂评分计算成功（{result['fractions'].shape[0]}个混合物）",
+        data={**meta, **{name: np.round(values, 4 if name == "fractions" else 2).tolist() for name, values in result.items()}}
+    )
+
+
 @router.post("/green-chemistry/eco-scale", tags=["绿色化学"])
 async def calculate_eco_scale(request: EcoScaleRequest):
     """计算Eco-Scale评分"""
@@ -70,9 +162,11 @@ async def calculate_eco_scale(request: EcoScaleRequest):
 async def analyze_chromatogram(request: ChromatogramAnalysisRequest):
     """分析色谱图数据"""
     try:
-        result = analyzer.analyze_chromatogram(
+        result = await compute_executor.run(
+            analyzer.analyze_chromatogram,
             retention_times=request.retention_times,
-            peak_areas=request.peak_areas
+            peak_areas=request.peak_areas,
+            cost=len(request.retention_times)
         )
         return APIResponse(
             success=True,
@@ -85,32 +179,233 @@ async def analyze_chromatogram(request: ChromatogramAnalysisRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post(
+    "/analysis/chromatogram/trace",
+    response_model=APIResponse,
+    tags=["色谱分析"],
+    openapi_extra={"requestBody": {"content": {
+        "application/json": {
+            "schema": TraceAnalysisRequest.model_json_schema(ref_template="#/components/schemas/{model}")
+        },
+        array_transport.ARRAY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    }}}
+)
+async def analyze_chromatogram_trace(request: Request, content_type: Optional[str] = Header(None)):
+    """
+    分析原始色谱信号（峰检测、积分和色谱参数）
+
+    请求体为JSON（见 TraceAnalysisRequest），或二进制数组格式
+    （Content-Type: application/vnd.lcgauge.arrays，列 signal / time，参数放在 meta 中）。
+    JSON解析、数组解码、基线校正、峰检测和积分都在计算线程/进程中完成。
+    """
+    body = await request.body()
+    binary = array_transport.wants_arrays(content_type)
+    func = peak_detection.analyze_trace_binary if binary else peak_detection.analyze_trace_json
+    try:
+        # 二进制每个数值8字节；JSON按每个数值约20字节估计点数
+        cost = len(body) // 8 if binary else len(body) // 20
+        result = await compute_executor.run(func, body, cost=cost)
+        return api_response(
+            message=f"色谱信号分析完成（{result['num_peaks']}个峰）",
+            data=result
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"色谱信号分析失败: {str(e)}")
+
+
+@router.post("/analysis/chromatogram/sequence", response_model=APIResponse, tags=["色谱分析"])
+async def analyze_chromatogram_sequence(request: SequenceAnalysisRequest):
+    """
+    进样序列的批量色谱分析
+
+    各次进样按计算量分组后并发计算（原始信号进入进程池利用多核），
+    返回每次进样的结果和序列汇总：主峰保留时间漂移、纯度趋势和面积RSD。
+    单次进样出错时记录错误，不影响其他进样。
+    """
+    try:
+        injections = [injection.model_dump() for injection in request.injections]
+        costs = [sequence_analysis.injection_cost(injection) for injection in injections]
+        groups = sequence_analysis.partition(costs, compute_executor.workers)
+        chunks = await asyncio.gather(*[
+            compute_executor.run(
+                sequence_analysis.analyze_injections,
+                [injections[i] for i in group],
+                group,
+                str(trace_store.root),
+                cost=sum(costs[i] for i in group)
+            )
+            for group in groups
+        ])
+        outcomes = sorted((outcome for chunk in chunks for outcome in chunk), key=lambda outcome: outcome["index"])
+        summary = sequence_analysis.summarize_sequence(outcomes)
+        return api_response(
+            message=f"序列分析完成（{summary['succeeded']}/{summary['injections']}针成功）",
+            data={"summary": summary, "injections": outcomes}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"序列分析失败: {str(e)}")
+
+
+# ============================================================================
+# 原始信号分块上传与存储
+# ============================================================================
+
+@router.post("/traces", response_model=APIResponse, tags=["原始信号"])
+async def create_trace(request: TraceCreateRequest):
+    """
+    创建原始信号并预分配存储文件
+
+    之后用 PUT /traces/{trace_id}/{channel}?offset=N 上传各通道的二进制分块
+    （小端 float32/float64 原始字节，时间轴通道 time 始终为 float64），所有通道传完后即可分析。
+    """
+    try:
+        meta = await compute_executor.run_in_thread(trace_store.create, **request.model_dump())
+        return APIResponse(success=True, message="原始信号已创建", data=traces.progress(meta))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.put("/traces/{trace_id}/{channel}", response_model=APIResponse, tags=["原始信号"])
+async def upload_trace_chunk(
+    trace_id: str,
+    channel: str,
+    request: Request,
+    offset: int = Query(0, ge=0, description="本分块第一个点的下标"),
+):
+    """上传一个通道的一段原始数据（application/octet-stream，可并发、乱序或重传）"""
+    limit = settings.TRACE_CHUNK_MAX_MB * 1024 * 1024
+    parts = []
+    size = 0
+    async for part in request.stream():
+        size += len(part)
+        if size > limit:
+            raise HTTPException(status_code=413, detail=f"单个分块不能超过 {settings.TRACE_CHUNK_MAX_MB} MB")
+        parts.append(part)
+    try:
+        meta = await compute_executor.run_in_thread(trace_store.write_chunk, trace_id, channel, offset, b"".join(parts))
+        return APIResponse(success=True, message="分块已写入", data=traces.progress(meta))
+    except TraceNotFound:
+        raise HTTPException(status_code=404, detail=f"原始信号 {trace_id} 不存在")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/traces/{trace_id}", response_model=APIResponse, tags=["原始信号"])
+async def get_trace(trace_id: str):
+    """原始信号的元数据和上传进度"""
+    try:
+        return APIResponse(success=True, message="获取成功", data=traces.progress(trace_store.load_meta(trace_id)))
+    except TraceNotFound:
+        raise HTTPException(status_code=404, detail=f"原始信号 {trace_id} 不存在")
+
+
+@router.delete("/traces/{trace_id}", response_model=APIResponse, tags=["原始信号"])
+async def delete_trace(trace_id: str):
+    """删除原始信号及其文件"""
+    try:
+        await compute_executor.run_in_thread(trace_store.delete, trace_id)
+        return APIResponse(success=True, message="原始信号已删除")
+    except TraceNotFound:
+        raise HTTPException(status_code=404, detail=f"原始信号 {trace_id} 不存在")
+
+
+@router.post("/traces/{trace_id}/analyze", response_model=APIResponse, tags=["原始信号"])
+async def analyze_stored_trace(trace_id: str, request: StoredTraceAnalysisRequest):
+    """
+    对已上传信号的一个通道做峰检测与积分（可限定时间窗口）
+
+    计算进程按路径内存映射打开信号文件，只读取时间窗口内的数据
+    """
+    try:
+        meta = trace_store.load_meta(trace_id)
+        result = await compute_executor.run(
+            traces.analyze_stored_trace,
+            str(trace_store.root),
+            trace_id,
+            **request.model_dump(),
+            cost=meta["n_points"]
+        )
+        return api_response(
+            message=f"色谱信号分析完成（{result['num_peaks']}个峰）",
+            data=result
+        )
+    except TraceNotFound:
+        raise HTTPException(status_code=404, detail=f"原始信号 {trace_id} 不存在")
+    except TraceIncomplete as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"色谱信号分析失败: {str(e)}")
+
+
+@router.get("/traces/{trace_id}/downsample", tags=["原始信号"])
+async def downsample_trace(
+    trace_id: str,
+    width: int = Query(..., ge=1, le=traces.MAX_DISPLAY_WIDTH, description="显示宽度（像素）"),
+    channel: Optional[str] = Query(None, description="通道名称，默认第一个通道"),
+    method: str = Query("minmax", description="minmax：每像素保留最小/最大值；lttb：Largest-Triangle-Three-Buckets"),
+    start_time: Optional[float] = Query(None, description="时间窗口起点(分钟)"),
+    end_time: Optional[float] = Query(None, description="时间窗口终点(分钟)"),
+    accept: Optional[str] = Header(None),
+):
+    """
+    按显示宽度降采样，返回可直接绘制的 time / signal 序列
+
+    请求头 Accept: application/vnd.lcgauge.arrays 时返回二进制数组（列 time、signal）
+    """
+    try:
+        meta = trace_store.load_meta(trace_id)
+        result = await compute_executor.run(
+            traces.downsample_stored_trace,
+            str(trace_store.root),
+            trace_id,
+            width,
+            channel=channel,
+            method=method,
+            start_time=start_time,
+            end_time=end_time,
+            cost=meta["n_points"]
+        )
+    except TraceNotFound:
+        raise HTTPException(status_code=404, detail=f"原始信号 {trace_id} 不存在")
+    except TraceIncomplete as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    columns = {"time": result.pop("time"), "signal": result.pop("signal")}
+    if array_transport.wants_arrays(accept):
+        return Response(
+            content=array_transport.encode_arrays(columns, {"kind": "trace", **result}),
+            media_type=array_transport.ARRAY_MEDIA_TYPE
+        )
+    return api_response(
+        message=f"降采样完成（{result['source_points']} → {result['points']}个点）",
+        data={**result, **{name: values.tolist() for name, values in columns.items()}}
+    )
+
+
 @router.post("/analysis/hplc", response_model=APIResponse, tags=["HPLC分析"])
 async def create_hplc_analysis(
     analysis: HPLCAnalysisCreate,
     db: AsyncSession = Depends(get_db)
 ):
-    """创建新的HPLC分析记录"""
+    """
+    创建新的HPLC分析记录
+    
+    提供 scoring（与 /scoring/full-score 请求体相同）时保存完整评分结果和 Score₁/₂/₃；
+    否则只计算简化的溶剂绿色评分
+    """
     try:
-        # 计算绿色化学评分
-        green_score_data = analyzer.calculate_solvent_score(
-            solvent_a=analysis.solvent_a,
-            solvent_b=analysis.solvent_b,
-            ratio_a=0.5,
-            volume_ml=analysis.flow_rate
-        )
+        result = None
+        if analysis.scoring is not None:
+            result, _ = await full_scores_cached(build_scoring_kwargs(analysis.scoring))
         
         # 创建数据库记录
-        db_analysis = HPLCAnalysis(
-            name=analysis.name,
-            description=analysis.description,
-            solvent_a=analysis.solvent_a,
-            solvent_b=analysis.solvent_b,
-            flow_rate=analysis.flow_rate,
-            column_type=analysis.column_type,
-            temperature=analysis.temperature,
-            green_score=green_score_data["overall_green_score"]
-        )
+        db_analysis = HPLCAnalysis(**analysis_records.analysis_values(analysis, result))
         
         db.add(db_analysis)
         await db.commit()
@@ -122,57 +417,145 @@ async def create_hplc_analysis(
             data={
                 "id": db_analysis.id,
                 "name": db_analysis.name,
-                "green_score": db_analysis.green_score
+                "green_score": db_analysis.green_score,
+                "score1": db_analysis.score1,
+                "score2": db_analysis.score2,
+                "score3": db_analysis.score3
             }
         )
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/analysis/hplc", response_model=APIResponse, tags=["HPLC分析"])
-async def list_hplc_analyses(
-    skip: int = 0,
-    limit: int = 10,
+@router.post("/analysis/hplc/bulk", response_model=APIResponse, tags=["HPLC分析"])
+async def bulk_create_hplc_analyses(
+    request: HPLCAnalysisBulkCreate,
     db: AsyncSession = Depends(get_db)
 ):
-    """获取HPLC分析列表"""
+    """
+    批量创建HPLC分析记录
+    
+    所有带 scoring 的分析用批量引擎一次评分，然后在同一事务中批量插入（executemany），
+    任一条评分失败则全部不写入。返回的 ids 与请求顺序一致
+    """
+    analyses = request.analyses
     try:
-        stmt = select(HPLCAnalysis).offset(skip).limit(limit)
-        result = await db.execute(stmt)
-        analyses = result.scalars().all()
+        scored = [(i, build_scoring_kwargs(a.scoring)) for i, a in enumerate(analyses) if a.scoring is not None]
+        methods = [method for _, method in scored]
+        results = await compute_executor.run(
+            batch_scoring.calculate_batch_scores,
+            methods,
+            cost=sum(scoring_cost(method) for method in methods)
+        ) if methods else []
+        result_by_index = {i: result for (i, _), result in zip(scored, results)}
+        rows = [analysis_records.analysis_values(a, result_by_index.get(i)) for i, a in enumerate(analyses)]
         
-        return APIResponse(
-            success=True,
+        stmt = insert(HPLCAnalysis).returning(HPLCAnalysis.id, sort_by_parameter_order=True)
+        ids = (await db.execute(stmt, rows)).scalars().all()
+        await db.commit()
+        
+        return api_response(
+            message=f"批量创建成功（{len(ids)}条分析，其中{len(scored)}条完整评分）",
+            data={
+                "ids": ids,
+                "score3": [row["score3"] for row in rows]
+            }
+        )
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"批量创建失败: {str(e)}")
+
+
+@router.get("/analysis/hplc/{analysis_id}", response_model=APIResponse, tags=["HPLC分析"])
+async def get_hplc_analysis(analysis_id: int, db: AsyncSession = Depends(get_read_db)):
+    """获取单条分析（含评分输入和完整评分结果）"""
+    analysis = await db.get(HPLCAnalysis, analysis_id)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="分析记录不存在")
+    return api_response(
+        message="获取分析成功",
+        data=analysis_records.analysis_detail(analysis)
+    )
+
+
+@router.get("/analysis/hplc", response_model=APIResponse, tags=["HPLC分析"])
+async def list_hplc_analyses(
+    limit: int = Query(20, ge=1, le=analysis_listing.MAX_PAGE_SIZE, description="每页条数"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    sort_by: str = Query("id", description="排序字段：id / created_at / score1 / score2 / score3"),
+    order: str = Query("desc", description="排序方向：asc / desc"),
+    score_field: str = Query("score3", description="得分筛选字段：score1 / score2 / score3"),
+    min_score: Optional[float] = Query(None, description="得分下限（含）"),
+    max_score: Optional[float] = Query(None, description="得分上限（含）"),
+    created_after: Optional[datetime] = Query(None, description="创建时间不早于"),
+    created_before: Optional[datetime] = Query(None, description="创建时间早于"),
+    name: Optional[str] = Query(None, description="名称包含"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    获取HPLC分析列表（游标分页）
+    
+    返回 {"items": [...], "next_cursor": ..., "has_more": ...}；
+    把 next_cursor 作为下一次请求的 cursor（其余参数保持不变）即可取得下一页
+    """
+    try:
+        stmt = analysis_listing.build_list_query(
+            sort_by=sort_by,
+            order=order,
+            limit=limit,
+            cursor=cursor,
+            score_field=score_field,
+            min_score=min_score,
+            max_score=max_score,
+            created_after=created_after,
+            created_before=created_before,
+            name=name,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        rows = (await db.execute(stmt)).all()
+        return api_response(
             message="获取分析列表成功",
-            data=[
-                {
-                    "id": a.id,
-                    "name": a.name,
-                    "description": a.description,
-                    "created_at": a.created_at.isoformat() if a.created_at else None,
-                    "green_score": a.green_score
-                }
-                for a in analyses
-            ]
+            data=analysis_listing.build_page(rows, sort_by, order, limit)
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/solvents/list", tags=["溶剂数据库"])
-async def list_solvents():
-    """获取支持的溶剂列表"""
-    solvents = [
-        {
+async def list_solvents(
+    q: Optional[str] = Query(None, description="检索：中文名、英文名、缩写（MeOH/ACN）或CAS号，支持前缀和模糊匹配"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS, description="检索结果数上限（未提供 q 时返回全部溶剂）"),
+):
+    """获取支持的溶剂列表，或按名称/别名/CAS号检索（结果按匹配程度排序）"""
+    def record(name: str) -> dict:
+        props = analyzer.solvent_db[name]
+        return {
             "name": name,
+            "english_name": props.english_name,
+            "cas": props.cas,
+            "aliases": list(props.aliases),
             "hazard_score": props.hazard_score,
             "environmental_impact": props.environmental_impact,
             "health_hazard": props.health_hazard,
             "recyclability": props.recyclability
         }
-        for name, props in analyzer.solvent_db.items()
-    ]
+
+    if q is None or not q.strip():
+        solvents = [record(name) for name in analyzer.solvent_db]
+    else:
+        solvents = [
+            {**record(hit["name"]), "matched": hit["matched"], "match": hit["match"], "score": hit["score"]}
+            for hit in analyzer.solvent_index.search(q, limit)
+        ]
     return APIResponse(
         success=True,
         message="获取溶剂列表成功",
@@ -184,6 +567,112 @@ async def list_solvents():
 # 完整评分系统API端点
 # ============================================================================
 
+def build_parameter_kwargs(request: ScoringParameters) -> dict:
+    """P/R/D因子、权重方案和自定义权重"""
+    return {
+        # P/R/D因子（分阶段）
+        "p_factor": request.p_factor,
+        "pretreatment_p_factor": request.pretreatment_p_factor,
+        "instrument_r_factor": request.instrument_r_factor,
+        "instrument_d_factor": request.instrument_d_factor,
+        "pretreatment_r_factor": request.pretreatment_r_factor,
+        "pretreatment_d_factor": request.pretreatment_d_factor,
+        
+        # 权重方案
+        "safety_scheme": request.safety_scheme,
+        "health_scheme": request.health_scheme,
+        "environment_scheme": request.environment_scheme,
+        "instrument_stage_scheme": request.instrument_stage_scheme,
+        "prep_stage_scheme": request.prep_stage_scheme,
+        "final_scheme": request.final_scheme,
+        
+        # 自定义权重（如果提供）
+        "custom_weights": request.custom_weights
+    }
+
+
+def build_scoring_kwargs(request: FullScoreRequest) -> dict:
+    """把 FullScoreRequest 转换为 scoring_service.calculate_full_scores 的关键字参数"""
+    instrument_data = request.instrument
+    prep_data = request.preparation
+    
+    return {
+        # 仪器分析数据
+        "instrument_time_points": instrument_data.time_points,
+        "instrument_composition": instrument_data.composition,
+        "instrument_flow_rate": instrument_data.flow_rate,
+        "instrument_densities": instrument_data.densities,
+        "instrument_factor_matrix": {
+            reagent: factors.model_dump()
+            for reagent, factors in instrument_data.factor_matrix.items()
+        },
+        "instrument_curve_types": instrument_data.curve_types,  # 曲线类型
+        
+        # 样品前处理数据
+        "prep_volumes": prep_data.volumes,
+        "prep_densities": prep_data.densities,
+        "prep_factor_matrix": {
+            reagent: factors.model_dump()
+            for reagent, factors in prep_data.factor_matrix.items()
+        },
+        
+        **build_parameter_kwargs(request)
+    }
+
+
+def build_library_kwargs(request: LibraryScoreRequest) -> dict:
+    """把按ID/名称引用试剂的请求展开为 calculate_full_scores 的关键字参数"""
+    instrument_data = request.instrument
+    prep_data = request.preparation
+    
+    return {
+        "instrument_time_points": instrument_data.time_points,
+        "instrument_flow_rate": instrument_data.flow_rate,
+        "instrument_curve_types": instrument_data.curve_types,
+        **resolve_method_reagents(
+            reagent_library.index,
+            instrument_data.composition,
+            prep_data.volumes,
+            instrument_densities=instrument_data.densities,
+            prep_densities=prep_data.densities
+        ),
+        **build_parameter_kwargs(request)
+    }
+
+
+async def full_scores_cached(scoring_kwargs: dict) -> tuple:
+    """
+    完整评分（相同请求直接取缓存结果）
+    
+    返回：
+        (评分结果, 是否命中缓存)
+    """
+    cost = scoring_cost(scoring_kwargs)
+    if cost <= settings.SCORE_CACHE_MAX_COST:
+        # 计算键、查找缓存和评分都在工作线程中完成
+        result, hit = await compute_executor.run_in_thread(cached_full_scores, scoring_kwargs)
+    else:
+        # 大方法重新计算比计算键和复制结果更划算（可能进入进程池）
+        result = await compute_executor.run(scoring_service.calculate_full_scores, cost=cost, **scoring_kwargs)
+        hit = False
+    
+    if not hit:
+        logger.debug(
+            "完整评分计算完成 Score1=%s Score2=%s Score3=%s",
+            result['instrument']['score1'], result['preparation']['score2'], result['final']['score3']
+        )
+    return result, hit
+
+
+async def score_with_cache(scoring_kwargs: dict) -> FastJSONResponse:
+    """完整评分接口的响应（相同请求直接返回缓存结果）"""
+    result, hit = await full_scores_cached(scoring_kwargs)
+    return api_response(
+        message="完整评分计算成功（缓存）" if hit else "完整评分计算成功",
+        data=result
+    )
+
+
 @router.post("/scoring/full-score", response_model=APIResponse, tags=["评分系统"])
 async def calculate_full_score(request: FullScoreRequest):
     """
@@ -197,111 +686,510 @@ async def calculate_full_score(request: FullScoreRequest):
     - schemes: 使用的权重方案
     """
     try:
-        # DEBUG: Print received data
-        print("\n" + "=" * 80)
-        print("[Backend] Received P/R/D factors:")
-        print(f"  Instrument Stage:")
-        print(f"    p_factor = {request.p_factor}")
-        print(f"    instrument_r_factor = {request.instrument_r_factor}")
-        print(f"    instrument_d_factor = {request.instrument_d_factor}")
-        print(f"  Pretreatment Stage:")
-        print(f"    pretreatment_p_factor = {request.pretreatment_p_factor}")
-        print(f"    pretreatment_r_factor = {request.pretreatment_r_factor}")
-        print(f"    pretreatment_d_factor = {request.pretreatment_d_factor}")
-        print("=" * 80 + "\n")
-        
-        # 转换Pydantic模型为字典
-        instrument_data = request.instrument
-        prep_data = request.preparation
-        
-        # 转换factor_matrix的格式
-        inst_factor_matrix = {
-            reagent: factors.model_dump()
-            for reagent, factors in instrument_data.factor_matrix.items()
-        }
-        
-        prep_factor_matrix = {
-            reagent: factors.model_dump()
-            for reagent, factors in prep_data.factor_matrix.items()
-        }
-        
-        # 🔍 调试：打印接收到的因子矩阵
-        print("\n" + "=" * 80)
-        print("🔍 后端接收到的数据：")
-        print(f"📊 仪器分析阶段:")
-        print(f"   P因子 (能耗): {request.p_factor}")
-        print(f"   R因子 (可回收性): {request.instrument_r_factor}")
-        print(f"   D因子 (可降解性): {request.instrument_d_factor}")
-        print(f"📊 前处理阶段:")
-        print(f"   P因子 (能耗): {request.pretreatment_p_factor}")
-        print(f"   R因子 (可回收性): {request.pretreatment_r_factor}")
-        print(f"   D因子 (可降解性): {request.pretreatment_d_factor}")
-        print("📋 仪器分析试剂:")
-        for reagent, factors in inst_factor_matrix.items():
-            print(f"  {reagent}: S1={factors.get('S1'):.3f}, S2={factors.get('S2'):.3f}, S3={factors.get('S3'):.3f}, S4={factors.get('S4'):.3f}")
-        print("📋 前处理试剂:")
-        for reagent, factors in prep_factor_matrix.items():
-            print(f"  {reagent}: S1={factors.get('S1'):.3f}, S2={factors.get('S2'):.3f}, S3={factors.get('S3'):.3f}, S4={factors.get('S4'):.3f}")
-        print("=" * 80 + "\n")
-        
-        # 调用评分服务
-        result = scoring_service.calculate_full_scores(
-            # 仪器分析数据
-            instrument_time_points=instrument_data.time_points,
-            instrument_composition=instrument_data.composition,
-            instrument_flow_rate=instrument_data.flow_rate,
-            instrument_densities=instrument_data.densities,
-            instrument_factor_matrix=inst_factor_matrix,
-            instrument_curve_types=instrument_data.curve_types,  # 新增：曲线类型
-            
-            # 样品前处理数据
-            prep_volumes=prep_data.volumes,
-            prep_densities=prep_data.densities,
-            prep_factor_matrix=prep_factor_matrix,
-            
-            # P/R/D因子（分阶段）
-            p_factor=request.p_factor,
-            pretreatment_p_factor=request.pretreatment_p_factor,
-            instrument_r_factor=request.instrument_r_factor,
-            instrument_d_factor=request.instrument_d_factor,
-            pretreatment_r_factor=request.pretreatment_r_factor,
-            pretreatment_d_factor=request.pretreatment_d_factor,
-            
-            # 权重方案
-            safety_scheme=request.safety_scheme,
-            health_scheme=request.health_scheme,
-            environment_scheme=request.environment_scheme,
-            instrument_stage_scheme=request.instrument_stage_scheme,
-            prep_stage_scheme=request.prep_stage_scheme,
-            final_scheme=request.final_scheme,
-            
-            # 自定义权重（如果提供）
-            custom_weights=request.custom_weights
+        # 转换Pydantic模型为评分服务参数
+        return await score_with_cache(build_scoring_kwargs(request))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"评分计算失败: {str(e)}")
+
+
+@router.post("/scoring/batch", response_model=APIResponse, tags=["评分系统"])
+async def calculate_batch_scores(request: BatchScoreRequest, accept: Optional[str] = Header(None)):
+    """
+    批量计算完整评分（NumPy向量化引擎，一次处理N个方法）
+    
+    返回列表与请求中的 methods 顺序一致，每个元素的结构与 /scoring/full-score 的 data 相同。
+    Accept 为 application/vnd.lcgauge.arrays 时返回二进制数组（见 app/services/array_transport.py）
+    """
+    try:
+        methods = [build_scoring_kwargs(method) for method in request.methods]
+        if array_transport.wants_arrays(accept):
+            content = await compute_executor.run(
+                array_transport.batch_scores_binary,
+                methods,
+                cost=sum(scoring_cost(method) for method in methods)
+            )
+            return Response(content=content, media_type=array_transport.ARRAY_MEDIA_TYPE)
+        results = await compute_executor.run(
+            batch_scoring.calculate_batch_scores,
+            methods,
+            cost=sum(scoring_cost(method) for method in methods)
+        )
+        return api_response(
+            message=f"批量评分计算成功（{len(results)}个方法）",
+            data=results
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量评分计算失败: {str(e)}")
+
+
+@router.post(
+    "/scoring/columnar",
+    response_model=APIResponse,
+    tags=["评分系统"],
+    openapi_extra={"requestBody": {"content": {"application/json": {
+        "schema": ColumnarScoreRequest.model_json_schema(ref_template="#/components/schemas/{model}")
+    }}}}
+)
+async def calculate_columnar_scores(request: Request):
+    """
+    列式批量评分（紧凑格式）
+
+    请求体是扁平数组（见 ColumnarScoreRequest），服务端直接解码为NumPy数组交给批量引擎，
+    不逐个构造方法对象；返回的 data 同样是与请求行对齐的扁平数组。
+    适合试剂多、梯度点多或方法数量大的客户端，结果与 /scoring/batch 相同。
+    """
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="数据验证错误: 请求体不是有效的JSON")
+    try:
+        cost = len(payload.get("composition") or []) if isinstance(payload, dict) else 0
+        result = await compute_executor.run(columnar_scoring.calculate_columnar_scores, payload, cost=cost)
+        return api_response(
+            message=f"列式批量评分计算成功（{len(result['score3'])}个方法）",
+            data=result
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"列式批量评分计算失败: {str(e)}")
+
+
+@router.post("/scoring/batch/stream", tags=["评分系统"])
+async def stream_batch_scores(request: Request):
+    """
+    NDJSON流式批量评分
+    
+    请求体（application/x-ndjson）每行一个 /scoring/full-score 请求体；
+    响应每行一个结果，按输入顺序输出：
+    - 成功：{"index": 0, "success": true, "data": {...}}（data 与 /scoring/full-score 相同）
+    - 失败：{"index": 1, "success": false, "error": "..."}（不影响其他行）
+    """
+    return DuplexStreamingResponse(
+        score_ndjson(request.stream(), build_scoring_kwargs, settings.STREAM_CHUNK_SIZE),
+        media_type=NDJSON_MEDIA_TYPE
+    )
+
+
+@router.post("/scoring/sweep", response_model=APIResponse, tags=["评分系统"])
+async def calculate_scheme_sweep(request: FullScoreRequest, accept: Optional[str] = Header(None)):
+    """
+    权重方案全组合扫描：对一个方法计算全部 4⁶=4096 种预定义方案组合下的得分
+    
+    请求体与 /scoring/full-score 相同（其中的方案选择字段会被忽略），返回：
+    - axes: 6个方案轴及其方案名称顺序
+    - score1 / score2 / score3: 按 axes 顺序索引的得分网格
+    - summary: 各网格的 min/max/mean 及对应的方案组合
+    
+    Accept 为 application/vnd.lcgauge.arrays 时返回未舍入的二进制得分网格
+    """
+    try:
+        scoring_kwargs = build_scoring_kwargs(request)
+        if array_transport.wants_arrays(accept):
+            content = await compute_executor.run(
+                array_transport.scheme_sweep_binary,
+                scoring_kwargs,
+                cost=scoring_cost(scoring_kwargs)
+            )
+            return Response(content=content, media_type=array_transport.ARRAY_MEDIA_TYPE)
+        result = await compute_executor.run(
+            batch_scoring.calculate_scheme_sweep,
+            scoring_kwargs,
+            cost=scoring_cost(scoring_kwargs)
+        )
+        return api_response(
+            message=f"权重方案扫描完成（{result['combinations']}种组合）",
+            data=result
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"权重方案扫描失败: {str(e)}")
+
+
+@router.post("/scoring/compare", response_model=APIResponse, tags=["评分系统"])
+async def compare_methods(request: CompareRequest, db: AsyncSession = Depends(get_read_db)):
+    """
+    多方法对比（一次向量化计算）
+    
+    方法可以直接给出（methods），也可以引用已保存分析的ID（analysis_ids，需带有完整评分输入）。
+    返回与对比顺序对齐的各层得分、相对 baseline 的差值、排名（1为得分最低，即最绿色）、
+    各层/各小因子的最优方法，以及按试剂名称合并的质量表
+    """
+    methods = [build_scoring_kwargs(method) for method in request.methods]
+    labels = [f"方法{i + 1}" for i in range(len(methods))]
+    
+    if request.analysis_ids:
+        stmt = select(HPLCAnalysis).where(HPLCAnalysis.id.in_(request.analysis_ids))
+        stored = {a.id: a for a in (await db.execute(stmt)).scalars().all()}
+        for analysis_id in request.analysis_ids:
+            analysis = stored.get(analysis_id)
+            if analysis is None:
+                raise HTTPException(status_code=404, detail=f"分析记录 {analysis_id} 不存在")
+            if not analysis.raw_data:
+                raise HTTPException(status_code=400, detail=f"分析记录 {analysis_id} 没有完整评分输入")
+            try:
+                methods.append(build_scoring_kwargs(FullScoreRequest.model_validate(analysis.raw_data)))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"分析记录 {analysis_id} 的评分输入无效: {str(e)}")
+            labels.append(analysis.name)
+    
+    try:
+        result = await compute_executor.run(
+            method_comparison.compare_methods,
+            methods,
+            request.labels if request.labels is not None else labels,
+            request.baseline,
+            cost=sum(scoring_cost(method) for method in methods)
+        )
+        return api_response(
+            message=f"方法对比完成（{len(methods)}个方法）",
+            data=result
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"方法对比失败: {str(e)}")
+
+
+@router.post("/scoring/sessions", response_model=APIResponse, tags=["评分系统"])
+async def create_scoring_session(request: FullScoreRequest):
+    """
+    创建评分会话：计算完整评分（与 /scoring/full-score 共用结果缓存），并在服务端缓存 Layer 0-1 结果
+    
+    返回 token 和评分结果（结构与 /scoring/full-score 相同）。
+    之后切换权重方案时调用 /scoring/sessions/{token}/rescore，无需重新提交梯度和因子数据。
+    """
+    try:
+        # 会话保存在本进程内存中，只能在线程中计算
+        session = await compute_executor.run_in_thread(
+            method_sessions.create_session,
+            build_scoring_kwargs(request)
         )
-        
-        # 打印调试信息
-        print("=" * 80)
-        print("✅ 评分计算完成！")
-        print(f"📊 仪器小因子得分: {result['instrument']['sub_factors']}")
-        print(f"📊 前处理小因子得分: {result['preparation']['sub_factors']}")
-        print(f"📊 合成小因子得分 (merged): {result['merged']['sub_factors']}")
-        print(f"🎯 最终总分 (Score₃): {result['final']['score3']}")
-        print(f"🔬 仪器阶段 (Score₁): {result['instrument']['score1']}")
-        print(f"🧪 前处理阶段 (Score₂): {result['preparation']['score2']}")
-        print("=" * 80)
-        
         return APIResponse(
             success=True,
-            message="完整评分计算成功",
-            data=result
+            message="评分会话创建成功（缓存）" if session["cached"] else "评分会话创建成功",
+            data=session
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"评分计算失败: {str(e)}")
+
+
+@router.post("/scoring/sessions/{token}/rescore", response_model=APIResponse, tags=["评分系统"])
+async def rescore_scoring_session(token: str, request: RescoreRequest):
+    """使用会话缓存的 Layer 0-1 结果，按新的权重方案/P/R/D因子重算 Layer 2-5"""
+    try:
+        result = await compute_executor.run_in_thread(
+            method_sessions.rescore_session,
+            token,
+            request.model_dump()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"评分计算失败: {str(e)}")
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail="评分会话不存在或已过期")
+    
+    return APIResponse(
+        success=True,
+        message="评分重算成功",
+        data=result
+    )
+
+
+@router.delete("/scoring/sessions/{token}", response_model=APIResponse, tags=["评分系统"])
+async def delete_scoring_session(token: str):
+    """删除评分会话"""
+    if not method_sessions.session_store.delete(token):
+        raise HTTPException(status_code=404, detail="评分会话不存在或已过期")
+    return APIResponse(success=True, message="评分会话已删除")
+
+
+def _save_upload(fileobj, path: Path):
+    with open(path, "wb") as out:
+        shutil.copyfileobj(fileobj, out)
+
+
+@router.post("/scoring/import", tags=["评分系统"])
+async def import_methods(file: UploadFile = File(..., description="方法表（.csv / .xlsx，长表格式）")):
+    """
+    批量导入方法表并返回Excel评分报告
+    
+    方法表格式见 app/services/method_import.py。文件按块读取和评分，
+    解析或计算失败的方法在报告的 error 列中注明，不影响其他方法。
+    响应头 X-Methods-Scored / X-Methods-Failed 给出成功和失败的方法数。
+    """
+    suffix = Path(file.filename or "").suffix.lower()
+    if suffix not in (".csv", ".txt", ".xlsx", ".xlsm"):
+        raise HTTPException(status_code=400, detail=f"不支持的文件格式：{suffix or '未知'}（支持 .csv / .xlsx）")
+    
+    workdir = Path(tempfile.mkdtemp(prefix="lc_gauge_import_"))
+    source = workdir / f"methods{suffix}"
+    report = workdir / "scoring_report.xlsx"
+    try:
+        # 上传文件可能有数百MB，复制到工作目录也不占用事件循环
+        await compute_executor.run_in_thread(_save_upload, file.file, source)
+        summary = await compute_executor.run(
+            method_import.import_and_score,
+            str(source),
+            str(report),
+            chunk_methods=settings.JOB_CHUNK_SIZE,
+            cost=source.stat().st_size  # 按文件字节数估算计算量
+        )
+    except ValueError as e:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise HTTPException(status_code=500, detail=f"方法表导入失败: {str(e)}")
+    
+    return FileResponse(
+        report,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename="scoring_report.xlsx",
+        headers={
+            "X-Methods-Scored": str(summary["scored"]),
+            "X-Methods-Failed": str(summary["failed"]),
+        },
+        background=BackgroundTask(shutil.rmtree, workdir, ignore_errors=True)
+    )
+
+
+# ============================================================================
+# 试剂因子库
+# ============================================================================
+
+@router.post("/scoring/library/full-score", response_model=APIResponse, tags=["试剂因子库"])
+async def calculate_library_score(request: LibraryScoreRequest):
+    """
+    按试剂ID或名称引用试剂因子库的完整评分
     
+    composition / volumes 的键可以是试剂ID（如 "12"）或名称（忽略大小写），
+    试剂的9个小因子和密度从试剂因子库中读取；densities 可选，用于覆盖库中的密度。
+    返回结构与 /scoring/full-score 相同，试剂名称统一为库中的名称。
+    """
+    try:
+        return await score_with_cache(build_library_kwargs(request))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"评分计算失败: {str(e)}")
 
 
+@router.post("/scoring/library/batch", response_model=APIResponse, tags=["试剂因子库"])
+async def calculate_library_batch_scores(request: LibraryBatchScoreRequest):
+    """按试剂ID或名称引用试剂因子库的批量评分（结果顺序与 methods 一致）"""
+    try:
+        methods = [build_library_kwargs(method) for method in request.methods]
+        results = await compute_executor.run(
+            batch_scoring.calculate_batch_scores,
+            methods,
+            cost=sum(scoring_cost(method) for method in methods)
+        )
+        return api_response(
+            message=f"批量评分计算成功（{len(results)}个方法）",
+            data=results
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量评分计算失败: {str(e)}")
+
+
+@router.get("/reagents", response_model=APIResponse, tags=["试剂因子库"])
+async def list_reagents():
+    """获取试剂因子库中的全部试剂"""
+    index = reagent_library.index
+    return APIResponse(
+        success=True,
+        message="获取试剂列表成功",
+        data=[index.record(row) for row in range(len(index))]
+    )
+
+
+@router.get("/reagents/{ref}", response_model=APIResponse, tags=["试剂因子库"])
+async def get_reagent(ref: str):
+    """按ID或名称获取试剂"""
+    index = reagent_library.index
+    try:
+        row = index.row_of(ref)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return APIResponse(
+        success=True,
+        message="获取试剂成功",
+        data=index.record(row)
+    )
+
+
+@router.post("/reagents", response_model=APIResponse, tags=["试剂因子库"])
+async def create_reagent(reagent: ReagentCreate, db: AsyncSession = Depends(get_db)):
+    """新增试剂（名称忽略大小写不能与已有试剂重复）"""
+    if reagent_library.contains(reagent.name):
+        raise HTTPException(status_code=409, detail=f"试剂已存在：{reagent.name}")
+    db_reagent = Reagent(**reagent.model_dump(), is_builtin=False)
+    db.add(db_reagent)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"试剂已存在：{reagent.name}")
+    # 提交后ID已回填，其余字段来自请求，不需要 refresh 重新占用写连接
+    await reagent_library.reload()
+    
+    return APIResponse(
+        success=True,
+        message="试剂创建成功",
+        data={"id": db_reagent.id, "name": db_reagent.name, **dict(zip(LIBRARY_COLUMNS, reagent_values(db_reagent)))}
+    )
+
+
+@router.put("/reagents/{reagent_id}", response_model=APIResponse, tags=["试剂因子库"])
+async def update_reagent(reagent_id: int, changes: ReagentUpdate, db: AsyncSession = Depends(get_db)):
+    """修改试剂（只修改提交的字段）"""
+    db_reagent = await db.get(Reagent, reagent_id)
+    if db_reagent is None:
+        raise HTTPException(status_code=404, detail="试剂不存在")
+    if changes.name is not None and reagent_library.contains(changes.name, exclude_id=reagent_id):
+        raise HTTPException(status_code=409, detail=f"试剂已存在：{changes.name}")
+    for key, value in changes.model_dump(exclude_none=True).items():
+        setattr(db_reagent, key, value)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"试剂已存在：{changes.name}")
+    await reagent_library.reload()
+    
+    return APIResponse(
+        success=True,
+        message="试剂修改成功",
+        data={"id": db_reagent.id, "name": db_reagent.name, **dict(zip(LIBRARY_COLUMNS, reagent_values(db_reagent)))}
+    )
+
+
+@router.delete("/reagents/{reagent_id}", response_model=APIResponse, tags=["试剂因子库"])
+async def delete_reagent(reagent_id: int, db: AsyncSession = Depends(get_db)):
+    """删除试剂"""
+    db_reagent = await db.get(Reagent, reagent_id)
+    if db_reagent is None:
+        raise HTTPException(status_code=404, detail="试剂不存在")
+    await db.delete(db_reagent)
+    await db.commit()
+    await reagent_library.reload()
+    return APIResponse(success=True, message="试剂已删除")
+
+
+# ============================================================================
+# 后台评分任务
+# ============================================================================
+
+@router.post("/scoring/jobs", response_model=APIResponse, tags=["评分任务"])
+async def submit_scoring_job(request: ScoringJobRequest):
+    """
+    提交后台评分任务，立即返回任务ID
+    
+    之后通过 GET /scoring/jobs/{job_id} 轮询进度，或订阅 /scoring/jobs/{job_id}/events，
+    完成后从 /scoring/jobs/{job_id}/result 获取结果
+    """
+    try:
+        job = await job_queue.submit(
+            request.kind,
+            [build_scoring_kwargs(method) for method in request.methods]
+        )
+        return APIResponse(
+            success=True,
+            message="评分任务已提交",
+            data=job
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"数据验证错误: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"提交评分任务失败: {str(e)}")
+
+
+@router.get("/scoring/jobs/{job_id}", response_model=APIResponse, tags=["评分任务"])
+async def get_scoring_job(job_id: str):
+    """获取任务状态和进度"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="评分任务不存在")
+    return APIResponse(
+        success=True,
+        message="获取任务状态成功",
+        data=job_summary(job)
+    )
+
+
+@router.get("/scoring/jobs/{job_id}/events", tags=["评分任务"])
+async def stream_scoring_job(job_id: str):
+    """以 Server-Sent Events 推送任务进度，任务结束后关闭连接"""
+    if await job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="评分任务不存在")
+    
+    async def events():
+        async for summary in job_queue.watch(job_id):
+            yield f"data: {json.dumps(summary, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.get("/scoring/jobs/{job_id}/result", response_model=APIResponse, tags=["评分任务"])
+async def get_scoring_job_result(job_id: str):
+    """获取已完成任务的结果（列表顺序与提交的 methods 一致）"""
+    job = await job_queue.get(job_id, with_result=True)
+    if job is None:
+        raise HTTPException(status_code=404, detail="评分任务不存在")
+    if job.status != JOB_COMPLETED:
+        raise HTTPException(status_code=409, detail=f"评分任务尚未完成（当前状态：{job.status}）")
+    return api_response(
+        message="获取任务结果成功",
+        data=job.result
+    )
+
+
+@router.delete("/scoring/jobs/{job_id}", response_model=APIResponse, tags=["评分任务"])
+async def cancel_scoring_job(job_id: str):
+    """取消任务（运行中的任务在当前块计算完成后停止）"""
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="评分任务不存在")
+    return APIResponse(
+        success=True,
+        message="评分任务取消请求已提交",
+        data=job
+    )
+
+
+@router.get("/scoring/cache", response_model=APIResponse, tags=["评分系统"])
+async def get_score_cache_stats():
+    """获取评分结果缓存的统计信息（条目数、命中/未命中次数等）"""
+    return APIResponse(
+        success=True,
+        message="获取缓存统计成功",
+        data=score_cache.stats()
+    )
+
+
+@router.delete("/scoring/cache", response_model=APIResponse, tags=["评分系统"])
+async def clear_score_cache():
+    """清空评分结果缓存"""
+    removed = score_cache.invalidate()
+    return APIResponse(
+        success=True,
+        message=f"评分缓存已清空（{removed}条）",
+        data={"removed": removed}
+    )
+
+
 @router.get("/scoring/weight-schemes", response_model=APIResponse, tags=["评分系统"])
 async def get_weight_schemes():
     """
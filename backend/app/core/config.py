@@ -34,6 +34,7 @@ def get_data_dir() -> Path:
 # 获取数据目录
 DATA_DIR = get_data_dir()
 DATABASE_PATH = DATA_DIR / 'hplc_analysis.db'
+TRACE_DIR = DATA_DIR / 'traces'  # 分块上传的原始检测器信号
 
 
 class Settings(BaseSettings):
@@ -61,6 +62,52 @@ class Settings(BaseSettings):
     # 数据库配置
     DATABASE_URL: str = f"sqlite+aiosqlite:///{DATABASE_PATH}"
     
+    # SQLite调优（每个连接建立时设置）
+    # WAL模式下读不阻塞写；写连接只有一个，并发写在连接池中排队而不是返回 database is locked
+    SQLITE_JOURNAL_MODE: str = "WAL"       # WAL / DELETE / TRUNCATE / PERSIST / MEMORY / OFF
+    SQLITE_SYNCHRONOUS: str = "NORMAL"     # OFF / NORMAL / FULL / EXTRA（WAL模式下NORMAL不会损坏数据库）
+    SQLITE_CACHE_SIZE_KB: int = 65536      # 每个连接的页缓存
+    SQLITE_MMAP_SIZE_MB: int = 256         # 内存映射读取，0表示禁用
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000     # 遇到锁时的等待时间
+    SQLITE_READ_POOL_SIZE: int = 4         # 只读连接数
+    
+    # 日志配置（默认只输出警告和错误；DEBUG 会输出评分各层的中间结果）
+    LOG_LEVEL: str = "WARNING"
+    # 是否在响应头中返回 Server-Timing（各评分层耗时）
+    SERVER_TIMING: bool = True
+    
+    # 评分会话配置（Layer 0-1 结果缓存，用于切换权重方案时增量重算）
+    METHOD_SESSION_MAX: int = 256
+    METHOD_SESSION_TTL_SECONDS: int = 3600
+    
+    # 评分结果缓存配置（/scoring/full-score，0表示禁用）
+    # 计算量（试剂数 × 梯度点数）超过 SCORE_CACHE_MAX_COST 的请求直接计算，不走缓存
+    SCORE_CACHE_MAX_ENTRIES: int = 1024
+    SCORE_CACHE_MAX_COST: int = 1000
+    
+    # 计算调度配置（CPU密集型评分不在事件循环中执行）
+    # 计算量（试剂数 × 梯度点数之和）达到阈值时使用进程池，否则使用线程
+    SCORING_PROCESS_POOL: bool = True
+    SCORING_WORKERS: int = 0  # 0表示使用CPU核数
+    SCORING_PROCESS_THRESHOLD: int = 50000
+    
+    # 后台评分任务配置（工作协程数、每次提交计算的方法数）
+    JOB_WORKERS: int = 2
+    JOB_CHUNK_SIZE: int = 200
+    
+    # NDJSON流式批量评分每块计算的方法数
+    STREAM_CHUNK_SIZE: int = 50
+    
+    # 原始信号分块上传：单个分块请求体的上限
+    TRACE_CHUNK_MAX_MB: int = 64
+    
+    # 响应序列化与压缩
+    # 大结果接口使用 orjson 直接序列化（未安装时回退到标准库json）
+    FAST_JSON: bool = True
+    # 客户端声明 Accept-Encoding: gzip 且响应不小于该字节数时压缩（0表示禁用压缩）
+    GZIP_MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    
     # 安全配置
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
@@ -0,0 +1,107 @@
+"""
+日志与分层计时模块
+
+- 结构化日志：统一使用 "lc_gauge.*" 命名空间的 logging 记录器，默认级别 WARNING，
+  调试信息只有在 LOG_LEVEL=DEBUG 时才会格式化和输出
+- 分层计时：评分各层用 timed("mass") 等上下文管理器计时，
+  ServerTimingMiddleware 把本次请求累计的耗时写入 Server-Timing 响应头
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+
+LOGGER_NAMESPACE = "lc_gauge"
+
+# 当前请求的分层耗时（毫秒）；为None时不计时
+_layer_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("layer_timings", default=None)
+
+
+def configure_logging(level: Optional[str] = None):
+    """配置 lc_gauge 命名空间的日志级别和输出格式（重复调用只会更新级别）"""
+    logger = logging.getLogger(LOGGER_NAMESPACE)
+    logger.setLevel((level or settings.LOG_LEVEL).upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s %(message)s"
+        ))
+        logger.addHandler(handler)
+        logger.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """获取模块日志记录器，如 get_logger("scoring") -> lc_gauge.scoring"""
+    return logging.getLogger(f"{LOGGER_NAMESPACE}.{name}")
+
+
+@contextmanager
+def timed(layer: str):
+    """累计一个评分层的耗时（同名层多次计时会相加，如仪器分析和前处理的质量计算）"""
+    timings = _layer_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[layer] = timings.get(layer, 0.0) + (time.perf_counter() - start) * 1000.0
+
+
+def record_timings(extra: Dict[str, float]):
+    """合并在其他线程/进程中测得的分层耗时（毫秒）"""
+    timings = _layer_timings.get()
+    if timings is None:
+        return
+    for layer, duration in extra.items():
+        timings[layer] = timings.get(layer, 0.0) + duration
+
+
+@contextmanager
+def capture_timings():
+    """在工作线程/进程中收集分层耗时，退出后由调用方通过 record_timings 合并"""
+    timings: Dict[str, float] = {}
+    token = _layer_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _layer_timings.reset(token)
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{layer};dur={duration:.3f}" for layer, duration in timings.items())
+
+
+class ServerTimingMiddleware:
+    """为每个HTTP请求收集分层耗时，并写入 Server-Timing 响应头"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _layer_timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                entries = dict(timings)
+                entries["total"] = (time.perf_counter() - start) * 1000.0
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(entries).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _layer_timings.reset(token)
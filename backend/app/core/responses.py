@@ -0,0 +1,120 @@
+"""
+响应序列化与压缩模块
+
+批量评分、方案扫描、分析列表等接口的结果是多层嵌套的字典，体积可达数MB：
+- FastJSONResponse 直接序列化已经是基本类型的结果，跳过 jsonable_encoder 的逐层遍历
+  和 response_model 校验；安装了 orjson 时使用 orjson（可直接处理numpy数组、datetime），
+  否则回退到标准库json
+- CompressionMiddleware 按 Accept-Encoding 协商gzip压缩，流式响应（SSE、NDJSON）
+  和已压缩的文件不压缩，以免缓冲导致逐行输出失效
+"""
+import json
+from typing import Any, Optional
+
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.responses import JSONResponse
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+
+# ============================================================================
+# JSON序列化
+# ============================================================================
+
+def _default(value: Any) -> Any:
+    """orjson 无法直接处理的对象（Pydantic模型等）交给 jsonable_encoder"""
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为UTF-8 JSON字节串"""
+    if orjson is not None and settings.FAST_JSON:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """内容已是基本类型（dict/list/数值/字符串）时使用的JSON响应"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def api_response(message: str, data: Any = None, success: bool = True, **kwargs) -> FastJSONResponse:
+    """
+    构造与 APIResponse 结构相同的快速响应
+
+    路由直接返回 Response 时 FastAPI 不再执行 response_model 校验和编码，
+    接口文档中的响应模型保持不变
+    """
+    return FastJSONResponse({"success": success, "message": message, "data": data}, **kwargs)
+
+
+# ============================================================================
+# gzip压缩协商
+# ============================================================================
+
+# 不压缩的响应类型：流式输出需要逐块到达客户端，文件已压缩，二进制数组压缩率低
+UNCOMPRESSED_MEDIA_TYPES = {
+    "text/event-stream",
+    "application/x-ndjson",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/zip",
+    "application/gzip",
+    "application/vnd.lcgauge.arrays",  # 二进制数组：客户端需要按偏移直接读取
+}
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """解析 Accept-Encoding，支持 q 值（gzip;q=0 表示拒绝）"""
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality > 0
+    return False
+
+
+class _SelectiveGZipResponder(GZipResponder):
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            media_type = Headers(raw=message["headers"]).get("content-type", "").split(";")[0].strip()
+            if media_type in UNCOMPRESSED_MEDIA_TYPES:
+                # 复用父类“已设置Content-Encoding”的分支：原样透传
+                self.initial_message = message
+                self.content_encoding_set = True
+                return
+        await super().send_with_gzip(message)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """按 Accept-Encoding 协商的gzip压缩（跳过流式响应和已压缩文件）"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and accepts_gzip(Headers(scope=scope).get("accept-encoding")):
+            responder = _SelectiveGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -1,16 +1,96 @@
 """
 数据库连接模块
+
+SQLite使用两个引擎：
+- 写引擎只有一个连接，所有写事务在连接池中排队，避免多个连接争抢写锁
+  （持有写会话时不能再打开另一个写会话，否则会一直等待连接池直到超时；需要读取时使用只读会话）
+- 读引擎有多个只读连接（query_only），WAL模式下读取不会排在写事务后面
+每个连接建立时按配置设置 journal_mode、synchronous、cache_size、mmap_size、busy_timeout
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from typing import List
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
 import os
 
-# 创建数据库引擎
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True
+
+JOURNAL_MODES = {"WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"}
+SYNCHRONOUS_LEVELS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def sqlite_pragmas(read_only: bool = False) -> List[str]:
+    """
+    根据配置生成连接建立时执行的PRAGMA语句
+    
+    异常：
+        ValueError: journal_mode / synchronous 配置不合法
+    """
+    journal_mode = settings.SQLITE_JOURNAL_MODE.upper()
+    synchronous = settings.SQLITE_SYNCHRONOUS.upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"不支持的 SQLITE_JOURNAL_MODE：{settings.SQLITE_JOURNAL_MODE}")
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"不支持的 SQLITE_SYNCHRONOUS：{settings.SQLITE_SYNCHRONOUS}")
+    
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA journal_mode = {journal_mode}",
+        f"PRAGMA synchronous = {synchronous}",
+        f"PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KB)}",  # 负数表示KB
+        f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE_MB) * 1024 * 1024}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    return pragmas
+
+
+def _is_sqlite_memory(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def create_engine_for(database_url: str, read_only: bool = False, pool_size: int = 1) -> AsyncEngine:
+    """创建引擎；SQLite文件数据库使用固定大小的连接池并在连接建立时应用PRAGMA"""
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or _is_sqlite_memory(url):
+        return create_async_engine(database_url, echo=settings.DEBUG, future=True)
+    
+    pragmas = sqlite_pragmas(read_only)
+    new_engine = create_async_engine(
+        database_url,
+        echo=settings.DEBUG,
+        future=True,
+        # aiosqlite 默认不复用连接，每次会话都要重新打开文件并设置PRAGMA
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=max(1, pool_size),
+        max_overflow=0,
+        pool_timeout=max(30, settings.SQLITE_BUSY_TIMEOUT_MS / 1000),
+        connect_args={"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+    )
+    
+    @event.listens_for(new_engine.sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+    
+    return new_engine
+
+
+# 写引擎（建表、迁移和所有写事务）
+engine = create_engine_for(settings.DATABASE_URL)
+
+# 只读引擎（内存数据库的每个连接是独立的库，只能共用写引擎）
+read_engine = (
+    engine if _is_sqlite_memory(make_url(settings.DATABASE_URL))
+    else create_engine_for(settings.DATABASE_URL, read_only=True, pool_size=settings.SQLITE_READ_POOL_SIZE)
 )
 
 # 创建会话工厂
@@ -20,6 +100,12 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 # 创建基类
 Base = declarative_base()
 
@@ -34,12 +120,46 @@ async def init_db():
     # 创建所有表
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+
+
+def _add_missing_columns(conn):
+    """
+    为旧版本数据库补齐新增的列和索引
+
+    create_all 只创建不存在的表，已有表中新增的列（如 hplc_analyses.score1）和索引需要单独添加
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        for column in missing:
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
 
 
 async def get_db():
-    """获取数据库会话"""
+    """获取数据库会话（可写）"""
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db():
+    """获取只读数据库会话（列表、详情等查询）"""
+    async with AsyncReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def dispose_engines():
+    """关闭连接池（应用退出时调用）"""
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
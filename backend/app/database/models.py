@@ -1,7 +1,8 @@
 """
 数据库模型
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, Boolean
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.database.connection import Base
 
@@ -13,7 +14,8 @@ class HPLCAnalysis(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
     description = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # SQLite的二级索引隐含rowid，单列索引即可支持 (列, id) 游标分页
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # 分析参数
@@ -27,6 +29,11 @@ class HPLCAnalysis(Base):
     green_score = Column(Float)
     eco_scale_score = Column(Float)
     
+    # 完整评分系统得分（0-100），用于排序、筛选和分页
+    score1 = Column(Float, index=True)  # 仪器分析阶段
+    score2 = Column(Float, index=True)  # 样品前处理阶段
+    score3 = Column(Float, index=True)  # 最终总分
+    
     # 分析数据（JSON格式存储）
     raw_data = Column(JSON)
     analysis_results = Column(JSON)
@@ -53,3 +60,51 @@ class GreenChemistryMetric(Base):
     total_score = Column(Float)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ScoringJob(Base):
+    """后台评分任务（批量评分、权重方案扫描等）"""
+    __tablename__ = "scoring_jobs"
+    
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(20), nullable=False)
+    status = Column(String(20), nullable=False, index=True)  # pending/running/completed/failed/cancelled
+    progress = Column(Integer, default=0)  # 已完成的方法数
+    total = Column(Integer, default=0)
+    
+    # 参数和结果可能很大，查询状态时不加载
+    payload = deferred(Column(JSON))  # 评分参数（calculate_full_scores 关键字参数列表）
+    result = deferred(Column(JSON))
+    error = Column(Text)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+
+class Reagent(Base):
+    """试剂因子库"""
+    __tablename__ = "reagents"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(200), nullable=False, unique=True, index=True)
+    density = Column(Float, nullable=False)  # g/mL
+    
+    # 9个小因子（0-1）
+    S1 = Column(Float, nullable=False, default=0.0)  # 释放潜力
+    S2 = Column(Float, nullable=False, default=0.0)  # 火灾/爆炸
+    S3 = Column(Float, nullable=False, default=0.0)  # 反应/分解
+    S4 = Column(Float, nullable=False, default=0.0)  # 急性毒性
+    H1 = Column(Float, nullable=False, default=0.0)  # 慢性毒性
+    H2 = Column(Float, nullable=False, default=0.0)  # 刺激性
+    E1 = Column(Float, nullable=False, default=0.0)  # 持久性
+    E2 = Column(Float, nullable=False, default=0.0)  # 排放
+    E3 = Column(Float, nullable=False, default=0.0)  # 水体危害
+    
+    # 再生因子、处置因子（0-1）
+    regeneration = Column(Float, default=0.0)
+    disposal = Column(Float, default=0.0)
+    
+    is_builtin = Column(Boolean, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
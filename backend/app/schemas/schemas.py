@@ -1,10 +1,12 @@
 """
 Pydantic数据模型
 """
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional, Dict, Any, Literal, Union
 from datetime import datetime
 
+from app.services.scoring_service import validate_custom_weights
+
 
 class HPLCAnalysisCreate(BaseModel):
     """创建HPLC分析请求"""
@@ -15,6 +17,13 @@ class HPLCAnalysisCreate(BaseModel):
     flow_rate: float = Field(..., description="流速(mL/min)")
     column_type: str = Field(..., description="色谱柱类型")
     temperature: float = Field(..., description="温度(℃)")
+    ratio_a: float = Field(0.5, ge=0, le=1, description="溶剂A比例（仅用于未提供 scoring 时的简化绿色评分）")
+    scoring: Optional["FullScoreRequest"] = Field(None, description="完整评分输入；提供时保存完整的五层评分结果")
+
+
+class HPLCAnalysisBulkCreate(BaseModel):
+    """批量创建HPLC分析请求（同一事务写入）"""
+    analyses: List[HPLCAnalysisCreate] = Field(..., min_length=1, description="待创建的分析列表")
 
 
 class HPLCAnalysisResponse(BaseModel):
@@ -30,6 +39,9 @@ class HPLCAnalysisResponse(BaseModel):
     temperature: float
     green_score: Optional[float]
     eco_scale_score: Optional[float]
+    score1: Optional[float] = None
+    score2: Optional[float] = None
+    score3: Optional[float] = None
     
     class Config:
         from_attributes = True
@@ -43,6 +55,14 @@ class GreenChemistryRequest(BaseModel):
     volume_ml: float = Field(1.0, description="总体积(mL)", gt=0)
 
 
+class SolventMixtureRequest(BaseModel):
+    """多组分混合溶剂评分请求：给出比例矩阵，或按 grid_steps 生成等比例网格（二元曲线 / 三元相图）"""
+    solvents: List[str] = Field(..., min_length=1, description="N个溶剂名称")
+    fractions: Optional[List[List[float]]] = Field(None, description="[M][N] 各混合物的组分比例（按行归一化）")
+    grid_steps: Optional[int] = Field(None, ge=1, description="比例网格的步数（每个组分取 0, 1/steps, ..., 1）")
+    volume_ml: Union[float, List[float]] = Field(1.0, description="总体积(mL)，标量或长度为M的列表")
+
+
 class EcoScaleRequest(BaseModel):
     """Eco-Scale评估请求"""
     yield_percentage: float = Field(..., description="产率百分比", ge=0, le=100)
@@ -68,6 +88,64 @@ class ChromatogramAnalysisResponse(BaseModel):
     peaks: List[Dict[str, float]]
 
 
+class TraceAnalysisRequest(BaseModel):
+    """
+    原始色谱信号分析请求（仅用于接口文档，服务端直接把数组解码为NumPy数组，不逐点校验）
+
+    二进制格式（Content-Type: application/vnd.lcgauge.arrays）：列 signal（可选 time），
+    其余字段放在头部 meta 中
+    """
+    signal: List[float] = Field(..., description="检测器响应值")
+    times: Optional[List[float]] = Field(None, description="时间(分钟)，严格递增；与 sampling_interval 二选一")
+    sampling_interval: Optional[float] = Field(None, gt=0, description="等间隔采样的间隔(分钟)")
+    start_time: float = Field(0.0, description="等间隔采样的起始时间(分钟)")
+    baseline_window: Optional[float] = Field(None, gt=0, description="基线窗口(分钟)，默认运行时长的5%")
+    min_prominence: Optional[float] = Field(None, gt=0, description="最小峰突出度，默认噪声的10倍")
+    min_height: Optional[float] = Field(None, description="最小峰高(基线校正后)")
+    min_width: Optional[float] = Field(None, gt=0, description="最小半峰宽(分钟)")
+
+
+class SequenceInjection(BaseModel):
+    """序列中的一次进样：峰表，或已上传原始信号的 trace_id"""
+    name: Optional[str] = Field(None, description="进样名称，默认按序号")
+    retention_times: Optional[List[float]] = Field(None, description="保留时间列表")
+    peak_areas: Optional[List[float]] = Field(None, description="峰面积列表")
+    trace_id: Optional[str] = Field(None, description="已上传的原始信号")
+    channel: Optional[str] = Field(None, description="原始信号通道，默认第一个通道")
+    start_time: Optional[float] = Field(None, description="时间窗口起点(分钟)")
+    end_time: Optional[float] = Field(None, description="时间窗口终点(分钟)")
+    baseline_window: Optional[float] = Field(None, gt=0, description="基线窗口(分钟)")
+    min_prominence: Optional[float] = Field(None, gt=0, description="最小峰突出度")
+    min_height: Optional[float] = Field(None, description="最小峰高")
+    min_width: Optional[float] = Field(None, gt=0, description="最小半峰宽(分钟)")
+
+
+class SequenceAnalysisRequest(BaseModel):
+    """进样序列分析请求（按进样顺序）"""
+    injections: List[SequenceInjection] = Field(..., min_length=1, description="各次进样")
+
+
+class TraceCreateRequest(BaseModel):
+    """创建分块上传的原始信号（之后按通道以二进制分块写入）"""
+    n_points: int = Field(..., gt=0, description="每个通道的点数")
+    channels: List[str] = Field(default_factory=lambda: ["signal"], min_length=1, description="通道名称（如各检测波长）")
+    dtype: Literal["float32", "float64"] = Field("float64", description="信号数据类型（小端）")
+    sampling_interval: Optional[float] = Field(None, gt=0, description="等间隔采样的间隔(分钟)；has_time 为 false 时必填")
+    start_time: float = Field(0.0, description="等间隔采样的起始时间(分钟)")
+    has_time: bool = Field(False, description="是否单独上传时间轴（float64，通道名 time）")
+
+
+class StoredTraceAnalysisRequest(BaseModel):
+    """已上传信号的峰检测请求"""
+    channel: Optional[str] = Field(None, description="通道名称，默认第一个通道")
+    start_time: Optional[float] = Field(None, description="时间窗口起点(分钟)")
+    end_time: Optional[float] = Field(None, description="时间窗口终点(分钟)")
+    baseline_window: Optional[float] = Field(None, gt=0, description="基线窗口(分钟)，默认窗口时长的5%")
+    min_prominence: Optional[float] = Field(None, gt=0, description="最小峰突出度，默认噪声的10倍")
+    min_height: Optional[float] = Field(None, description="最小峰高(基线校正后)")
+    min_width: Optional[float] = Field(None, gt=0, description="最小半峰宽(分钟)")
+
+
 class APIResponse(BaseModel):
     """通用API响应"""
     success: bool
@@ -109,10 +187,8 @@ class PreparationData(BaseModel):
     factor_matrix: Dict[str, ReagentFactors] = Field(..., description="试剂因子矩阵")
 
 
-class FullScoreRequest(BaseModel):
-    """完整评分请求"""
-    instrument: InstrumentAnalysisData = Field(..., description="仪器分析数据")
-    preparation: PreparationData = Field(..., description="样品前处理数据")
+class ScoringParameters(BaseModel):
+    """评分参数：P/R/D因子与权重方案（各类评分请求共用）"""
     p_factor: float = Field(..., ge=0, description="仪器分析P因子-能耗(0-100)")
     pretreatment_p_factor: float = Field(0.0, ge=0, description="前处理P因子-能耗(0-100)")
     
@@ -132,6 +208,155 @@ class FullScoreRequest(BaseModel):
     
     # 自定义权重（可选，当方案为Custom时使用）
     custom_weights: Optional[Dict[str, Dict[str, float]]] = Field(None, description="自定义权重配置")
+    
+    @field_validator("custom_weights")
+    @classmethod
+    def check_custom_weights(cls, value):
+        """在请求校验阶段编译自定义权重（完整性、非负、总和为1）"""
+        validate_custom_weights(value)
+        return value
+
+
+class FullScoreRequest(ScoringParameters):
+    """完整评分请求"""
+    instrument: InstrumentAnalysisData = Field(..., description="仪器分析数据")
+    preparation: PreparationData = Field(..., description="样品前处理数据")
+
+
+# HPLCAnalysisCreate.scoring 引用了在其后定义的 FullScoreRequest
+HPLCAnalysisCreate.model_rebuild()
+HPLCAnalysisBulkCreate.model_rebuild()
+
+
+class BatchScoreRequest(BaseModel):
+    """批量评分请求"""
+    methods: List[FullScoreRequest] = Field(..., min_length=1, description="待评分的方法列表")
+
+
+class CompareRequest(BaseModel):
+    """多方法对比请求：对比顺序为 methods 在前、analysis_ids 在后"""
+    methods: List[FullScoreRequest] = Field(default_factory=list, description="待对比的方法")
+    analysis_ids: List[int] = Field(default_factory=list, description="已保存分析的ID（使用其完整评分输入）")
+    labels: Optional[List[str]] = Field(None, description="方法名称（可选，数量与对比方法数相同）")
+    baseline: int = Field(0, ge=0, description="计算差值的基准方法下标")
+
+
+class ColumnarScoreRequest(BaseModel):
+    """
+    列式批量评分请求（仅用于接口文档，服务端按整列解码，不逐字段构造本模型）
+
+    N为方法数，R/Q为所有方法的仪器分析/前处理试剂行数之和；矩阵均为行优先展开
+    """
+    instrument_reagents: Optional[List[str]] = Field(None, description="[R] 仪器分析试剂名称(可选，用于错误提示)")
+    instrument_counts: List[int] = Field(..., description="[N] 每个方法的仪器分析试剂行数")
+    point_counts: List[int] = Field(..., description="[N] 每个方法的梯度时间点数")
+    time_points: List[float] = Field(..., description="[ΣT] 梯度时间点，各方法首尾相接")
+    curve_types: Optional[List[Optional[str]]] = Field(None, description="[ΣT] 曲线类型(可选，默认为linear)")
+    composition: List[float] = Field(..., description="[Σ行×T] 每个试剂行在其方法各时间点的比例(%)")
+    flow_rate: List[float] = Field(..., description="[N] 流速(mL/min)")
+    instrument_densities: List[float] = Field(..., description="[R] 试剂密度(g/mL)")
+    instrument_factors: List[float] = Field(..., description="[R×9] 小因子S1…E3")
+    prep_reagents: Optional[List[str]] = Field(None, description="[Q] 前处理试剂名称(可选)")
+    prep_counts: List[int] = Field(..., description="[N] 每个方法的前处理试剂行数")
+    prep_volumes: List[float] = Field(default_factory=list, description="[Q] 试剂体积(mL)")
+    prep_densities: List[float] = Field(default_factory=list, description="[Q] 试剂密度(g/mL)")
+    prep_factors: List[float] = Field(default_factory=list, description="[Q×9] 小因子S1…E3")
+    p_factor: Union[float, List[float]] = Field(..., description="[N]或标量 仪器分析P因子")
+    pretreatment_p_factor: Union[float, List[float]] = Field(0.0, description="[N]或标量 前处理P因子")
+    instrument_r_factor: Union[float, List[float]] = Field(..., description="[N]或标量")
+    instrument_d_factor: Union[float, List[float]] = Field(..., description="[N]或标量")
+    pretreatment_r_factor: Union[float, List[float]] = Field(..., description="[N]或标量")
+    pretreatment_d_factor: Union[float, List[float]] = Field(..., description="[N]或标量")
+    safety_scheme: str = Field("PBT_Balanced", description="所有方法共用的权重方案")
+    health_scheme: str = Field("Absolute_Balance")
+    environment_scheme: str = Field("PBT_Balanced")
+    instrument_stage_scheme: str = Field("Balanced")
+    prep_stage_scheme: str = Field("Balanced")
+    final_scheme: str = Field("Standard")
+    custom_weights: Optional[Dict[str, Dict[str, float]]] = Field(None, description="自定义权重配置")
+
+
+class LibraryInstrumentData(BaseModel):
+    """仪器分析阶段数据（试剂因子和密度取自试剂因子库）"""
+    time_points: List[float] = Field(..., description="梯度时间点(分钟)")
+    composition: Dict[str, List[float]] = Field(..., description="试剂组成百分比，键为试剂ID或名称")
+    flow_rate: float = Field(..., gt=0, description="流速(mL/min)")
+    curve_types: List[str] = Field(default=None, description="曲线类型列表(可选，默认为linear)")
+    densities: Optional[Dict[str, float]] = Field(None, description="覆盖库中的试剂密度(可选)")
+
+
+class LibraryPreparationData(BaseModel):
+    """样品前处理阶段数据（试剂因子和密度取自试剂因子库）"""
+    volumes: Dict[str, float] = Field(..., description="试剂体积(mL)，键为试剂ID或名称")
+    densities: Optional[Dict[str, float]] = Field(None, description="覆盖库中的试剂密度(可选)")
+
+
+class LibraryScoreRequest(ScoringParameters):
+    """按试剂ID/名称引用试剂因子库的完整评分请求"""
+    instrument: LibraryInstrumentData = Field(..., description="仪器分析数据")
+    preparation: LibraryPreparationData = Field(..., description="样品前处理数据")
+
+
+class LibraryBatchScoreRequest(BaseModel):
+    """按试剂ID/名称引用试剂因子库的批量评分请求"""
+    methods: List[LibraryScoreRequest] = Field(..., min_length=1, description="待评分的方法列表")
+
+
+class ReagentCreate(ReagentFactors):
+    """新增试剂"""
+    name: str = Field(..., min_length=1, max_length=200, description="试剂名称")
+    density: float = Field(..., gt=0, description="密度(g/mL)")
+    regeneration: float = Field(0.0, ge=0, le=1, description="再生因子")
+    disposal: float = Field(0.0, ge=0, le=1, description="处置因子")
+
+
+class ReagentUpdate(BaseModel):
+    """修改试剂（只需提交变化的字段）"""
+    name: Optional[str] = Field(None, min_length=1, max_length=200)
+    density: Optional[float] = Field(None, gt=0)
+    S1: Optional[float] = Field(None, ge=0, le=1)
+    S2: Optional[float] = Field(None, ge=0, le=1)
+    S3: Optional[float] = Field(None, ge=0, le=1)
+    S4: Optional[float] = Field(None, ge=0, le=1)
+    H1: Optional[float] = Field(None, ge=0, le=1)
+    H2: Optional[float] = Field(None, ge=0, le=1)
+    E1: Optional[float] = Field(None, ge=0, le=1)
+    E2: Optional[float] = Field(None, ge=0, le=1)
+    E3: Optional[float] = Field(None, ge=0, le=1)
+    regeneration: Optional[float] = Field(None, ge=0, le=1)
+    disposal: Optional[float] = Field(None, ge=0, le=1)
+
+
+class ScoringJobRequest(BaseModel):
+    """后台评分任务请求"""
+    kind: Literal["batch", "sweep"] = Field("batch", description="任务类型：batch 批量评分，sweep 权重方案扫描")
+    methods: List[FullScoreRequest] = Field(..., min_length=1, description="待评分的方法列表")
+
+
+class RescoreRequest(BaseModel):
+    """评分会话重算请求（只需提交变化的字段，未提交的字段沿用会话中的值）"""
+    safety_scheme: Optional[str] = Field(None, description="安全因子权重方案")
+    health_scheme: Optional[str] = Field(None, description="健康因子权重方案")
+    environment_scheme: Optional[str] = Field(None, description="环境因子权重方案")
+    instrument_stage_scheme: Optional[str] = Field(None, description="仪器分析阶段权重方案")
+    prep_stage_scheme: Optional[str] = Field(None, description="前处理阶段权重方案")
+    final_scheme: Optional[str] = Field(None, description="最终汇总权重方案")
+    custom_weights: Optional[Dict[str, Dict[str, float]]] = Field(None, description="自定义权重配置")
+    
+    @field_validator("custom_weights")
+    @classmethod
+    def check_custom_weights(cls, value):
+        """在请求校验阶段编译自定义权重（完整性、非负、总和为1）"""
+        validate_custom_weights(value)
+        return value
+    
+    # P/R/D因子（可选）
+    p_factor: Optional[float] = Field(None, ge=0, description="仪器分析P因子-能耗(0-100)")
+    pretreatment_p_factor: Optional[float] = Field(None, ge=0, description="前处理P因子-能耗(0-100)")
+    instrument_r_factor: Optional[float] = Field(None, ge=0, description="仪器分析阶段R因子(0-100)")
+    instrument_d_factor: Optional[float] = Field(None, ge=0, description="仪器分析阶段D因子(0-100)")
+    pretreatment_r_factor: Optional[float] = Field(None, ge=0, description="前处理阶段R因子(0-100)")
+    pretreatment_d_factor: Optional[float] = Field(None, ge=0, description="前处理阶段D因子(0-100)")
 
 
 class FullScoreResponse(BaseModel):
@@ -0,0 +1,157 @@
+"""
+HPLC分析列表查询：游标（keyset）分页、排序与筛选
+
+OFFSET 分页需要先扫描并丢弃前面所有行，页码越大越慢。这里按 (排序列, id) 的
+索引顺序分页：游标记录上一页最后一行的 (排序值, id)，下一页只需从索引中该位置
+继续读取 limit 行，每页耗时与总行数无关。
+
+- 排序列只允许有索引的列（id、created_at、score1/2/3）
+- 按得分排序时，尚未计算完整评分（得分为空）的记录不参与列表
+- 游标是不透明的 URL-safe base64 字符串，包含排序列、方向和位置，
+  与当前排序参数不一致时视为无效
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, String, Select, literal, select, tuple_
+from sqlalchemy.orm import defer
+from sqlalchemy.sql import type_coerce
+
+from app.database.models import HPLCAnalysis
+
+
+# 排序列 -> 游标中保存的原始值类型
+# created_at 在SQLite中以字符串存储，按原始字符串比较，避免 datetime 绑定参数的格式
+# （补零的微秒）与 CURRENT_TIMESTAMP 写入的格式不一致导致相等判断失效
+SORT_FIELDS = {
+    "id": Integer,
+    "created_at": String,
+    "score1": Float,
+    "score2": Float,
+    "score3": Float,
+}
+SCORE_FIELDS = ("score1", "score2", "score3")
+
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(sort_by: str, order: str, value: Any, row_id: int) -> str:
+    raw = json.dumps([sort_by, order, value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> Tuple[Any, int]:
+    """
+    解析游标
+
+    异常：
+        ValueError: 游标格式错误或与当前排序参数不一致
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("无效的分页游标")
+    if (cursor_sort, cursor_order) != (sort_by, order) or not isinstance(row_id, int):
+        raise ValueError("分页游标与当前排序参数不一致")
+    return value, row_id
+
+
+def build_list_query(
+    sort_by: str = "id",
+    order: str = "desc",
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    score_field: str = "score3",
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    name: Optional[str] = None,
+) -> Select:
+    """
+    构造一页的查询（多取一行用于判断是否还有下一页）
+
+    查询结果的每一行为 (HPLCAnalysis, 排序列原始值)
+
+    异常：
+        ValueError: 参数不合法
+    """
+    if sort_by not in SORT_FIELDS:
+        raise ValueError(f"不支持的排序字段：{sort_by}（可选：{', '.join(SORT_FIELDS)}）")
+    if order not in ("asc", "desc"):
+        raise ValueError("order 只能是 asc 或 desc")
+    if score_field not in SCORE_FIELDS:
+        raise ValueError(f"不支持的得分字段：{score_field}（可选：{', '.join(SCORE_FIELDS)}）")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit 必须在 1-{MAX_PAGE_SIZE} 之间")
+
+    raw_type = SORT_FIELDS[sort_by]
+    column = getattr(HPLCAnalysis, sort_by)
+    raw_column = type_coerce(column, raw_type)
+    # 列表不需要原始数据和完整评分结果，延迟加载大JSON列
+    stmt = select(HPLCAnalysis, raw_column.label("sort_value")).options(
+        defer(HPLCAnalysis.raw_data), defer(HPLCAnalysis.analysis_results)
+    )
+
+    # 筛选
+    score_column = getattr(HPLCAnalysis, score_field)
+    if min_score is not None:
+        stmt = stmt.where(score_column >= min_score)
+    if max_score is not None:
+        stmt = stmt.where(score_column <= max_score)
+    if created_after is not None:
+        stmt = stmt.where(HPLCAnalysis.created_at >= created_after)
+    if created_before is not None:
+        stmt = stmt.where(HPLCAnalysis.created_at < created_before)
+    if name:
+        stmt = stmt.where(HPLCAnalysis.name.contains(name, autoescape=True))
+    if sort_by != "id":
+        stmt = stmt.where(column.is_not(None))
+
+    # 游标位置：(排序值, id) 严格在上一页最后一行之后
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort_by, order)
+        if sort_by == "id":
+            position = (HPLCAnalysis.id < row_id) if order == "desc" else (HPLCAnalysis.id > row_id)
+        else:
+            key = tuple_(column, HPLCAnalysis.id)
+            bound = tuple_(literal(value, raw_type), literal(row_id, Integer))
+            position = (key < bound) if order == "desc" else (key > bound)
+        stmt = stmt.where(position)
+
+    keys = [HPLCAnalysis.id] if sort_by == "id" else [column, HPLCAnalysis.id]
+    stmt = stmt.order_by(*[key.desc() if order == "desc" else key.asc() for key in keys])
+
+    return stmt.limit(limit + 1)
+
+
+def analysis_summary(analysis: HPLCAnalysis) -> Dict:
+    """列表中的一行（不含 raw_data / analysis_results）"""
+    return {
+        "id": analysis.id,
+        "name": analysis.name,
+        "description": analysis.description,
+        "created_at": analysis.created_at.isoformat() if analysis.created_at else None,
+        "green_score": analysis.green_score,
+        "score1": analysis.score1,
+        "score2": analysis.score2,
+        "score3": analysis.score3,
+    }
+
+
+def build_page(rows: List[Tuple[HPLCAnalysis, Any]], sort_by: str, order: str, limit: int) -> Dict:
+    """把查询结果整理为一页：items + next_cursor（没有下一页时为None）"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        last, value = rows[-1]
+        next_cursor = encode_cursor(sort_by, order, value, last.id)
+    return {
+        "items": [analysis_summary(analysis) for analysis, _ in rows],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
@@ -0,0 +1,82 @@
+"""
+HPLC分析记录的字段构造
+
+提供完整评分输入（scoring）的分析保存完整的五层评分结果：
+- raw_data: 评分输入（FullScoreRequest）
+- analysis_results: calculate_full_scores 的完整输出
+- score1 / score2 / score3: 各阶段得分（有索引，用于列表排序和筛选）
+- green_score: 与 score3 相同
+
+未提供 scoring 的旧式请求仍使用简化的溶剂绿色评分（analyzer.calculate_solvent_score）。
+"""
+from typing import Dict, Optional
+
+from app.database.models import HPLCAnalysis
+from app.schemas.schemas import HPLCAnalysisCreate
+from app.services.green_chemistry import analyzer
+
+
+def analysis_values(analysis: HPLCAnalysisCreate, result: Optional[Dict] = None) -> Dict:
+    """
+    构造一条 HPLCAnalysis 记录的列值（所有记录的键相同，可直接用于批量插入）
+
+    参数：
+        analysis: 创建请求
+        result: analysis.scoring 的完整评分结果；未提供 scoring 时为None
+    """
+    values = {
+        "name": analysis.name,
+        "description": analysis.description,
+        "solvent_a": analysis.solvent_a,
+        "solvent_b": analysis.solvent_b,
+        "flow_rate": analysis.flow_rate,
+        "column_type": analysis.column_type,
+        "temperature": analysis.temperature,
+        "green_score": None,
+        "score1": None,
+        "score2": None,
+        "score3": None,
+        "raw_data": None,
+        "analysis_results": None,
+    }
+
+    if result is None:
+        legacy = analyzer.calculate_solvent_score(
+            solvent_a=analysis.solvent_a,
+            solvent_b=analysis.solvent_b,
+            ratio_a=analysis.ratio_a,
+            volume_ml=analysis.flow_rate
+        )
+        values["green_score"] = legacy["overall_green_score"]
+        return values
+
+    values.update({
+        "green_score": result["final"]["score3"],
+        "score1": result["instrument"]["score1"],
+        "score2": result["preparation"]["score2"],
+        "score3": result["final"]["score3"],
+        "raw_data": analysis.scoring.model_dump(mode="json"),
+        "analysis_results": result,
+    })
+    return values
+
+
+def analysis_detail(analysis: HPLCAnalysis) -> Dict:
+    """单条分析的完整内容（含评分输入和完整评分结果）"""
+    return {
+        "id": analysis.id,
+        "name": analysis.name,
+        "description": analysis.description,
+        "created_at": analysis.created_at.isoformat() if analysis.created_at else None,
+        "solvent_a": analysis.solvent_a,
+        "solvent_b": analysis.solvent_b,
+        "flow_rate": analysis.flow_rate,
+        "column_type": analysis.column_type,
+        "temperature": analysis.temperature,
+        "green_score": analysis.green_score,
+        "score1": analysis.score1,
+        "score2": analysis.score2,
+        "score3": analysis.score3,
+        "raw_data": analysis.raw_data,
+        "analysis_results": analysis.analysis_results,
+    }
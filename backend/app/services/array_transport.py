@@ -0,0 +1,165 @@
+"""
+二进制数组传输格式
+
+批量评分、方案扫描的结果本质上是若干浮点数组，编码成JSON再解析既慢又丢精度。
+客户端在 Accept 中声明 application/vnd.lcgauge.arrays 时，接口返回：
+
+    偏移 0   8字节   魔数 b"LCGARR01"
+    偏移 8   4字节   头部长度 H（uint32，小端）
+    偏移 12  H字节   UTF-8 JSON头部（用空格补齐，使第一个缓冲区按64字节对齐）
+    之后             各列的原始缓冲区（小端，C顺序，每列起始偏移按64字节对齐）
+
+头部结构：
+    {
+        "columns": [{"name": ..., "dtype": "<f8", "shape": [...], "offset": 字节偏移, "nbytes": ...}, ...],
+        "meta": {...}   # 列含义、方案轴等
+    }
+
+客户端读取（零拷贝）：
+    meta, arrays = decode_arrays(response.content)
+    # 或保存到文件后 decode_arrays(np.memmap(path, mode="r"))
+"""
+import json
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services import batch_scoring
+
+
+ARRAY_MEDIA_TYPE = "application/vnd.lcgauge.arrays"
+MAGIC = b"LCGARR01"
+ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sI")
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def wants_arrays(accept: Optional[str]) -> bool:
+    """Accept 请求头是否声明了二进制数组格式"""
+    return any(
+        item.split(";")[0].strip().lower() == ARRAY_MEDIA_TYPE
+        for item in (accept or "").split(",")
+    )
+
+
+# ============================================================================
+# 编码与解码
+# ============================================================================
+
+def encode_arrays(columns: Dict[str, np.ndarray], meta: Optional[Dict] = None) -> bytes:
+    """
+    把若干数组编码为二进制格式
+
+    浮点数组统一为小端 float64，整数数组为小端 int64
+    """
+    arrays = []
+    for name, values in columns.items():
+        values = np.asarray(values)
+        dtype = "<i8" if np.issubdtype(values.dtype, np.integer) else "<f8"
+        arrays.append((name, np.ascontiguousarray(values, dtype=dtype)))
+
+    # 头部长度决定缓冲区偏移，偏移又写在头部里：先按相对偏移生成，再整体平移
+    relative = []
+    cursor = 0
+    for name, values in arrays:
+        cursor = _aligned(cursor)
+        relative.append(cursor)
+        cursor += values.nbytes
+
+    def build_header(base: int) -> bytes:
+        return json.dumps({
+            "columns": [
+                {
+                    "name": name,
+                    "dtype": values.dtype.str,
+                    "shape": list(values.shape),
+                    "offset": base + offset,
+                    "nbytes": values.nbytes,
+                }
+                for (name, values), offset in zip(arrays, relative)
+            ],
+            "meta": meta or {},
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    # 偏移位数增加会让头部变长，循环直到数据区起点稳定
+    base = _aligned(_PREFIX.size + len(build_header(0)))
+    while True:
+        header = build_header(base)
+        needed = _aligned(_PREFIX.size + len(header))
+        if needed <= base:
+            break
+        base = needed
+    header = header.ljust(base - _PREFIX.size, b" ")
+
+    out = bytearray(base + cursor)
+    out[:base] = _PREFIX.pack(MAGIC, len(header)) + header
+    for (_, values), offset in zip(arrays, relative):
+        start = base + offset
+        out[start:start + values.nbytes] = values.tobytes()
+    return bytes(out)
+
+
+def decode_arrays(buffer) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """
+    解码二进制格式（bytes、bytearray、memoryview 或 np.memmap 均可），数组是对缓冲区的只读视图
+
+    异常：
+        ValueError: 魔数不匹配或数据不完整
+    """
+    view = memoryview(buffer).cast("B")
+    if len(view) < _PREFIX.size:
+        raise ValueError("数据不完整")
+    magic, header_length = _PREFIX.unpack(view[:_PREFIX.size])
+    if magic != MAGIC:
+        raise ValueError("不是有效的二进制数组数据")
+    header = json.loads(bytes(view[_PREFIX.size:_PREFIX.size + header_length]))
+
+    arrays = {}
+    for column in header["columns"]:
+        end = column["offset"] + column["nbytes"]
+        if end > len(view):
+            raise ValueError(f"列 {column['name']} 的数据不完整")
+        dtype = np.dtype(column["dtype"])
+        arrays[column["name"]] = np.frombuffer(
+            view, dtype=dtype, count=column["nbytes"] // dtype.itemsize, offset=column["offset"]
+        ).reshape(column["shape"])
+    return header["meta"], arrays
+
+
+# ============================================================================
+# 评分结果编码（在工作线程/进程中执行，只把字节串传回事件循环）
+# ============================================================================
+
+def batch_scores_binary(methods) -> bytes:
+    """批量评分结果的二进制编码（列含义见 batch_scoring.calculate_batch_arrays）"""
+    return encode_arrays(batch_scoring.calculate_batch_arrays(methods), {
+        "kind": "batch",
+        "methods": len(methods),
+        "sub_factor_names": batch_scoring.SUB_FACTOR_NAMES,
+        "major_factor_names": list(batch_scoring.MAJOR_FACTOR_COLUMNS),
+        "instrument_reagents": [list(m["instrument_composition"]) for m in methods],
+        "prep_reagents": [list(m["prep_volumes"]) for m in methods],
+        "rounded": False,
+    })
+
+
+def scheme_sweep_binary(method) -> bytes:
+    """方案扫描得分网格的二进制编码，meta.axes 给出各维对应的方案轴"""
+    axes, grids = batch_scoring.scheme_sweep_grids(method)
+    names = [name for name, _ in axes]
+    return encode_arrays(grids, {
+        "kind": "sweep",
+        "axes": {name: schemes for name, schemes in axes},
+        "dims": {
+            "score1": names[:4],
+            "score2": names[:3] + [names[4]],
+            "score3": names,
+        },
+        "combinations": int(grids["score3"].size),
+        "rounded": False,
+    })
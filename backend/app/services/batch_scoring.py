@@ -0,0 +1,660 @@
+"""
+HPLC绿色化学批量评分引擎（NumPy结构化数组实现）
+
+与 scoring_service.calculate_full_scores 使用完全相同的5层评分公式，
+但一次处理N个方法：
+
+1. 打包：把N个方法的梯度、组成、密度、因子矩阵展开为连续数组
+   （每个"试剂行"对应一个方法中的一个试剂，时间轴按最长梯度补齐）
+2. Layer 0-1：所有试剂行的质量与9个小因子一次性向量化计算
+3. Layer 2-5：权重方案按方法展开成权重矩阵，逐层做逐元素乘加
+4. 拆包：按方法还原为与 calculate_full_scores 相同的嵌套字典
+
+补齐的时间段时长为0、补齐的试剂行不存在，因此不影响任何求和结果。
+"""
+
+from typing import Dict, List, Tuple
+import numpy as np
+
+from app.core.logging_config import timed
+from app.services.scoring_service import (
+    calculate_full_scores,
+    segment_integral_factors,
+    scheme_registry,
+)
+
+
+SUB_FACTOR_NAMES = ["S1", "S2", "S3", "S4", "H1", "H2", "E1", "E2", "E3"]
+
+# 大因子在9个小因子中的列位置
+MAJOR_FACTOR_COLUMNS = {
+    "S": [0, 1, 2, 3],
+    "H": [4, 5],
+    "E": [6, 7, 8],
+}
+
+# 阶段总分的加权顺序（即注册表中阶段权重向量的键顺序）
+SCORE1_ORDER = list(scheme_registry.keys("instrument_stage"))
+SCORE2_ORDER = list(scheme_registry.keys("prep_stage"))
+
+
+# ============================================================================
+# 权重矩阵构建
+# ============================================================================
+
+# (权重矩阵键, 方案参数名, 默认方案, 注册表类别, custom_weights 键)
+WEIGHT_ARRAY_SPECS = [
+    ("S", "safety_scheme", "PBT_Balanced", "safety", "safety"),
+    ("H", "health_scheme", "Absolute_Balance", "health", "health"),
+    ("E", "environment_scheme", "PBT_Balanced", "environment", "environment"),
+    ("stage1", "instrument_stage_scheme", "Balanced", "instrument_stage", "stage"),
+    ("stage2", "prep_stage_scheme", "Balanced", "prep_stage", "stage"),
+    ("final", "final_scheme", "Standard", "final", "final"),
+]
+
+
+def build_weight_arrays(methods: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    把每个方法选择的权重方案展开成 (N, k) 权重矩阵（向量来自方案注册表）
+
+    返回：
+        {"S": (N,4), "H": (N,2), "E": (N,3),
+         "stage1": (N,6), "stage2": (N,6), "final": (N,2), "merge": (N,2)}
+    """
+    rows = {spec[0]: [] for spec in WEIGHT_ARRAY_SPECS}
+    rows["merge"] = []
+
+    for method in methods:
+        custom = method.get("custom_weights")
+        for key, field_name, default, category, custom_key in WEIGHT_ARRAY_SPECS:
+            scheme = method.get(field_name, default)
+            rows[key].append(scheme_registry.resolve(
+                category, scheme, custom.get(custom_key) if custom and scheme == "Custom" else None
+            ).vector)
+        # 雷达图合成（merge_sub_factors）只接受预定义的图8方案
+        rows["merge"].append(scheme_registry.get("final", method.get("final_scheme", "Standard")).vector)
+
+    return {
+        key: np.array(values, dtype=np.float64).reshape(len(methods), -1)
+        for key, values in rows.items()
+    }
+
+
+# ============================================================================
+# Layer 0: 批量质量计算
+# ============================================================================
+
+def _pack_factor_rows(
+    reagents: List[str],
+    factor_matrix: Dict[str, Dict[str, float]]
+) -> List[List[float]]:
+    """按试剂顺序取出9个小因子值，并做与 normalize_sub_factor 相同的校验"""
+    rows = []
+    for reagent in reagents:
+        if reagent not in factor_matrix:
+            raise ValueError(f"试剂 {reagent} 缺少 S1 因子值")
+        factors = factor_matrix[reagent]
+        row = []
+        for sub_factor in SUB_FACTOR_NAMES:
+            value = factors[sub_factor]
+            if not (0 <= value <= 1):
+                raise ValueError(f"试剂 {reagent} 的 {sub_factor} 因子值 {value} 超出范围 [0, 1]")
+            row.append(value)
+        rows.append(row)
+    return rows
+
+
+def pack_instrument_stage(methods: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    把N个方法的仪器分析数据打包为结构化数组
+
+    返回：
+        row_method: (R,) 每个试剂行所属的方法下标
+        composition: (R, T) 组成百分比（按最长梯度补齐）
+        density: (R,) 试剂密度
+        factors: (R, 9) 小因子值
+        dt: (N, T-1) 各方法每段时长（补齐段为0）
+        curve_factor: (N, T-1) 各方法每段曲线积分系数
+        flow_rate: (N,) 流速
+        reagents: 每个方法的试剂名称列表（用于拆包）
+    """
+    n_methods = len(methods)
+    max_points = max([len(m["instrument_time_points"]) for m in methods] + [1])
+
+    dt = np.zeros((n_methods, max(max_points - 1, 0)), dtype=np.float64)
+    curve_factor = np.full_like(dt, 0.5)
+    flow_rate = np.zeros(n_methods, dtype=np.float64)
+
+    row_method: List[int] = []
+    composition_rows: List[List[float]] = []
+    densities: List[float] = []
+    factor_rows: List[List[float]] = []
+    reagents_per_method: List[List[str]] = []
+
+    for i, method in enumerate(methods):
+        time_points = [float(t) for t in method["instrument_time_points"]]
+        n_points = len(time_points)
+        composition = method["instrument_composition"]
+        reagent_densities = method["instrument_densities"]
+
+        if n_points > 1:
+            dt[i, :n_points - 1] = np.diff(np.array(time_points, dtype=np.float64))
+            curve_factor[i, :n_points - 1] = segment_integral_factors(
+                method.get("instrument_curve_types"), n_points
+            )
+        flow_rate[i] = method["instrument_flow_rate"]
+
+        reagents = list(composition.keys())
+        for reagent in reagents:
+            if reagent not in reagent_densities:
+                raise ValueError(f"缺少试剂 {reagent} 的密度数据")
+            percentages = composition[reagent]
+            if len(percentages) < n_points:
+                raise ValueError(f"试剂 {reagent} 的组成数据点数少于梯度时间点数")
+            # 补齐部分重复最后一个值，配合dt=0不会产生额外质量
+            padded = list(percentages[:n_points]) + [percentages[n_points - 1] if n_points else 0.0] * (max_points - n_points)
+            composition_rows.append(padded)
+            densities.append(reagent_densities[reagent])
+            row_method.append(i)
+
+        factor_rows.extend(_pack_factor_rows(reagents, method["instrument_factor_matrix"]))
+        reagents_per_method.append(reagents)
+
+    return {
+        "row_method": np.array(row_method, dtype=np.intp),
+        "composition": np.array(composition_rows, dtype=np.float64).reshape(len(row_method), max_points),
+        "density": np.array(densities, dtype=np.float64),
+        "factors": np.array(factor_rows, dtype=np.float64).reshape(len(row_method), 9),
+        "dt": dt,
+        "curve_factor": curve_factor,
+        "flow_rate": flow_rate,
+        "reagents": reagents_per_method,
+    }
+
+
+def pack_prep_stage(methods: List[Dict]) -> Dict[str, np.ndarray]:
+    """把N个方法的前处理数据打包为结构化数组（每行一个 方法×试剂）"""
+    row_method: List[int] = []
+    volumes: List[float] = []
+    densities: List[float] = []
+    factor_rows: List[List[float]] = []
+    reagents_per_method: List[List[str]] = []
+
+    for i, method in enumerate(methods):
+        prep_volumes = method["prep_volumes"]
+        prep_densities = method["prep_densities"]
+        reagents = list(prep_volumes.keys())
+        for reagent in reagents:
+            if reagent not in prep_densities:
+                raise ValueError(f"缺少试剂 {reagent} 的密度数据")
+            volumes.append(prep_volumes[reagent])
+            densities.append(prep_densities[reagent])
+            row_method.append(i)
+
+        factor_rows.extend(_pack_factor_rows(reagents, method["prep_factor_matrix"]))
+        reagents_per_method.append(reagents)
+
+    return {
+        "row_method": np.array(row_method, dtype=np.intp),
+        "volume": np.array(volumes, dtype=np.float64),
+        "density": np.array(densities, dtype=np.float64),
+        "factors": np.array(factor_rows, dtype=np.float64).reshape(len(row_method), 9),
+        "reagents": reagents_per_method,
+    }
+
+
+def batch_gradient_masses(stage: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    向量化梯度积分：对所有试剂行一次计算总质量
+
+    每段：质量 = 流速 × dt × (p1 + (p2-p1) × 积分系数) × 密度
+    各段按时间顺序累加（cumsum），与逐段循环的求和顺序一致。
+    """
+    composition = stage["composition"] / 100.0
+    if composition.shape[0] == 0 or composition.shape[1] < 2:
+        return np.zeros(composition.shape[0], dtype=np.float64)
+
+    rows = stage["row_method"]
+    p1 = composition[:, :-1]
+    p2 = composition[:, 1:]
+    avg_percentage = p1 + (p2 - p1) * stage["curve_factor"][rows]
+    volume_segment = stage["flow_rate"][rows, None] * stage["dt"][rows]
+    segment_mass = volume_segment * avg_percentage * stage["density"][:, None]
+    return np.cumsum(segment_mass, axis=1)[:, -1]
+
+
+# ============================================================================
+# Layer 1-5: 批量评分
+# ============================================================================
+
+def batch_sub_factors(
+    masses: np.ndarray,
+    factors: np.ndarray,
+    row_method: np.ndarray,
+    n_methods: int
+) -> np.ndarray:
+    """
+    批量小因子归一化：Score = min{45 × log₁₀(1 + 14 × Σ(m × F)), 100}
+
+    返回：
+        (N, 9) 小因子得分
+    """
+    weighted_sum = np.zeros((n_methods, 9), dtype=np.float64)
+    np.add.at(weighted_sum, row_method, masses[:, None] * factors)
+
+    positive = weighted_sum > 0
+    scores = np.zeros_like(weighted_sum)
+    scores[positive] = np.minimum(100.0, 45.0 * np.log10(1 + 14 * weighted_sum[positive]))
+    return scores
+
+
+def _ordered_dot(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """按列顺序逐项乘加（保持与标量实现相同的求和顺序）"""
+    total = values[:, 0] * weights[:, 0]
+    for k in range(1, values.shape[1]):
+        total = total + values[:, k] * weights[:, k]
+    return total
+
+
+def batch_major_factors(sub_scores: np.ndarray, weights: Dict[str, np.ndarray]) -> np.ndarray:
+    """批量大因子合成，返回 (N, 3)，列顺序为 S/H/E"""
+    return np.stack([
+        _ordered_dot(sub_scores[:, MAJOR_FACTOR_COLUMNS[major]], weights[major])
+        for major in ["S", "H", "E"]
+    ], axis=1)
+
+
+def _stage_inputs(major: np.ndarray, extra: Dict[str, np.ndarray], order: List[str]) -> np.ndarray:
+    columns = {"S": major[:, 0], "H": major[:, 1], "E": major[:, 2], **extra}
+    return np.stack([columns[key] for key in order], axis=1)
+
+
+def evaluate_layers(
+    inst_sub: np.ndarray,
+    prep_sub: np.ndarray,
+    prd: Dict[str, np.ndarray],
+    weights: Dict[str, np.ndarray]
+) -> Dict[str, np.ndarray]:
+    """
+    在已归一化的小因子上运行 Layer 2-5
+
+    参数：
+        inst_sub / prep_sub: (N, 9) 小因子得分
+        prd: P/R/D因子数组，键为 p/pre_p/inst_r/inst_d/pre_r/pre_d，形状 (N,)
+        weights: build_weight_arrays 的返回值
+    """
+    with timed("major"):
+        inst_major = batch_major_factors(inst_sub, weights)
+        prep_major = batch_major_factors(prep_sub, weights)
+
+    with timed("stage"):
+        score1 = _ordered_dot(
+            _stage_inputs(inst_major, {"P": prd["p"], "R": prd["inst_r"], "D": prd["inst_d"]}, SCORE1_ORDER),
+            weights["stage1"]
+        )
+        score2 = _ordered_dot(
+            _stage_inputs(prep_major, {"P": prd["pre_p"], "R": prd["pre_r"], "D": prd["pre_d"]}, SCORE2_ORDER),
+            weights["stage2"]
+        )
+
+    with timed("final"):
+        merged = inst_sub * weights["merge"][:, :1] + prep_sub * weights["merge"][:, 1:]
+        score3 = score1 * weights["final"][:, 0] + score2 * weights["final"][:, 1]
+
+    return {
+        "inst_major": inst_major,
+        "prep_major": prep_major,
+        "score1": score1,
+        "score2": score2,
+        "merged": merged,
+        "score3": score3,
+    }
+
+
+def _prd_arrays(methods: List[Dict]) -> Dict[str, np.ndarray]:
+    def column(key: str) -> np.ndarray:
+        return np.array([float(m[key]) for m in methods], dtype=np.float64)
+
+    return {
+        "p": column("p_factor"),
+        "pre_p": column("pretreatment_p_factor"),
+        "inst_r": column("instrument_r_factor"),
+        "inst_d": column("instrument_d_factor"),
+        "pre_r": column("pretreatment_r_factor"),
+        "pre_d": column("pretreatment_d_factor"),
+    }
+
+
+# ============================================================================
+# 结果拆包
+# ============================================================================
+
+def _masses_by_method(
+    masses: np.ndarray,
+    reagents: List[List[str]]
+) -> List[Dict[str, float]]:
+    values = masses.tolist()
+    result: List[Dict[str, float]] = []
+    cursor = 0
+    for names in reagents:
+        result.append(dict(zip(names, values[cursor:cursor + len(names)])))
+        cursor += len(names)
+    return result
+
+
+def _unpack_results(
+    methods: List[Dict],
+    inst_masses: List[Dict[str, float]],
+    prep_masses: List[Dict[str, float]],
+    inst_sub: np.ndarray,
+    prep_sub: np.ndarray,
+    prd: Dict[str, np.ndarray],
+    layers: Dict[str, np.ndarray]
+) -> List[Dict]:
+    inst_sub_list = inst_sub.tolist()
+    prep_sub_list = prep_sub.tolist()
+    merged_list = layers["merged"].tolist()
+    inst_major_list = layers["inst_major"].tolist()
+    prep_major_list = layers["prep_major"].tolist()
+    score1_list = layers["score1"].tolist()
+    score2_list = layers["score2"].tolist()
+    score3_list = layers["score3"].tolist()
+    prd_lists = {key: values.tolist() for key, values in prd.items()}
+
+    results = []
+    for i, method in enumerate(methods):
+        results.append({
+            "instrument": {
+                "masses": inst_masses[i],
+                "sub_factors": dict(zip(SUB_FACTOR_NAMES, inst_sub_list[i])),
+                "major_factors": dict(zip(["S", "H", "E"], inst_major_list[i])),
+                "score1": round(score1_list[i], 2)
+            },
+            "preparation": {
+                "masses": prep_masses[i],
+                "sub_factors": dict(zip(SUB_FACTOR_NAMES, prep_sub_list[i])),
+                "major_factors": dict(zip(["S", "H", "E"], prep_major_list[i])),
+                "score2": round(score2_list[i], 2)
+            },
+            "merged": {
+                "sub_factors": {k: round(v, 2) for k, v in zip(SUB_FACTOR_NAMES, merged_list[i])}
+            },
+            "final": {
+                "score3": round(score3_list[i], 2)
+            },
+            "additional_factors": {
+                "P": round(prd_lists["p"][i], 2),
+                "instrument_P": round(prd_lists["p"][i], 2),
+                "pretreatment_P": round(prd_lists["pre_p"][i], 2),
+                "instrument_R": round(prd_lists["inst_r"][i], 2),
+                "instrument_D": round(prd_lists["inst_d"][i], 2),
+                "pretreatment_R": round(prd_lists["pre_r"][i], 2),
+                "pretreatment_D": round(prd_lists["pre_d"][i], 2)
+            },
+            "schemes": {
+                "safety_scheme": method.get("safety_scheme", "PBT_Balanced"),
+                "health_scheme": method.get("health_scheme", "Absolute_Balance"),
+                "environment_scheme": method.get("environment_scheme", "PBT_Balanced"),
+                "instrument_stage_scheme": method.get("instrument_stage_scheme", "Balanced"),
+                "prep_stage_scheme": method.get("prep_stage_scheme", "Balanced"),
+                "final_scheme": method.get("final_scheme", "Standard")
+            }
+        })
+    return results
+
+
+# ============================================================================
+# 批量评分入口
+# ============================================================================
+
+def _batch_layer01_rows(methods: List[Dict]) -> Dict:
+    """Layer 0-1 的数组形式：质量按试剂行排列（行顺序与各方法的试剂顺序一致）"""
+    n_methods = len(methods)
+
+    # Layer 0
+    with timed("mass"):
+        inst_stage = pack_instrument_stage(methods)
+        prep_stage = pack_prep_stage(methods)
+        inst_mass_rows = batch_gradient_masses(inst_stage)
+        prep_mass_rows = prep_stage["volume"] * prep_stage["density"]
+
+    # Layer 1
+    with timed("normalize"):
+        inst_sub = batch_sub_factors(inst_mass_rows, inst_stage["factors"], inst_stage["row_method"], n_methods)
+        prep_sub = batch_sub_factors(prep_mass_rows, prep_stage["factors"], prep_stage["row_method"], n_methods)
+
+    return {
+        "inst_mass_rows": inst_mass_rows,
+        "prep_mass_rows": prep_mass_rows,
+        "inst_reagents": inst_stage["reagents"],
+        "prep_reagents": prep_stage["reagents"],
+        "inst_sub": inst_sub,
+        "prep_sub": prep_sub,
+    }
+
+
+def calculate_batch_layer01(methods: List[Dict]) -> Dict:
+    """
+    批量执行 Layer 0-1（质量计算 + 小因子归一化）
+
+    返回：
+        {
+            "inst_masses": List[Dict[str, float]],
+            "prep_masses": List[Dict[str, float]],
+            "inst_sub": (N, 9) 仪器分析小因子得分,
+            "prep_sub": (N, 9) 前处理小因子得分
+        }
+    """
+    rows = _batch_layer01_rows(methods)
+    return {
+        "inst_masses": _masses_by_method(rows["inst_mass_rows"], rows["inst_reagents"]),
+        "prep_masses": _masses_by_method(rows["prep_mass_rows"], rows["prep_reagents"]),
+        "inst_sub": rows["inst_sub"],
+        "prep_sub": rows["prep_sub"],
+    }
+
+
+def calculate_batch_arrays(methods: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    批量评分，结果保持为数组（用于二进制传输，得分不做舍入）
+
+    返回：
+        instrument_counts / prep_counts: (N,) 每个方法的试剂行数
+        instrument_masses / prep_masses: (R,) / (Q,) 按方法、试剂顺序排列的质量
+        instrument_sub_factors / prep_sub_factors / merged_sub_factors: (N, 9)
+        instrument_major_factors / prep_major_factors: (N, 3)，列顺序 S/H/E
+        score1 / score2 / score3: (N,)
+    """
+    rows = _batch_layer01_rows(methods)
+    layers = evaluate_layers(rows["inst_sub"], rows["prep_sub"], _prd_arrays(methods), build_weight_arrays(methods))
+    return {
+        "instrument_counts": np.array([len(r) for r in rows["inst_reagents"]], dtype=np.int64),
+        "prep_counts": np.array([len(r) for r in rows["prep_reagents"]], dtype=np.int64),
+        "instrument_masses": rows["inst_mass_rows"],
+        "prep_masses": rows["prep_mass_rows"],
+        "instrument_sub_factors": rows["inst_sub"],
+        "prep_sub_factors": rows["prep_sub"],
+        "instrument_major_factors": layers["inst_major"],
+        "prep_major_factors": layers["prep_major"],
+        "merged_sub_factors": layers["merged"],
+        "score1": layers["score1"],
+        "score2": layers["score2"],
+        "score3": layers["score3"],
+    }
+
+
+def calculate_batch_scores(methods: List[Dict]) -> List[Dict]:
+    """
+    批量执行完整评分流程
+
+    参数：
+        methods: 方法列表，每个元素是 calculate_full_scores 的关键字参数字典
+
+    返回：
+        List[Dict]: 与输入顺序一致，每个元素的结构与 calculate_full_scores 的返回值相同
+    """
+    if not methods:
+        return []
+
+    weights = build_weight_arrays(methods)
+    prd = _prd_arrays(methods)
+    layer01 = calculate_batch_layer01(methods)
+
+    # Layer 2-5
+    layers = evaluate_layers(layer01["inst_sub"], layer01["prep_sub"], prd, weights)
+
+    return _unpack_results(
+        methods,
+        layer01["inst_masses"],
+        layer01["prep_masses"],
+        layer01["inst_sub"],
+        layer01["prep_sub"],
+        prd,
+        layers
+    )
+
+
+def calculate_batch_scores_isolated(methods: List[Dict]) -> List[Tuple[bool, object]]:
+    """
+    批量评分，但单个方法的数据错误不影响其他方法：
+    整批使用向量化引擎；出现数据错误时逐个计算以定位失败的方法
+
+    返回：
+        与 methods 对应的 (是否成功, 评分结果或错误信息) 列表
+    """
+    try:
+        return [(True, result) for result in calculate_batch_scores(methods)]
+    except ValueError:
+        outcomes = []
+        for method in methods:
+            try:
+                outcomes.append((True, calculate_full_scores(**method)))
+            except ValueError as e:
+                outcomes.append((False, f"数据验证错误: {str(e)}"))
+        return outcomes
+
+
+# ============================================================================
+# 权重方案全组合扫描
+# ============================================================================
+
+# 扫描网格的轴顺序（与 calculate_full_scores 的方案参数一一对应）
+SWEEP_AXES = [
+    ("safety_scheme", "safety"),
+    ("health_scheme", "health"),
+    ("environment_scheme", "environment"),
+    ("instrument_stage_scheme", "instrument_stage"),
+    ("prep_stage_scheme", "prep_stage"),
+    ("final_scheme", "final"),
+]
+
+
+def _grid_index_to_schemes(index: Tuple[int, ...], axes: List[Tuple[str, List[str]]]) -> Dict[str, str]:
+    return {name: schemes[i] for (name, schemes), i in zip(axes, index)}
+
+
+def scheme_sweep_grids(method: Dict) -> Tuple[List[Tuple[str, List[str]]], Dict[str, np.ndarray]]:
+    """
+    权重方案全组合扫描的原始得分网格（不舍入）
+
+    返回：
+        (axes, {"score1": (4,4,4,4), "score2": (4,4,4,4), "score3": (4,4,4,4,4,4)})
+        axes 为 [(轴名, [方案名, ...]), ...]，顺序见 calculate_scheme_sweep
+    """
+    layer01 = calculate_batch_layer01([method])
+    inst_sub = layer01["inst_sub"][0]
+    prep_sub = layer01["prep_sub"][0]
+
+    # Layer 3: 每种方案下的大因子，形状 (4,)
+    safety = scheme_registry.matrix("safety")
+    health = scheme_registry.matrix("health")
+    environment = scheme_registry.matrix("environment")
+
+    def major_factors(sub: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            safety @ sub[MAJOR_FACTOR_COLUMNS["S"]],
+            health @ sub[MAJOR_FACTOR_COLUMNS["H"]],
+            environment @ sub[MAJOR_FACTOR_COLUMNS["E"]],
+        )
+
+    # Layer 4: 阶段总分 [s, h, e, stage]
+    def stage_scores(sub: np.ndarray, category: str, p: float, r: float, d: float) -> np.ndarray:
+        stage = scheme_registry.matrix(category)
+        column = {key: stage[:, i] for i, key in enumerate(scheme_registry.keys(category))}
+        major_s, major_h, major_e = major_factors(sub)
+        constant = column["P"] * p + column["R"] * r + column["D"] * d
+        return (
+            np.einsum("s,k->sk", major_s, column["S"])[:, None, None, :]
+            + np.einsum("h,k->hk", major_h, column["H"])[None, :, None, :]
+            + np.einsum("e,k->ek", major_e, column["E"])[None, None, :, :]
+            + constant[None, None, None, :]
+        )
+
+    score1 = stage_scores(
+        inst_sub, "instrument_stage",
+        float(method["p_factor"]), float(method["instrument_r_factor"]), float(method["instrument_d_factor"])
+    )
+    score2 = stage_scores(
+        prep_sub, "prep_stage",
+        float(method["pretreatment_p_factor"]), float(method["pretreatment_r_factor"]), float(method["pretreatment_d_factor"])
+    )
+
+    # Layer 5: Score₃ [s, h, e, i, j, f]
+    final = scheme_registry.matrix("final")
+    score3 = (
+        np.einsum("shei,f->sheif", score1, final[:, 0])[:, :, :, :, None, :]
+        + np.einsum("shej,f->shejf", score2, final[:, 1])[:, :, :, None, :, :]
+    )
+
+    axes = [(name, scheme_registry.names(category)) for name, category in SWEEP_AXES]
+    return axes, {"score1": score1, "score2": score2, "score3": score3}
+
+
+def calculate_scheme_sweep(method: Dict) -> Dict:
+    """
+    对单个方法计算全部预定义权重方案组合下的 Score₁/Score₂/Score₃
+
+    Layer 0-1 只计算一次；Layer 3-5 对所有方案组合做一次张量收缩：
+        大因子:  (方案, k) @ (k,)                 -> S/H/E 各 (4,)
+        Score₁: [s, h, e, i]                      -> (4, 4, 4, 4)
+        Score₂: [s, h, e, j]                      -> (4, 4, 4, 4)
+        Score₃: [s, h, e, i, j, f]                -> (4, 4, 4, 4, 4, 4)
+
+    参数：
+        method: calculate_full_scores 的关键字参数字典（其中的方案选择会被忽略）
+
+    返回：
+        {
+            "axes": {轴名: [方案名, ...]},
+            "score1": 嵌套列表 [safety][health][environment][instrument_stage],
+            "score2": 嵌套列表 [safety][health][environment][prep_stage],
+            "score3": 嵌套列表 [safety][health][environment][instrument_stage][prep_stage][final],
+            "summary": {"score1"/"score2"/"score3": {min, max, mean, argmin, argmax}}
+        }
+    """
+    axes, grids = scheme_sweep_grids(method)
+    score1, score2, score3 = grids["score1"], grids["score2"], grids["score3"]
+    axes_by_grid = {
+        "score1": [axes[0], axes[1], axes[2], axes[3]],
+        "score2": [axes[0], axes[1], axes[2], axes[4]],
+        "score3": axes,
+    }
+
+    summary = {}
+    for key, grid in [("score1", score1), ("score2", score2), ("score3", score3)]:
+        summary[key] = {
+            "min": round(float(grid.min()), 2),
+            "max": round(float(grid.max()), 2),
+            "mean": round(float(grid.mean()), 2),
+            "argmin": _grid_index_to_schemes(np.unravel_index(np.argmin(grid), grid.shape), axes_by_grid[key]),
+            "argmax": _grid_index_to_schemes(np.unravel_index(np.argmax(grid), grid.shape), axes_by_grid[key]),
+        }
+
+    return {
+        "axes": {name: schemes for name, schemes in axes},
+        "score1": np.round(score1, 2).tolist(),
+        "score2": np.round(score2, 2).tolist(),
+        "score3": np.round(score3, 2).tolist(),
+        "summary": summary,
+        "combinations": int(score3.size),
+    }
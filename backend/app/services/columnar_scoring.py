@@ -0,0 +1,368 @@
+"""
+列式评分格式
+
+为发送大方法或大批量的API客户端提供紧凑的列式请求/响应：
+- 所有方法的试剂行首尾相接，组成、因子等都是扁平数组，用计数数组划分到各个方法
+- 请求体直接由 np.asarray 解码为数组，按整列校验（长度、有限值、流速为正、各方法内时间点不递减、
+  因子范围），不逐字段构造Pydantic对象
+- 跳过字典打包，直接构造批量引擎（batch_scoring）的结构化数组
+- 响应同样是与请求行对齐的扁平数组，试剂名称不在结果中重复
+
+请求字段（N为方法数，R/Q为仪器分析/前处理试剂总行数）：
+    instrument_reagents   [R]      试剂名称（仅用于校验提示）
+    instrument_counts     [N]      每个方法的仪器分析试剂行数
+    point_counts          [N]      每个方法的梯度点数
+    time_points           [ΣT]     各方法的梯度时间点，首尾相接
+    curve_types           [ΣT]     可选，与 time_points 对齐的曲线类型
+    composition           [Σ行×T]  每个试剂行在其方法各时间点的比例(%)，行优先
+    flow_rate             [N]
+    instrument_densities  [R]
+    instrument_factors    [R×9]    S1…E3，行优先
+    prep_reagents / prep_counts / prep_volumes / prep_densities / prep_factors
+                                   前处理阶段，含义同上（Q行）
+    p_factor, pretreatment_p_factor, instrument_r_factor, instrument_d_factor,
+    pretreatment_r_factor, pretreatment_d_factor
+                          [N] 或标量（标量表示所有方法相同）
+    *_scheme, custom_weights       所有方法共用的权重方案
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.logging_config import timed
+from app.services.batch_scoring import (
+    SUB_FACTOR_NAMES,
+    WEIGHT_ARRAY_SPECS,
+    batch_gradient_masses,
+    batch_sub_factors,
+    build_weight_arrays,
+    evaluate_layers,
+)
+from app.services.scoring_service import CURVE_INTEGRAL_FACTORS
+
+
+# P/R/D 数组（键与 batch_scoring._prd_arrays 一致）
+PRD_FIELDS = [
+    ("p", "p_factor", None),
+    ("pre_p", "pretreatment_p_factor", 0.0),
+    ("inst_r", "instrument_r_factor", None),
+    ("inst_d", "instrument_d_factor", None),
+    ("pre_r", "pretreatment_r_factor", None),
+    ("pre_d", "pretreatment_d_factor", None),
+]
+
+N_SUB = len(SUB_FACTOR_NAMES)
+
+
+@dataclass
+class ColumnarBatch:
+    """解码后的列式批量数据"""
+    n_methods: int
+    instrument: Dict[str, np.ndarray]  # 与 batch_scoring.pack_instrument_stage 的结构相同
+    prep: Dict[str, np.ndarray]        # 与 batch_scoring.pack_prep_stage 的结构相同
+    prd: Dict[str, np.ndarray]
+    schemes: Dict[str, Any]
+
+
+# ============================================================================
+# 解码与校验
+# ============================================================================
+
+def _array(payload: Dict, key: str, dtype=np.float64, default=None) -> np.ndarray:
+    value = payload.get(key, default)
+    if value is None:
+        raise ValueError(f"缺少字段：{key}")
+    try:
+        array = np.asarray(value, dtype=dtype)
+    except (TypeError, ValueError):
+        raise ValueError(f"字段 {key} 必须是数值数组")
+    if array.ndim != 1:
+        raise ValueError(f"字段 {key} 必须是一维数组")
+    return array
+
+
+def _counts(payload: Dict, key: str, n_methods: int, minimum: int = 0) -> np.ndarray:
+    counts = _array(payload, key, dtype=np.int64)
+    if counts.shape[0] != n_methods:
+        raise ValueError(f"{key} 的长度应为方法数 {n_methods}，实际为 {counts.shape[0]}")
+    if counts.size and counts.min() < minimum:
+        raise ValueError(f"{key} 中的值不能小于 {minimum}")
+    return counts
+
+
+def _expect_length(array: np.ndarray, key: str, expected: int):
+    if array.shape[0] != expected:
+        raise ValueError(f"{key} 的长度应为 {expected}，实际为 {array.shape[0]}")
+
+
+def _check_finite(array: np.ndarray, key: str):
+    """整列检查 NaN/无穷大，报告第一个非法值的位置"""
+    invalid = ~np.isfinite(array)
+    if invalid.any():
+        index = int(np.argmax(invalid))
+        raise ValueError(f"{key}[{index}] 的值 {array[index]} 不是有限数值")
+
+
+def _check_time_order(time_points: np.ndarray, point_starts: np.ndarray):
+    """各方法内的时间点不能递减（方法之间的边界不参与比较）"""
+    steps = np.diff(time_points)
+    within = np.ones(steps.shape[0], dtype=bool)
+    within[point_starts[1:] - 1] = False
+    decreasing = within & (steps < 0)
+    if decreasing.any():
+        index = int(np.argmax(decreasing))
+        method = int(np.searchsorted(point_starts, index, side="right")) - 1
+        raise ValueError(
+            f"方法 #{method} 的梯度时间点必须按时间顺序排列："
+            f"time_points[{index + 1}]={time_points[index + 1]} 早于前一个时间点 {time_points[index]}"
+        )
+
+
+def _check_factors(factors: np.ndarray, reagents: List[str], stage_label: str):
+    """与 normalize_sub_factor 相同的范围校验，报告第一个越界值"""
+    invalid = ~((factors >= 0) & (factors <= 1))
+    if invalid.any():
+        row, col = np.argwhere(invalid)[0]
+        name = reagents[row] if row < len(reagents) else f"#{row}"
+        raise ValueError(
+            f"{stage_label}试剂 {name} 的 {SUB_FACTOR_NAMES[col]} 因子值 {factors[row, col]} 超出范围 [0, 1]"
+        )
+
+
+def _padded_index(starts: np.ndarray, lengths: np.ndarray, width: int, shift: int = 0) -> np.ndarray:
+    """每行取 start + min(j + shift, length - 1)，j = 0..width-1（补齐部分重复最后一个值）"""
+    offsets = np.minimum(np.arange(width)[None, :] + shift, (lengths - 1)[:, None])
+    return starts[:, None] + offsets
+
+
+def _curve_point_factors(curve_types: Optional[List], total_points: int) -> np.ndarray:
+    """每个时间点的曲线积分系数（只对不同的曲线类型查表一次）"""
+    if curve_types is None:
+        return np.full(total_points, 0.5)
+    if len(curve_types) != total_points:
+        raise ValueError(f"curve_types 的长度应为 {total_points}，实际为 {len(curve_types)}")
+    kinds, inverse = np.unique(np.asarray(curve_types, dtype=object).astype(str), return_inverse=True)
+    table = np.array([CURVE_INTEGRAL_FACTORS.get(kind, 0.5) for kind in kinds], dtype=np.float64)
+    return table[inverse]
+
+
+def _decode_instrument(payload: Dict, n_methods: int) -> Dict[str, np.ndarray]:
+    reagents = list(payload.get("instrument_reagents") or [])
+    counts = _counts(payload, "instrument_counts", n_methods)
+    point_counts = _counts(payload, "point_counts", n_methods, minimum=1)
+    n_rows = int(counts.sum())
+    if reagents:
+        _expect_length(np.empty(len(reagents)), "instrument_reagents", n_rows)
+
+    point_starts = np.concatenate([[0], np.cumsum(point_counts)[:-1]]) if n_methods else np.zeros(0, np.int64)
+    time_points = _array(payload, "time_points")
+    _expect_length(time_points, "time_points", int(point_counts.sum()))
+    _check_finite(time_points, "time_points")
+    _check_time_order(time_points, point_starts)
+    point_factors = _curve_point_factors(payload.get("curve_types"), time_points.shape[0])
+
+    row_method = np.repeat(np.arange(n_methods), counts)
+    row_points = point_counts[row_method]
+    composition = _array(payload, "composition")
+    _expect_length(composition, "composition", int(row_points.sum()))
+    _check_finite(composition, "composition")
+
+    densities = _array(payload, "instrument_densities")
+    _expect_length(densities, "instrument_densities", n_rows)
+    _check_finite(densities, "instrument_densities")
+    factors = _array(payload, "instrument_factors")
+    _expect_length(factors, "instrument_factors", n_rows * N_SUB)
+    factors = factors.reshape(n_rows, N_SUB)
+    _check_factors(factors, reagents, "仪器分析")
+
+    flow_rate = _array(payload, "flow_rate")
+    _expect_length(flow_rate, "flow_rate", n_methods)
+    invalid_flow = ~(flow_rate > 0)  # 同时拒绝 NaN
+    if invalid_flow.any():
+        method = int(np.argmax(invalid_flow))
+        raise ValueError(f"方法 #{method} 的 flow_rate 必须大于0，实际为 {flow_rate[method]}")
+
+    # 按最长梯度补齐：时间和组成重复最后一个值，补齐段 dt=0 不产生质量
+    width = int(point_counts.max()) if n_methods else 1
+    row_starts = np.concatenate([[0], np.cumsum(row_points)[:-1]]) if n_rows else np.zeros(0, np.int64)
+
+    padded_times = time_points[_padded_index(point_starts, point_counts, width)]
+    # 第i段使用目标时间点 i+1 的曲线类型
+    curve_factor = point_factors[_padded_index(point_starts, point_counts, max(width - 1, 0), shift=1)]
+
+    return {
+        "row_method": row_method.astype(np.intp),
+        "composition": composition[_padded_index(row_starts, row_points, width)].reshape(n_rows, width),
+        "density": densities,
+        "factors": factors,
+        "dt": np.diff(padded_times, axis=1),
+        "curve_factor": curve_factor.reshape(n_methods, max(width - 1, 0)),
+        "flow_rate": flow_rate,
+    }
+
+
+def _decode_prep(payload: Dict, n_methods: int) -> Dict[str, np.ndarray]:
+    reagents = list(payload.get("prep_reagents") or [])
+    counts = _counts(payload, "prep_counts", n_methods)
+    n_rows = int(counts.sum())
+    if reagents:
+        _expect_length(np.empty(len(reagents)), "prep_reagents", n_rows)
+
+    volumes = _array(payload, "prep_volumes", default=[])
+    densities = _array(payload, "prep_densities", default=[])
+    factors = _array(payload, "prep_factors", default=[])
+    _expect_length(volumes, "prep_volumes", n_rows)
+    _expect_length(densities, "prep_densities", n_rows)
+    _check_finite(volumes, "prep_volumes")
+    _check_finite(densities, "prep_densities")
+    _expect_length(factors, "prep_factors", n_rows * N_SUB)
+    factors = factors.reshape(n_rows, N_SUB)
+    _check_factors(factors, reagents, "前处理")
+
+    return {
+        "row_method": np.repeat(np.arange(n_methods), counts).astype(np.intp),
+        "volume": volumes,
+        "density": densities,
+        "factors": factors,
+    }
+
+
+def decode_columnar(payload: Dict) -> ColumnarBatch:
+    """
+    把列式请求解码为批量引擎的数组
+
+    异常：
+        ValueError: 缺少字段、长度不一致、非有限数值、流速不为正、时间点递减或因子越界
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("请求体必须是JSON对象")
+    n_methods = len(payload.get("point_counts") or [])
+    if n_methods == 0:
+        raise ValueError("point_counts 不能为空")
+
+    prd = {}
+    for key, field_name, default in PRD_FIELDS:
+        value = payload.get(field_name, default)
+        if value is None:
+            raise ValueError(f"缺少字段：{field_name}")
+        array = np.broadcast_to(np.asarray(value, dtype=np.float64), (n_methods,)) if np.ndim(value) == 0 \
+            else _array(payload, field_name)
+        _expect_length(array, field_name, n_methods)
+        if not ((array >= 0) & np.isfinite(array)).all():
+            raise ValueError(f"{field_name} 必须是非负的有限数值")
+        prd[key] = array
+
+    schemes = {
+        field_name: payload.get(field_name) or default
+        for _, field_name, default, _, _ in WEIGHT_ARRAY_SPECS
+    }
+    schemes["custom_weights"] = payload.get("custom_weights")
+
+    return ColumnarBatch(
+        n_methods=n_methods,
+        instrument=_decode_instrument(payload, n_methods),
+        prep=_decode_prep(payload, n_methods),
+        prd=prd,
+        schemes=schemes,
+    )
+
+
+# ============================================================================
+# 计算
+# ============================================================================
+
+def _rounded(values: np.ndarray) -> List:
+    """与 calculate_full_scores 相同的 round(x, 2)"""
+    return [round(v, 2) for v in values.ravel().tolist()]
+
+
+def calculate_columnar_scores(payload: Dict) -> Dict:
+    """
+    列式批量评分
+
+    返回：
+        与请求行对齐的扁平数组（矩阵均为行优先）：
+        instrument_masses [R]、prep_masses [Q]、
+        instrument_sub_factors / prep_sub_factors [N×9]、
+        instrument_major_factors / prep_major_factors [N×3]（S/H/E）、
+        merged_sub_factors [N×9]、score1 / score2 / score3 [N]
+    """
+    batch = decode_columnar(payload)
+    n_methods = batch.n_methods
+
+    # 所有方法共用一组方案：只解析一次，再扩展到N行
+    weights = {
+        key: np.repeat(matrix, n_methods, axis=0)
+        for key, matrix in build_weight_arrays([batch.schemes]).items()
+    }
+
+    with timed("mass"):
+        inst_masses = batch_gradient_masses(batch.instrument)
+        prep_masses = batch.prep["volume"] * batch.prep["density"]
+
+    with timed("normalize"):
+        inst_sub = batch_sub_factors(inst_masses, batch.instrument["factors"], batch.instrument["row_method"], n_methods)
+        prep_sub = batch_sub_factors(prep_masses, batch.prep["factors"], batch.prep["row_method"], n_methods)
+
+    layers = evaluate_layers(inst_sub, prep_sub, batch.prd, weights)
+
+    return {
+        "sub_factor_names": SUB_FACTOR_NAMES,
+        "instrument_masses": inst_masses.tolist(),
+        "prep_masses": prep_masses.tolist(),
+        "instrument_sub_factors": inst_sub.ravel().tolist(),
+        "prep_sub_factors": prep_sub.ravel().tolist(),
+        "instrument_major_factors": layers["inst_major"].ravel().tolist(),
+        "prep_major_factors": layers["prep_major"].ravel().tolist(),
+        "merged_sub_factors": _rounded(layers["merged"]),
+        "score1": _rounded(layers["score1"]),
+        "score2": _rounded(layers["score2"]),
+        "score3": _rounded(layers["score3"]),
+        "schemes": {key: value for key, value in batch.schemes.items() if key != "custom_weights"},
+    }
+
+
+def to_columnar(methods: List[Dict]) -> Dict:
+    """
+    把 calculate_full_scores 关键字参数列表转换为列式请求（客户端参考实现，也用于测试）
+    所有方法使用第一个方法的权重方案
+    """
+    payload: Dict[str, Any] = {key: [] for key in [
+        "instrument_reagents", "instrument_counts", "point_counts", "time_points", "curve_types",
+        "composition", "flow_rate", "instrument_densities", "instrument_factors",
+        "prep_reagents", "prep_counts", "prep_volumes", "prep_densities", "prep_factors",
+    ]}
+    for _, field_name, _ in PRD_FIELDS:
+        payload[field_name] = []
+
+    for method in methods:
+        points = list(method["instrument_time_points"])
+        curves = method.get("instrument_curve_types") or []
+        composition = method["instrument_composition"]
+        payload["instrument_counts"].append(len(composition))
+        payload["point_counts"].append(len(points))
+        payload["time_points"].extend(points)
+        payload["curve_types"].extend([curves[i] if i < len(curves) else "linear" for i in range(len(points))])
+        payload["flow_rate"].append(method["instrument_flow_rate"])
+        for reagent, percentages in composition.items():
+            payload["instrument_reagents"].append(reagent)
+            payload["composition"].extend(list(percentages)[:len(points)])
+            payload["instrument_densities"].append(method["instrument_densities"][reagent])
+            payload["instrument_factors"].extend(method["instrument_factor_matrix"][reagent][k] for k in SUB_FACTOR_NAMES)
+
+        payload["prep_counts"].append(len(method["prep_volumes"]))
+        for reagent, volume in method["prep_volumes"].items():
+            payload["prep_reagents"].append(reagent)
+            payload["prep_volumes"].append(volume)
+            payload["prep_densities"].append(method["prep_densities"][reagent])
+            payload["prep_factors"].extend(method["prep_factor_matrix"][reagent][k] for k in SUB_FACTOR_NAMES)
+
+        for _, field_name, default in PRD_FIELDS:
+            payload[field_name].append(method.get(field_name, default))
+
+    first = methods[0] if methods else {}
+    for _, field_name, default, _, _ in WEIGHT_ARRAY_SPECS:
+        payload[field_name] = first.get(field_name, default)
+    payload["custom_weights"] = first.get("custom_weights")
+    return payload
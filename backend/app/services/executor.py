@@ -0,0 +1,117 @@
+"""
+CPU密集型计算调度模块
+
+路由都是 async def，直接调用评分/色谱分析函数会阻塞事件循环，
+一个大批量请求就会让其他客户端（包括 /health）一起等待。
+本模块把计算放到工作线程或进程池中执行：
+- 计算量（试剂数 × 梯度点数等）小于阈值时使用线程，避免进程间传输数据的开销
+- 超过阈值时提交到进程池，多个请求可以同时利用多核
+- 工作进程中测得的分层耗时会合并回当前请求的 Server-Timing
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.logging_config import capture_timings, get_logger, record_timings
+
+
+logger = get_logger("executor")
+
+
+def _invoke(func: Callable, args: Tuple, kwargs: Dict) -> Tuple[Any, Dict[str, float]]:
+    """在工作线程/进程中执行计算，同时收集分层耗时"""
+    with capture_timings() as timings:
+        result = func(*args, **kwargs)
+    return result, timings
+
+
+def scoring_cost(scoring_kwargs: Dict) -> int:
+    """估算一次完整评分的计算量：仪器阶段的试剂数 × 梯度点数 + 前处理试剂数"""
+    composition = scoring_kwargs.get("instrument_composition") or {}
+    points = len(scoring_kwargs.get("instrument_time_points") or [])
+    return len(composition) * points + len(scoring_kwargs.get("prep_volumes") or {})
+
+
+class ComputeExecutor:
+    """按计算量在线程和进程池之间调度CPU密集型任务"""
+
+    def __init__(self, workers: int, process_threshold: int, enabled: bool = True):
+        self.workers = workers or os.cpu_count() or 1
+        self.process_threshold = process_threshold
+        self.enabled = enabled
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn 在各平台行为一致，且不会复制事件循环线程的状态
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable, *args, cost: int = 0, **kwargs) -> Any:
+        """
+        执行CPU密集型函数，不阻塞事件循环
+
+        参数：
+            func: 模块级函数（提交到进程池时需要可序列化）
+            cost: 计算量估计，不小于 process_threshold 时使用进程池
+
+        返回：
+            func 的返回值；func 抛出的异常原样传播
+        """
+        pool = self._get_pool() if cost >= self.process_threshold else None
+        if pool is not None:
+            loop = asyncio.get_running_loop()
+            try:
+                result, timings = await loop.run_in_executor(pool, _invoke, func, args, kwargs)
+            except BrokenProcessPool:
+                # 工作进程异常退出：重建进程池，本次改用线程执行
+                logger.warning("计算进程池已损坏，改用线程执行")
+                self._discard_pool(pool)
+                result, timings = await run_in_threadpool(_invoke, func, args, kwargs)
+        else:
+            result, timings = await run_in_threadpool(_invoke, func, args, kwargs)
+
+        record_timings(timings)
+        return result
+
+    async def run_in_thread(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        在工作线程中执行（用于必须访问本进程内存状态的计算，如评分会话）
+        """
+        result, timings = await run_in_threadpool(_invoke, func, args, kwargs)
+        record_timings(timings)
+        return result
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+# 全局计算调度器
+compute_executor = ComputeExecutor(
+    workers=settings.SCORING_WORKERS,
+    process_threshold=settings.SCORING_PROCESS_THRESHOLD,
+    enabled=settings.SCORING_PROCESS_POOL
+)
@@ -1,10 +1,18 @@
 """
 绿色化学分析核心模块
 """
+import math
 import numpy as np
-from typing import Dict, List, Optional
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
 
+from app.core.logging_config import get_logger
+from app.services.solvent_index import SolventIndex
+
+
+logger = get_logger("green_chemistry")
+
 
 @dataclass
 class SolventProperties:
@@ -14,25 +22,98 @@ class SolventProperties:
     environmental_impact: float  # 1-10，10为最大影响
     health_hazard: float  # 1-10，10为最危险
     recyclability: float  # 1-10，10为最易回收
+    english_name: str = ""
+    cas: str = ""
+    aliases: Tuple[str, ...] = ()  # 缩写和其他写法（含试剂因子库中的名称）
 
 
 # 常见HPLC溶剂的绿色化学评分数据库
 SOLVENT_DATABASE = {
-    "水": SolventProperties("水", 1.0, 1.0, 1.0, 10.0),
-    "甲醇": SolventProperties("甲醇", 5.5, 4.0, 6.0, 7.0),
-    "乙腈": SolventProperties("乙腈", 6.0, 5.0, 7.0, 6.0),
-    "四氢呋喃": SolventProperties("四氢呋喃", 7.0, 6.0, 7.5, 5.0),
-    "乙酸乙酯": SolventProperties("乙酸乙酯", 4.0, 3.5, 4.0, 8.0),
-    "正己烷": SolventProperties("正己烷", 6.5, 7.0, 6.0, 6.0),
-    "异丙醇": SolventProperties("异丙醇", 4.5, 3.0, 4.5, 8.0),
+    "水": SolventProperties("水", 1.0, 1.0, 1.0, 10.0, "Water", "7732-18-5", ("H2O", "纯水", "超纯水")),
+    "甲醇": SolventProperties("甲醇", 5.5, 4.0, 6.0, 7.0, "Methanol", "67-56-1", ("MeOH",)),
+    "乙腈": SolventProperties("乙腈", 6.0, 5.0, 7.0, 6.0, "Acetonitrile", "75-05-8", ("ACN", "MeCN")),
+    "四氢呋喃": SolventProperties("四氢呋喃", 7.0, 6.0, 7.5, 5.0, "Tetrahydrofuran", "109-99-9", ("THF", "Tetrahydrofuran(THF)")),
+    "乙酸乙酯": SolventProperties("乙酸乙酯", 4.0, 3.5, 4.0, 8.0, "Ethyl acetate", "141-78-6", ("EtOAc", "EA")),
+    "正己烷": SolventProperties("正己烷", 6.5, 7.0, 6.0, 6.0, "n-Hexane", "110-54-3", ("Hexane", "Hexane (n)", "己烷")),
+    "异丙醇": SolventProperties("异丙醇", 4.5, 3.0, 4.5, 8.0, "Isopropanol", "67-63-0", ("IPA", "2-Propanol", "iPrOH")),
 }
 
+# 未收录溶剂按中等危害处理
+UNKNOWN_SOLVENT = SolventProperties("未知溶剂", 5.0, 5.0, 5.0, 5.0)
+
+# 属性矩阵的列顺序
+PROPERTY_FIELDS = ("hazard_score", "environmental_impact", "health_hazard", "recyclability")
+
+# 一次向量化计算的最大混合物数
+MAX_MIXTURES = 1_000_000
+
+
+def build_solvent_index(db: Dict[str, SolventProperties]) -> SolventIndex:
+    """溶剂名称索引：中文名、英文名、缩写和CAS号（行号与数据库顺序一致）"""
+    return SolventIndex.build([
+        (name, [props.english_name, props.cas, *props.aliases]) for name, props in db.items()
+    ])
+
+
+def property_matrix(db: Dict[str, SolventProperties]) -> np.ndarray:
+    """
+    由溶剂数据库预先构造属性矩阵
+
+    返回：
+        (K+1, 4) 属性矩阵，行与数据库顺序一致，最后一行为未收录溶剂的默认属性
+    """
+    rows = list(db.values()) + [UNKNOWN_SOLVENT]
+    return np.array([[getattr(props, field) for field in PROPERTY_FIELDS] for props in rows], dtype=np.float64)
+
+
+# 启动时构建一次
+SOLVENT_INDEX = build_solvent_index(SOLVENT_DATABASE)
+
+
+def mixture_grid_size(n_components: int, steps: int) -> int:
+    """比例网格的点数 C(steps + n - 1, n - 1)（不生成网格，用于估算计算量）"""
+    if n_components < 1 or steps < 1:
+        return 0
+    return math.comb(steps + n_components - 1, n_components - 1)
+
+
+def mixture_grid(n_components: int, steps: int) -> np.ndarray:
+    """
+    单纯形上的等间隔比例网格（每个组分取 0, 1/steps, ..., 1，且各组分之和为1）
+
+    二元：steps+1 个点；三元：(steps+1)(steps+2)/2 个点（三角相图）
+
+    返回：
+        (M, n_components) 比例矩阵
+    """
+    if n_components < 1:
+        raise ValueError("至少需要一个组分")
+    if steps < 1:
+        raise ValueError("grid_steps 必须大于0")
+    if n_components == 1:
+        return np.ones((1, 1))
+    # 隔板法：在 steps + n - 1 个位置中选 n - 1 个隔板，相邻隔板之间的空位数即各组分的份数
+    slots = steps + n_components - 1
+    count = mixture_grid_size(n_components, steps)
+    if count > MAX_MIXTURES:
+        raise ValueError(f"比例网格共 {count} 个点，超过上限 {MAX_MIXTURES}")
+    bars = np.array(list(combinations(range(slots), n_components - 1)), dtype=np.int64)
+    edges = np.hstack([np.full((bars.shape[0], 1), -1), bars, np.full((bars.shape[0], 1), slots)])
+    return (np.diff(edges, axis=1) - 1) / steps
+
 
 class GreenChemistryAnalyzer:
     """绿色化学分析器"""
     
     def __init__(self):
         self.solvent_db = SOLVENT_DATABASE
+        self.solvent_index = SOLVENT_INDEX
+        self.properties = property_matrix(SOLVENT_DATABASE)
+
+    def find_solvent(self, name: str) -> Optional[SolventProperties]:
+        """按中文名、英文名、缩写或CAS号查找溶剂，未收录时返回None"""
+        canonical = self.solvent_index.canonical(name)
+        return None if canonical is None else self.solvent_db[canonical]
     
     def calculate_solvent_score(
         self,
@@ -55,9 +136,14 @@ class GreenChemistryAnalyzer:
         """
         ratio_b = 1 - ratio_a
         
-        # 获取溶剂属性
-        props_a = self.solvent_db.get(solvent_a, SolventProperties(solvent_a, 5.0, 5.0, 5.0, 5.0))
-        props_b = self.solvent_db.get(solvent_b, SolventProperties(solvent_b, 5.0, 5.0, 5.0, 5.0))
+        # 获取溶剂属性（未收录的溶剂按中等危害处理，并在结果中列出）
+        found_a = self.find_solvent(solvent_a)
+        found_b = self.find_solvent(solvent_b)
+        unknown = [name for name, found in ((solvent_a, found_a), (solvent_b, found_b)) if found is None]
+        if unknown:
+            logger.info("未收录的溶剂按默认属性计算：%s", ", ".join(unknown))
+        props_a = found_a or UNKNOWN_SOLVENT
+        props_b = found_b or UNKNOWN_SOLVENT
         
         # 加权平均计算
         hazard = ratio_a * props_a.hazard_score + ratio_b * props_b.hazard_score
@@ -81,9 +167,58 @@ class GreenChemistryAnalyzer:
             "health_score": round(10 - health, 2),
             "recyclability_score": round(recyclability, 2),
             "overall_green_score": round(green_score, 2),
-            "volume_penalty": round(volume_penalty, 2)
+            "volume_penalty": round(volume_penalty, 2),
+            "unknown_solvents": unknown
         }
     
+    def calculate_mixture_scores(
+        self,
+        solvents: Sequence[str],
+        fractions,
+        volume_ml: Union[float, Sequence[float]] = 1.0
+    ) -> Dict[str, np.ndarray]:
+        """
+        向量化计算多组分混合溶剂的绿色化学评分（公式与 calculate_solvent_score 相同）
+
+        Args:
+            solvents: N个溶剂名称（未收录的溶剂按中等危害处理）
+            fractions: (M, N) 比例矩阵，每行是一个混合物；按行归一化，可以直接使用百分比
+            volume_ml: 总体积（mL），标量或长度为M的数组
+
+        Returns:
+            {评分名: (M,) 数组}，键与 calculate_solvent_score 相同，数值未舍入
+        """
+        fractions = np.asarray(fractions, dtype=np.float64)
+        if fractions.ndim != 2 or fractions.shape[1] != len(solvents):
+            raise ValueError(f"比例矩阵必须是 (混合物数, {len(solvents)}) 的二维数组")
+        if fractions.shape[0] > MAX_MIXTURES:
+            raise ValueError(f"混合物数不能超过 {MAX_MIXTURES}")
+        if not np.all(np.isfinite(fractions)) or np.any(fractions < 0):
+            raise ValueError("比例必须是非负数")
+        totals = fractions.sum(axis=1)
+        if np.any(totals <= 0):
+            raise ValueError("每个混合物至少需要一个比例大于0的组分")
+        volume = np.broadcast_to(np.asarray(volume_ml, dtype=np.float64), totals.shape)
+
+        rows = [self.solvent_index.lookup(name) for name in solvents]
+        rows = [-1 if row is None else row for row in rows]
+        hazard, environmental, health, recyclability = ((fractions / totals[:, None]) @ self.properties[rows]).T
+
+        volume_penalty = np.minimum(volume / 100, 2.0)
+        green_score = np.clip(100 - (
+            (hazard * 0.3 + environmental * 0.3 + health * 0.2) * 10 * volume_penalty
+            - recyclability * 0.2 * 10
+        ), 0, 100)
+
+        return {
+            "hazard_score": 10 - hazard,
+            "environmental_score": 10 - environmental,
+            "health_score": 10 - health,
+            "recyclability_score": recyclability,
+            "overall_green_score": green_score,
+            "volume_penalty": volume_penalty,
+        }
+
     def calculate_eco_scale(
         self,
         yield_percentage: float,
@@ -216,3 +351,28 @@ class GreenChemistryAnalyzer:
 
 # 全局分析器实例
 analyzer = GreenChemistryAnalyzer()
+
+
+def solvent_mixture_landscape(
+    solvents: List[str],
+    fractions=None,
+    grid_steps: Optional[int] = None,
+    volume_ml: Union[float, List[float]] = 1.0
+) -> Dict:
+    """
+    混合溶剂评分图景（给定比例矩阵，或按 grid_steps 生成二元/三元等比例网格）
+
+    返回：
+        {"solvents", "unknown_solvents", "fractions": (M, N), 各评分: (M,)}
+    """
+    if (fractions is None) == (grid_steps is None):
+        raise ValueError("fractions 和 grid_steps 需要且只能提供一个")
+    if fractions is None:
+        fractions = mixture_grid(len(solvents), grid_steps)
+    scores = analyzer.calculate_mixture_scores(solvents, fractions, volume_ml)
+    return {
+        "solvents": list(solvents),
+        "unknown_solvents": [name for name in solvents if analyzer.solvent_index.lookup(name) is None],
+        "fractions": np.asarray(fractions, dtype=np.float64),
+        **scores,
+    }
@@ -0,0 +1,247 @@
+"""
+后台评分任务队列
+
+批量重算方法库、权重方案扫描等大计算量任务无法在一次HTTP请求内完成：
+- 提交任务后立即返回任务ID，任务状态、进度和结果保存在SQLite（scoring_jobs 表）
+- 工作协程在应用生命周期（main.py lifespan）内运行，按块把方法提交给计算调度器，
+  客户端断开连接不影响计算，也不会阻塞交互式评分
+- 每块计算完成后更新进度，并检查取消请求
+- 服务重启后，未完成的任务重新排队
+"""
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.database.connection import AsyncSessionLocal, AsyncReadSessionLocal
+from app.database.models import ScoringJob
+from app.services import batch_scoring
+from app.services.executor import compute_executor, scoring_cost
+
+
+logger = get_logger("jobs")
+
+# 任务状态
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = {JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED}
+
+
+# ============================================================================
+# 任务类型：每种类型对一块方法计算结果列表（与输入一一对应）
+# ============================================================================
+
+async def _score_batch(methods: List[Dict]) -> List[Dict]:
+    return await compute_executor.run(
+        batch_scoring.calculate_batch_scores,
+        methods,
+        cost=sum(scoring_cost(method) for method in methods)
+    )
+
+
+async def _score_sweep(methods: List[Dict]) -> List[Dict]:
+    return [
+        await compute_executor.run(
+            batch_scoring.calculate_scheme_sweep,
+            method,
+            cost=scoring_cost(method)
+        )
+        for method in methods
+    ]
+
+
+JOB_HANDLERS: Dict[str, Callable[[List[Dict]], Awaitable[List[Dict]]]] = {
+    "batch": _score_batch,
+    "sweep": _score_sweep,
+}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def job_summary(job: ScoringJob) -> Dict:
+    """任务状态（不含结果）"""
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress or 0,
+        "total": job.total or 0,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+class JobQueue:
+    """基于SQLite持久化的后台评分任务队列"""
+
+    def __init__(self, session_factory=AsyncSessionLocal, chunk_size: int = 200, read_session_factory=None):
+        self.session_factory = session_factory
+        # 状态查询和进度推送走只读连接，不排在进度更新等写事务后面
+        self.read_session_factory = read_session_factory or session_factory
+        self.chunk_size = max(1, chunk_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._cancel_requested: Set[str] = set()
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    async def start(self, workers: int):
+        """启动工作协程，并把上次未完成的任务重新排队"""
+        self._queue = asyncio.Queue()
+        async with self.session_factory() as db:
+            stmt = (
+                select(ScoringJob)
+                .where(ScoringJob.status.in_([JOB_PENDING, JOB_RUNNING]))
+                .order_by(ScoringJob.created_at)
+            )
+            unfinished = (await db.execute(stmt)).scalars().all()
+            for job in unfinished:
+                job.status = JOB_PENDING
+                job.progress = 0
+                self._queue.put_nowait(job.id)
+            await db.commit()
+        if unfinished:
+            logger.info("重新排队 %d 个未完成的评分任务", len(unfinished))
+
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(max(1, workers))]
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def join(self):
+        """等待队列中的任务全部处理完"""
+        await self._queue.join()
+
+    # ------------------------------------------------------------------
+    # 提交、查询、取消
+    # ------------------------------------------------------------------
+
+    async def submit(self, kind: str, methods: List[Dict]) -> Dict:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"未知的任务类型：{kind}")
+        if self._queue is None:
+            raise RuntimeError("任务队列未启动")
+
+        job = ScoringJob(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            status=JOB_PENDING,
+            progress=0,
+            total=len(methods),
+            payload={"methods": methods},
+        )
+        async with self.session_factory() as db:
+            db.add(job)
+            await db.commit()
+            await db.refresh(job)
+        self._queue.put_nowait(job.id)
+        return job_summary(job)
+
+    async def get(self, job_id: str, with_result: bool = False) -> Optional[ScoringJob]:
+        """获取任务；with_result 为True时同时加载结果"""
+        options = [undefer(ScoringJob.result)] if with_result else []
+        async with self.read_session_factory() as db:
+            return await db.get(ScoringJob, job_id, options=options)
+
+    async def cancel(self, job_id: str) -> Optional[Dict]:
+        """
+        取消任务：排队中的任务立即取消，运行中的任务在当前块计算完成后停止
+
+        返回：
+            任务状态；任务不存在时返回None
+        """
+        async with self.session_factory() as db:
+            job = await db.get(ScoringJob, job_id)
+            if job is None:
+                return None
+            if job.status == JOB_PENDING:
+                job.status = JOB_CANCELLED
+                job.finished_at = _now()
+                await db.commit()
+            elif job.status == JOB_RUNNING:
+                self._cancel_requested.add(job_id)
+            return job_summary(job)
+
+    async def watch(self, job_id: str, interval: float = 0.5) -> AsyncIterator[Dict]:
+        """每当进度或状态变化时产出任务状态，任务结束后停止"""
+        last = None
+        while True:
+            job = await self.get(job_id)
+            if job is None:
+                return
+            summary = job_summary(job)
+            if (summary["status"], summary["progress"]) != last:
+                last = (summary["status"], summary["progress"])
+                yield summary
+            if job.status in FINISHED_STATUSES:
+                return
+            await asyncio.sleep(interval)
+
+    # ------------------------------------------------------------------
+    # 执行
+    # ------------------------------------------------------------------
+
+    async def _update(self, job_id: str, **fields):
+        async with self.session_factory() as db:
+            job = await db.get(ScoringJob, job_id)
+            for key, value in fields.items():
+                setattr(job, key, value)
+            await db.commit()
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except Exception:
+                logger.exception("评分任务 %s 执行异常", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        async with self.session_factory() as db:
+            job = await db.get(ScoringJob, job_id, options=[undefer(ScoringJob.payload)])
+            if job is None or job.status != JOB_PENDING:
+                return  # 已被取消
+            job.status = JOB_RUNNING
+            job.started_at = _now()
+            await db.commit()
+            kind = job.kind
+            methods = job.payload["methods"]
+
+        handler = JOB_HANDLERS[kind]
+        results: List[Dict] = []
+        try:
+            for start in range(0, len(methods), self.chunk_size):
+                if job_id in self._cancel_requested:
+                    await self._update(job_id, status=JOB_CANCELLED, finished_at=_now())
+                    return
+                results.extend(await handler(methods[start:start + self.chunk_size]))
+                await self._update(job_id, progress=len(results))
+            await self._update(job_id, status=JOB_COMPLETED, result=results, finished_at=_now())
+        except Exception as e:
+            logger.warning("评分任务 %s 失败：%s", job_id, e)
+            await self._update(job_id, status=JOB_FAILED, error=str(e), finished_at=_now())
+        finally:
+            self._cancel_requested.discard(job_id)
+
+
+# 全局任务队列
+job_queue = JobQueue(chunk_size=settings.JOB_CHUNK_SIZE, read_session_factory=AsyncReadSessionLocal)
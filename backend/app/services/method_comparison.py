@@ -0,0 +1,134 @@
+"""
+多方法对比
+
+一次请求对比N个方法（请求中直接给出，或引用已保存分析的评分输入）：
+- 完全相同的方法只计算一次（按评分请求的规范化哈希去重）
+- 去重后的方法用批量引擎一次向量化计算
+- 试剂按名称合并为一张质量表（试剂 × 方法），同名试剂只出现一次
+- 返回按方法对齐的各层得分、相对基准方法的差值、排名和各小因子的最优方法
+
+得分越低越绿色：排名1为得分最低的方法，最优方法为得分最低者（并列时全部列出）。
+"""
+from typing import Dict, List
+
+import numpy as np
+
+from app.services import batch_scoring
+from app.services.batch_scoring import MAJOR_FACTOR_COLUMNS, SUB_FACTOR_NAMES
+from app.services.result_cache import make_cache_key
+
+
+SCORE_KEYS = ["score1", "score2", "score3"]
+MAJOR_NAMES = list(MAJOR_FACTOR_COLUMNS)
+
+
+def _rounded(values: np.ndarray) -> List[float]:
+    return [round(v, 2) for v in values.tolist()]
+
+
+def _ranks(values: List[float]) -> List[int]:
+    """升序排名（并列取最小名次：1, 2, 2, 4）"""
+    ordered = np.sort(values)
+    return (np.searchsorted(ordered, values, side="left") + 1).tolist()
+
+
+def _winners(values: List[float]) -> List[int]:
+    best = min(values)
+    return [i for i, v in enumerate(values) if v == best]
+
+
+def _layer_table(arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """把批量引擎的数组整理为 {层名: (N,) 数组}"""
+    table = {key: arrays[key] for key in SCORE_KEYS}
+    for stage, key in (("instrument", "instrument_major_factors"), ("prep", "prep_major_factors")):
+        for j, name in enumerate(MAJOR_NAMES):
+            table[f"{stage}_{name}"] = arrays[key][:, j]
+    for j, name in enumerate(SUB_FACTOR_NAMES):
+        table[name] = arrays["merged_sub_factors"][:, j]
+    return table
+
+
+def _reagent_masses(methods: List[Dict], arrays: Dict[str, np.ndarray], inverse: np.ndarray) -> List[Dict]:
+    """按试剂名称合并的质量表；未使用该试剂的方法记为0"""
+    n_methods = len(inverse)
+    rows: Dict[str, Dict] = {}
+
+    def fill(stage_key: str, names_key: str, counts_key: str, masses_key: str):
+        offsets = np.concatenate([[0], np.cumsum(arrays[counts_key])])
+        masses = arrays[masses_key].tolist()
+        for i, unique_index in enumerate(inverse.tolist()):
+            start = int(offsets[unique_index])
+            for k, name in enumerate(methods[unique_index][names_key]):
+                row = rows.setdefault(name, {
+                    "name": name,
+                    "instrument_masses": [0.0] * n_methods,
+                    "prep_masses": [0.0] * n_methods,
+                })
+                row[stage_key][i] = masses[start + k]
+
+    fill("instrument_masses", "instrument_composition", "instrument_counts", "instrument_masses")
+    fill("prep_masses", "prep_volumes", "prep_counts", "prep_masses")
+    return list(rows.values())
+
+
+def compare_methods(methods: List[Dict], labels: List[str], baseline: int = 0) -> Dict:
+    """
+    对比多个方法
+
+    参数：
+        methods: calculate_full_scores 关键字参数列表
+        labels: 与 methods 对齐的名称
+        baseline: 计算差值时的基准方法下标
+
+    返回：
+        {
+            "labels", "baseline", "unique_methods",
+            "layers": {层名: [N]},        # score1/2/3、instrument_S…、prep_S…、S1…E3（合并后的小因子）
+            "deltas": {层名: [N]},        # 与基准方法的差值
+            "ranks": {层名: [N]},         # 1为得分最低
+            "winners": {层名: [方法下标]},
+            "reagents": [{"name", "instrument_masses": [N], "prep_masses": [N]}]
+        }
+
+    异常：
+        ValueError: 方法数不足两个、labels长度不一致或 baseline 越界
+    """
+    n_methods = len(methods)
+    if n_methods < 2:
+        raise ValueError("至少需要两个方法才能对比")
+    if len(labels) != n_methods:
+        raise ValueError("labels 的数量与方法数不一致")
+    if not 0 <= baseline < n_methods:
+        raise ValueError(f"baseline 必须在 0-{n_methods - 1} 之间")
+
+    # 相同的方法只计算一次
+    keys = [make_cache_key(method) for method in methods]
+    first_index: Dict[str, int] = {}
+    unique_methods: List[Dict] = []
+    inverse = np.empty(n_methods, dtype=np.intp)
+    for i, key in enumerate(keys):
+        if key not in first_index:
+            first_index[key] = len(unique_methods)
+            unique_methods.append(methods[i])
+        inverse[i] = first_index[key]
+
+    arrays = batch_scoring.calculate_batch_arrays(unique_methods)
+    table = {name: values[inverse] for name, values in _layer_table(arrays).items()}
+
+    layers = {name: _rounded(values) for name, values in table.items()}
+
+    return {
+        "labels": labels,
+        "baseline": baseline,
+        "unique_methods": len(unique_methods),
+        "sub_factor_names": SUB_FACTOR_NAMES,
+        "layers": layers,
+        # 差值、排名和最优方法都按显示值（两位小数）计算，与 layers 中的数值一致
+        "deltas": {
+            name: [round(v - values[baseline], 2) for v in values]
+            for name, values in layers.items()
+        },
+        "ranks": {name: _ranks(values) for name, values in layers.items()},
+        "winners": {name: _winners(values) for name, values in layers.items()},
+        "reagents": _reagent_masses(unique_methods, arrays, inverse),
+    }
@@ -0,0 +1,367 @@
+"""
+方法表批量导入与Excel评分报告
+
+把CSV/Excel方法清单按块读取、评分，并以 openpyxl 只写模式逐行写出Excel报告，
+几万行的方法清单也不需要一次性载入内存。
+
+输入为长表格式，每行是一个方法的一个试剂在一个阶段中的数据，同一方法的行必须连续：
+
+    列名                  说明
+    method                方法名称
+    stage                 instrument（仪器分析梯度）或 preparation（样品前处理）
+    reagent               试剂名称
+    time                  梯度时间点(min)，仅 instrument 行
+    percent               该时间点的试剂比例(%)，仅 instrument 行
+    curve                 该时间点的梯度曲线类型（可选，默认 linear），仅 instrument 行
+    volume                前处理体积(mL)，仅 preparation 行
+    density               试剂密度(g/mL)
+    S1 … E3               试剂的9个小因子
+    flow_rate, p_factor, pretreatment_p_factor,
+    instrument_r_factor, instrument_d_factor,
+    pretreatment_r_factor, pretreatment_d_factor,
+    safety_scheme … final_scheme
+                          方法级参数，取该方法各行中第一个非空值；方案列可省略
+
+命令行用法（在 backend 目录下）：
+    python -m app.services.method_import methods.csv report.xlsx
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from pydantic import ValidationError
+
+from app.core.logging_config import get_logger
+from app.schemas.schemas import FullScoreRequest
+from app.services.batch_scoring import SUB_FACTOR_NAMES, calculate_batch_scores_isolated
+
+
+logger = get_logger("import")
+
+# 每次从文件读取的行数、每次评分的方法数
+DEFAULT_CHUNK_ROWS = 10000
+DEFAULT_CHUNK_METHODS = 200
+
+REQUIRED_COLUMNS = ["method", "stage", "reagent"]
+
+# 方法级参数：(列名, 默认值)；默认值为None表示必填
+METHOD_PARAMETERS = [
+    ("flow_rate", None),
+    ("p_factor", None),
+    ("pretreatment_p_factor", 0.0),
+    ("instrument_r_factor", None),
+    ("instrument_d_factor", None),
+    ("pretreatment_r_factor", None),
+    ("pretreatment_d_factor", None),
+]
+
+SCHEME_PARAMETERS = [
+    "safety_scheme",
+    "health_scheme",
+    "environment_scheme",
+    "instrument_stage_scheme",
+    "prep_stage_scheme",
+    "final_scheme",
+]
+
+REPORT_COLUMNS = (
+    ["method", "Score1", "Score2", "Score3"]
+    + [f"instrument_{k}" for k in ("S", "H", "E")]
+    + [f"preparation_{k}" for k in ("S", "H", "E")]
+    + SUB_FACTOR_NAMES
+    + ["error"]
+)
+
+Source = Union[str, Path]
+
+
+# ============================================================================
+# 分块读取
+# ============================================================================
+
+def _iter_excel_frames(path: Source, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """以 openpyxl 只读模式逐行读取第一个工作表"""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        workbook.close()
+
+
+def iter_frames(path: Source, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """按文件扩展名分块读取CSV或Excel"""
+    suffix = Path(path).suffix.lower()
+    if suffix in (".xlsx", ".xlsm"):
+        yield from _iter_excel_frames(path, chunk_rows)
+    elif suffix in (".csv", ".txt"):
+        for frame in pd.read_csv(path, chunksize=chunk_rows, skipinitialspace=True):
+            frame.columns = [str(c).strip() for c in frame.columns]
+            yield frame
+    else:
+        raise ValueError(f"不支持的文件格式：{suffix}（支持 .csv / .xlsx）")
+
+
+def iter_method_rows(frames: Iterable[pd.DataFrame]) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    把分块读取的行按方法分组；每块末尾的方法可能延续到下一块，留到下一块一起处理
+    """
+    carry: Optional[pd.DataFrame] = None
+    for frame in frames:
+        missing = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+        if missing:
+            raise ValueError(f"方法表缺少列：{', '.join(missing)}")
+        frame = frame.dropna(subset=["method"])
+        frame = frame.assign(method=frame["method"].astype(str).str.strip())
+        if carry is not None:
+            # 全空的列（如仪器分析行的 volume）不参与拼接的类型推断，拼接后再补回
+            columns = carry.columns.union(frame.columns, sort=False)
+            parts = [part.dropna(axis=1, how="all") for part in (carry, frame)]
+            frame = pd.concat(parts, ignore_index=True).reindex(columns=columns)
+        if frame.empty:
+            continue
+
+        is_last = frame["method"] == frame["method"].iloc[-1]
+        carry = frame[is_last]
+        for name, rows in frame[~is_last].groupby("method", sort=False):
+            yield name, rows
+
+    if carry is not None and not carry.empty:
+        yield carry["method"].iloc[0], carry
+
+
+# ============================================================================
+# 行 -> 评分参数
+# ============================================================================
+
+def _first_value(rows: pd.DataFrame, column: str):
+    if column not in rows.columns:
+        return None
+    values = rows[column].dropna()
+    return values.iloc[0] if not values.empty else None
+
+
+def _reagent_table(rows: pd.DataFrame, stage_label: str) -> Tuple[Dict[str, float], Dict[str, Dict[str, float]]]:
+    """每个试剂的密度和小因子（取该试剂第一行的值）"""
+    missing = [c for c in ["density"] + SUB_FACTOR_NAMES if c not in rows.columns]
+    if missing:
+        raise ValueError(f"方法表缺少列：{', '.join(missing)}")
+    first = rows.groupby("reagent", sort=False)[["density"] + SUB_FACTOR_NAMES].first()
+    if first[SUB_FACTOR_NAMES].isna().any().any():
+        incomplete = first.index[first[SUB_FACTOR_NAMES].isna().any(axis=1)].tolist()
+        raise ValueError(f"{stage_label}试剂缺少小因子：{', '.join(map(str, incomplete))}")
+    densities = first["density"].dropna().astype(float).to_dict()
+    factors = first[SUB_FACTOR_NAMES].astype(float).to_dict(orient="index")
+    return densities, factors
+
+
+def method_from_rows(rows: pd.DataFrame) -> Dict:
+    """
+    把一个方法的所有行转换为 calculate_full_scores 的关键字参数
+
+    异常：
+        ValueError: 缺少列、梯度表不完整、必填参数缺失或参数不合法（见 _validate_request）
+    """
+    rows = rows.assign(
+        stage=rows["stage"].astype(str).str.strip().str.lower(),
+        reagent=rows["reagent"].astype(str).str.strip()
+    )
+    instrument = rows[rows["stage"] == "instrument"]
+    preparation = rows[rows["stage"] == "preparation"]
+    if instrument.empty:
+        raise ValueError("缺少仪器分析梯度行（stage=instrument）")
+
+    # 梯度表：时间点 × 试剂
+    gradient = instrument.pivot_table(
+        index="time", columns="reagent", values="percent", aggfunc="first", sort=True
+    )
+    if gradient.isna().any().any():
+        raise ValueError("仪器分析梯度表不完整：每个试剂在每个时间点都需要比例")
+    curves = (
+        instrument.groupby("time")["curve"].first().reindex(gradient.index)
+        if "curve" in instrument.columns else pd.Series(index=gradient.index, dtype=object)
+    )
+
+    inst_densities, inst_factors = _reagent_table(instrument, "仪器分析")
+    if preparation.empty:
+        prep_volumes, prep_densities, prep_factors = {}, {}, {}
+    else:
+        prep_volumes = preparation.groupby("reagent", sort=False)["volume"].first().fillna(0.0).astype(float).to_dict()
+        prep_densities, prep_factors = _reagent_table(preparation, "前处理")
+
+    kwargs = {
+        "instrument_time_points": gradient.index.astype(float).tolist(),
+        "instrument_composition": {r: gradient[r].astype(float).tolist() for r in gradient.columns},
+        "instrument_densities": inst_densities,
+        "instrument_factor_matrix": inst_factors,
+        "instrument_curve_types": [c if isinstance(c, str) and c else "linear" for c in curves],
+        "prep_volumes": prep_volumes,
+        "prep_densities": prep_densities,
+        "prep_factor_matrix": prep_factors,
+        "custom_weights": None,
+    }
+
+    for column, default in METHOD_PARAMETERS:
+        value = _first_value(rows, column)
+        if value is None:
+            if default is None:
+                raise ValueError(f"缺少方法参数：{column}")
+            value = default
+        kwargs["instrument_flow_rate" if column == "flow_rate" else column] = float(value)
+
+    for column in SCHEME_PARAMETERS:
+        value = _first_value(rows, column)
+        kwargs[column] = str(value).strip() if value is not None else FullScoreRequest.model_fields[column].default
+
+    _validate_request(kwargs)
+    return kwargs
+
+
+def _validate_request(kwargs: Dict):
+    """
+    按 FullScoreRequest 校验（与 /scoring/full-score 相同的规则：流速为正、P/R/D因子非负、小因子范围等）
+
+    异常：
+        ValueError: 第一个校验错误（字段路径: 原因）
+    """
+    payload = {
+        "instrument": {
+            "time_points": kwargs["instrument_time_points"],
+            "composition": kwargs["instrument_composition"],
+            "flow_rate": kwargs["instrument_flow_rate"],
+            "densities": kwargs["instrument_densities"],
+            "factor_matrix": kwargs["instrument_factor_matrix"],
+            "curve_types": kwargs["instrument_curve_types"],
+        },
+        "preparation": {
+            "volumes": kwargs["prep_volumes"],
+            "densities": kwargs["prep_densities"],
+            "factor_matrix": kwargs["prep_factor_matrix"],
+        },
+        **{column: kwargs[column] for column, _ in METHOD_PARAMETERS if column != "flow_rate"},
+        **{column: kwargs[column] for column in SCHEME_PARAMETERS},
+    }
+    try:
+        FullScoreRequest.model_validate(payload)
+    except ValidationError as e:
+        first = e.errors(include_url=False)[0]
+        location = ".".join(str(part) for part in first["loc"])
+        raise ValueError(f"{location}: {first['msg']}" if location else first["msg"])
+
+
+def iter_methods(path: Source, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+    """逐个产出 (方法名称, 评分参数, 错误信息)；解析失败时评分参数为None"""
+    for name, rows in iter_method_rows(iter_frames(path, chunk_rows)):
+        try:
+            yield name, method_from_rows(rows), None
+        except (ValueError, KeyError, TypeError) as e:
+            yield name, None, f"数据解析错误: {str(e)}"
+
+
+# ============================================================================
+# Excel报告
+# ============================================================================
+
+class ExcelReportWriter:
+    """openpyxl 只写模式的评分报告（每写一行即落盘，不在内存中保留整张表）"""
+
+    def __init__(self, path: Source):
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("评分结果")
+        self.sheet.append(REPORT_COLUMNS)
+        self.scored = 0
+        self.failed = 0
+
+    def add_result(self, name: str, result: Dict):
+        instrument = result["instrument"]["major_factors"]
+        preparation = result["preparation"]["major_factors"]
+        merged = result["merged"]["sub_factors"]
+        self.sheet.append(
+            [name, result["instrument"]["score1"], result["preparation"]["score2"], result["final"]["score3"]]
+            + [instrument[k] for k in ("S", "H", "E")]
+            + [preparation[k] for k in ("S", "H", "E")]
+            + [merged[k] for k in SUB_FACTOR_NAMES]
+            + [None]
+        )
+        self.scored += 1
+
+    def add_error(self, name: str, error: str):
+        self.sheet.append([name] + [None] * (len(REPORT_COLUMNS) - 2) + [error])
+        self.failed += 1
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+# ============================================================================
+# 导入流程
+# ============================================================================
+
+def import_and_score(
+    source: Source,
+    report_path: Source,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    chunk_methods: int = DEFAULT_CHUNK_METHODS
+) -> Dict[str, int]:
+    """
+    读取方法表、分块评分并写出Excel报告
+
+    返回：
+        {"methods": 方法总数, "scored": 评分成功数, "failed": 失败数}
+    """
+    writer = ExcelReportWriter(report_path)
+    block: List[Tuple[str, Optional[Dict], Optional[str]]] = []
+
+    def flush():
+        methods = [kwargs for _, kwargs, _ in block if kwargs is not None]
+        outcomes = iter(calculate_batch_scores_isolated(methods)) if methods else iter(())
+        for name, kwargs, error in block:
+            if kwargs is None:
+                writer.add_error(name, error)
+                continue
+            ok, value = next(outcomes)
+            if ok:
+                writer.add_result(name, value)
+            else:
+                writer.add_error(name, value)
+        block.clear()
+
+    for item in iter_methods(source, chunk_rows):
+        block.append(item)
+        if len(block) >= chunk_methods:
+            flush()
+    flush()
+    writer.close()
+
+    summary = {"methods": writer.scored + writer.failed, "scored": writer.scored, "failed": writer.failed}
+    logger.info("方法表导入完成：%s", summary)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="批量导入方法表并生成Excel评分报告")
+    parser.add_argument("source", type=Path, help="方法表（.csv / .xlsx）")
+    parser.add_argument("report", type=Path, help="输出的Excel报告路径")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="每次读取的行数")
+    parser.add_argument("--chunk-methods", type=int, default=DEFAULT_CHUNK_METHODS, help="每次评分的方法数")
+    args = parser.parse_args(argv)
+
+    summary = import_and_score(args.source, args.report, args.chunk_rows, args.chunk_methods)
+    print(f"共 {summary['methods']} 个方法：成功 {summary['scored']}，失败 {summary['failed']}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
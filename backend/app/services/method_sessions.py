@@ -0,0 +1,208 @@
+"""
+评分会话模块
+
+切换权重方案时，梯度、试剂因子等输入不变，Layer 0-1（质量 + 小因子）的结果也不变。
+首次评分时把 Layer 0-1 的结果保存在服务端并返回一个会话令牌，
+之后只需提交令牌和新的方案选择即可重算 Layer 2-5。
+
+建立会话与 /scoring/full-score 共用评分结果缓存：完整结果中已包含 Layer 0-1 的质量和小因子，
+缓存命中时直接由缓存结果建立会话；未命中时计算后写入缓存。
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.services import scoring_service
+from app.services.executor import scoring_cost
+from app.services.result_cache import ScoreResultCache, make_cache_key, score_cache
+
+
+# 会话中保存的方案与P/R/D字段（即 calculate_scores_from_sub_factors 的可变参数）
+SCHEME_FIELDS = [
+    "safety_scheme",
+    "health_scheme",
+    "environment_scheme",
+    "instrument_stage_scheme",
+    "prep_stage_scheme",
+    "final_scheme",
+    "custom_weights",
+]
+
+FACTOR_FIELDS = [
+    "p_factor",
+    "pretreatment_p_factor",
+    "instrument_r_factor",
+    "instrument_d_factor",
+    "pretreatment_r_factor",
+    "pretreatment_d_factor",
+]
+
+
+@dataclass
+class MethodSession:
+    """一个方法的 Layer 0-1 缓存结果"""
+    token: str
+    inst_masses: Dict[str, float]
+    inst_sub_scores: Dict[str, float]
+    prep_masses: Dict[str, float]
+    prep_sub_scores: Dict[str, float]
+    parameters: Dict  # 最近一次使用的方案、自定义权重和P/R/D因子
+    last_access: float = field(default_factory=time.monotonic)
+
+
+class MethodSessionStore:
+    """带容量上限和过期时间的内存会话存储（最久未使用的会话优先淘汰）"""
+
+    def __init__(self, max_sessions: int, ttl_seconds: float):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, MethodSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge_expired(self, now: float):
+        expired = [
+            token for token, session in self._sessions.items()
+            if now - session.last_access > self.ttl_seconds
+        ]
+        for token in expired:
+            del self._sessions[token]
+
+    def put(self, session: MethodSession):
+        with self._lock:
+            now = time.monotonic()
+            self._purge_expired(now)
+            session.last_access = now
+            self._sessions[session.token] = session
+            self._sessions.move_to_end(session.token)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def get(self, token: str) -> Optional[MethodSession]:
+        with self._lock:
+            now = time.monotonic()
+            self._purge_expired(now)
+            session = self._sessions.get(token)
+            if session is not None:
+                session.last_access = now
+                self._sessions.move_to_end(token)
+            return session
+
+    def delete(self, token: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(token, None) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+# 全局会话存储实例
+session_store = MethodSessionStore(
+    max_sessions=settings.METHOD_SESSION_MAX,
+    ttl_seconds=settings.METHOD_SESSION_TTL_SECONDS
+)
+
+
+def create_session(scoring_kwargs: Dict, cache: Optional[ScoreResultCache] = None) -> Dict:
+    """
+    执行完整评分（相同请求直接取缓存结果）并保存 Layer 0-1 结果
+
+    参数：
+        scoring_kwargs: calculate_full_scores 的关键字参数
+        cache: 评分结果缓存（默认为全局 score_cache）
+
+    返回：
+        {"token": str, "result": calculate_full_scores 结构的评分结果, "cached": 是否命中缓存}
+    """
+    cache = score_cache if cache is None else cache
+    cache_key = make_cache_key(scoring_kwargs) if scoring_cost(scoring_kwargs) <= settings.SCORE_CACHE_MAX_COST else None
+    parameters = {key: scoring_kwargs[key] for key in SCHEME_FIELDS + FACTOR_FIELDS if key in scoring_kwargs}
+
+    result = cache.get(cache_key) if cache_key is not None else None
+    if result is not None:
+        session = MethodSession(
+            token=secrets.token_urlsafe(16),
+            inst_masses=result["instrument"]["masses"],
+            inst_sub_scores=result["instrument"]["sub_factors"],
+            prep_masses=result["preparation"]["masses"],
+            prep_sub_scores=result["preparation"]["sub_factors"],
+            parameters=parameters
+        )
+        session_store.put(session)
+        return {"token": session.token, "result": result, "cached": True}
+
+    # Layer 0-1
+    inst_masses = scoring_service.calculate_gradient_integral(
+        scoring_kwargs["instrument_time_points"],
+        scoring_kwargs["instrument_composition"],
+        scoring_kwargs["instrument_flow_rate"],
+        scoring_kwargs["instrument_densities"],
+        scoring_kwargs.get("instrument_curve_types")
+    )
+    inst_sub_scores = scoring_service.calculate_all_sub_factors(
+        inst_masses, scoring_kwargs["instrument_factor_matrix"]
+    )
+    prep_masses = scoring_service.calculate_prep_masses(
+        scoring_kwargs["prep_volumes"], scoring_kwargs["prep_densities"]
+    )
+    prep_sub_scores = scoring_service.calculate_all_sub_factors(
+        prep_masses, scoring_kwargs["prep_factor_matrix"]
+    )
+
+    session = MethodSession(
+        token=secrets.token_urlsafe(16),
+        inst_masses=inst_masses,
+        inst_sub_scores=inst_sub_scores,
+        prep_masses=prep_masses,
+        prep_sub_scores=prep_sub_scores,
+        parameters=parameters
+    )
+
+    # Layer 2-5（先计算，保证只有合法的方案组合才会建立会话）
+    result = _score_session(session, session.parameters)
+    session_store.put(session)
+    if cache_key is not None:
+        cache.put(cache_key, result)
+
+    return {"token": session.token, "result": result, "cached": False}
+
+
+def rescore_session(token: str, overrides: Dict) -> Optional[Dict]:
+    """
+    使用会话中缓存的 Layer 0-1 结果重算 Layer 2-5
+
+    参数：
+        token: create_session 返回的会话令牌
+        overrides: 需要修改的方案/自定义权重/P/R/D因子，值为None的字段保持不变
+
+    返回：
+        评分结果；会话不存在或已过期时返回None
+    """
+    session = session_store.get(token)
+    if session is None:
+        return None
+
+    parameters = dict(session.parameters)
+    parameters.update({
+        key: value for key, value in overrides.items()
+        if value is not None and key in SCHEME_FIELDS + FACTOR_FIELDS
+    })
+
+    result = _score_session(session, parameters)
+    # 只有重算成功才记住新的参数
+    session.parameters = parameters
+    return result
+
+
+def _score_session(session: MethodSession, parameters: Dict) -> Dict:
+    return scoring_service.calculate_scores_from_sub_factors(
+        inst_masses=session.inst_masses,
+        inst_sub_scores=session.inst_sub_scores,
+        prep_masses=session.prep_masses,
+        prep_sub_scores=session.prep_sub_scores,
+        **parameters
+    )
@@ -0,0 +1,113 @@
+"""
+NDJSON流式批量评分
+
+请求体每行一个 FullScoreRequest JSON，响应每行一个评分结果：
+- 边接收边解析，每凑满一块就用批量引擎计算并立即输出，内存占用与批量大小无关
+- 某一行解析或计算失败只影响该行，输出 {"index": i, "success": false, "error": ...}
+"""
+import json
+from typing import AsyncIterator, Callable, Dict, List, Tuple
+
+from pydantic import ValidationError
+from starlette.responses import StreamingResponse
+
+from app.core.logging_config import get_logger
+from app.schemas.schemas import FullScoreRequest
+from app.services import batch_scoring
+from app.services.executor import compute_executor, scoring_cost
+
+
+logger = get_logger("ndjson")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """把任意切分的字节流还原为行（跳过空行）"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    边读请求体边输出的流式响应
+
+    StreamingResponse 会另起任务调用 receive() 监听断开，与生成器读取请求体争抢消息；
+    这里只输出响应，断开由 request.stream() 抛出 ClientDisconnect 结束生成器
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _error_line(index: int, message: str) -> bytes:
+    return _dump({"index": index, "success": False, "error": message})
+
+
+def _dump(record: Dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+async def score_ndjson(
+    chunks: AsyncIterator[bytes],
+    build_kwargs: Callable[[FullScoreRequest], Dict],
+    chunk_size: int
+) -> AsyncIterator[bytes]:
+    """
+    流式评分：逐行解析请求，按块计算，按输入顺序逐行输出结果
+
+    参数：
+        chunks: 请求体字节流
+        build_kwargs: FullScoreRequest -> calculate_full_scores 关键字参数
+        chunk_size: 每块方法数
+    """
+    pending: List[Tuple[int, Dict]] = []
+    errors: Dict[int, str] = {}  # 当前块之前解析失败的行，按顺序与结果一起输出
+    index = 0
+
+    async def flush() -> AsyncIterator[bytes]:
+        if pending:
+            methods = [method for _, method in pending]
+            outcomes = await compute_executor.run(
+                batch_scoring.calculate_batch_scores_isolated,
+                methods,
+                cost=sum(scoring_cost(method) for method in methods)
+            )
+            scored = {i: outcome for (i, _), outcome in zip(pending, outcomes)}
+        else:
+            scored = {}
+        for i in sorted(list(scored) + list(errors)):
+            if i in errors:
+                yield _error_line(i, errors[i])
+            else:
+                ok, value = scored[i]
+                yield _dump({"index": i, "success": True, "data": value}) if ok else _error_line(i, value)
+        pending.clear()
+        errors.clear()
+
+    async for line in iter_lines(chunks):
+        try:
+            request = FullScoreRequest.model_validate_json(line)
+            pending.append((index, build_kwargs(request)))
+        except ValidationError as e:
+            first = e.errors(include_url=False)[0]
+            location = ".".join(str(part) for part in first["loc"])
+            detail = f"{location}: {first['msg']}" if location else first["msg"]
+            errors[index] = f"数据验证错误: {detail}"
+        index += 1
+        if len(pending) + len(errors) >= chunk_size:
+            async for out in flush():
+                yield out
+
+    async for out in flush():
+        yield out
+    logger.debug("NDJSON流式评分完成，共 %d 行", index)
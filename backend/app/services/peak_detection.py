@@ -0,0 +1,395 @@
+"""
+原始色谱信号的峰检测与积分
+
+输入检测器原始信号（时间、响应值两列，可达数百万点），全部按数组运算：
+1. 基线校正：形态学开运算（滑动最小值再取最大值）+ 滑动平均，得到平滑基线后扣除
+2. 噪声估计：一阶差分的中位数绝对偏差（MAD），不受峰的影响
+3. 峰检测：scipy.signal.find_peaks，默认最小峰突出度为噪声的 10 倍（定量限量级）。
+   噪声在峰两翼产生大量局部极大值，逐个计算突出度的代价与点数成平方关系；
+   点数较多时先按块取最大值得到包络（不超过 DETECTION_POINTS 点，窄峰不会被削平），
+   在包络上检测，再回到原始分辨率定位峰顶
+4. 峰宽：scipy.signal.peak_widths 求半峰宽和 5% 峰高处宽度，线性插值到时间轴
+5. 积分：整条信号一次累积梯形积分，各峰面积 = 终点累积值 - 起点累积值，
+   积分区间取 1% 峰高处；相邻峰重叠时在两峰之间的谷点垂直分割
+6. 色谱参数（按《美国药典》USP <621>）：
+   分离度  Rs = 1.18 × (t₂ - t₁) / (W½,₁ + W½,₂)
+   理论塔板数 N = 5.54 × (tR / W½)²
+   拖尾因子  T = W0.05 / (2f)，f 为 5% 峰高处峰前沿到峰顶的距离
+"""
+import json
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy import ndimage, signal as sp_signal
+from scipy.integrate import cumulative_trapezoid
+
+from app.services.array_transport import decode_arrays
+
+
+DEFAULT_BASELINE_FRACTION = 0.05  # 默认基线窗口：运行时长的5%
+DEFAULT_PROMINENCE_SNR = 10.0     # 默认最小峰突出度（噪声倍数）
+MIN_TRACE_POINTS = 5
+DETECTION_POINTS = 65536          # 峰检测包络的最大点数
+INTEGRATION_REL_HEIGHT = 0.99     # 积分区间：1%峰高处
+
+
+def _validate_trace(times: np.ndarray, values: np.ndarray):
+    if values.ndim != 1 or times.ndim != 1:
+        raise ValueError("时间和信号必须是一维数组")
+    if times.shape[0] != values.shape[0]:
+        raise ValueError(f"时间点数（{times.shape[0]}）与信号点数（{values.shape[0]}）不一致")
+    if values.shape[0] < MIN_TRACE_POINTS:
+        raise ValueError(f"信号至少需要 {MIN_TRACE_POINTS} 个点")
+    if not np.all(np.isfinite(values)) or not np.all(np.isfinite(times)):
+        raise ValueError("信号中包含 NaN 或无穷大")
+    if np.any(np.diff(times) <= 0):
+        raise ValueError("时间必须严格递增")
+
+
+def make_times(n_points: int, sampling_interval: float, start_time: float = 0.0) -> np.ndarray:
+    """等间隔采样的时间轴（分钟）"""
+    if sampling_interval <= 0:
+        raise ValueError("采样间隔必须大于0")
+    return start_time + np.arange(n_points, dtype=np.float64) * sampling_interval
+
+
+def estimate_baseline(values: np.ndarray, window_points: int) -> np.ndarray:
+    """
+    形态学开运算 + 滑动平均得到的基线（宽于窗口的缓慢漂移保留，窄峰被削去）
+
+    开运算贴着噪声的下包络，最后按残差中位数整体上移到噪声中心
+    （色谱峰只占少数点，不影响中位数）
+    """
+    baseline = baseline_envelope(values, window_points)
+    return baseline + np.median(values - baseline)
+
+
+def baseline_envelope(values: np.ndarray, window_points: int) -> np.ndarray:
+    """
+    开运算 + 滑动平均（未上移的基线）
+
+    每个输出点只依赖其前后各 1.5 × window_points 以内的输入，可以分块计算
+    """
+    window_points = int(max(3, min(window_points, values.shape[0])))
+    opened = ndimage.grey_opening(values, size=window_points, mode="nearest")
+    return ndimage.uniform_filter1d(opened, size=window_points, mode="nearest")
+
+
+def estimate_noise(values: np.ndarray) -> float:
+    """一阶差分的MAD噪声估计（按高斯噪声换算为标准差）"""
+    diff = np.diff(values)
+    mad = np.median(np.abs(diff - np.median(diff)))
+    return float(1.4826 * mad / np.sqrt(2.0))
+
+
+def block_envelope(values: np.ndarray, factor: int):
+    """
+    按块取最大值的包络
+
+    返回：
+        (envelope, argmax)：每块的最大值，以及该最大值在原数组中的下标
+    """
+    n_points = values.shape[0]
+    n_blocks = -(-n_points // factor)
+    padded = np.full(n_blocks * factor, -np.inf)
+    padded[:n_points] = values
+    blocks = padded.reshape(n_blocks, factor)
+    local = np.argmax(blocks, axis=1)
+    argmax = np.arange(n_blocks) * factor + local
+    return blocks[np.arange(n_blocks), local], argmax
+
+
+def _at(positions: np.ndarray, series: np.ndarray) -> np.ndarray:
+    """按小数下标线性插值"""
+    return np.interp(positions, np.arange(series.shape[0], dtype=np.float64), series)
+
+
+def interval_areas(corrected: np.ndarray, times: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """小数下标区间 [left, right] 内的梯形积分（累积积分之差）"""
+    cumulative = cumulative_trapezoid(corrected, times, initial=0.0)
+    return _at(right, cumulative) - _at(left, cumulative)
+
+
+def split_overlaps(corrected, peaks: np.ndarray, left: np.ndarray, right: np.ndarray):
+    """相邻峰积分区间重叠时，在两峰之间的谷点垂直分割（只读取两峰之间的数据，corrected 可以是内存映射）"""
+    overlapping = np.flatnonzero(right[:-1] > left[1:])
+    for i in overlapping:
+        start, stop = peaks[i], peaks[i + 1]
+        valley = float(start + np.argmin(corrected[start:stop + 1]))
+        right[i] = valley
+        left[i + 1] = valley
+    return left, right
+
+
+def detection_settings(n_points: int, run_time: float, baseline_window: Optional[float]) -> Tuple[float, int, int]:
+    """
+    返回：
+        (采样间隔, 基线窗口点数, 包络块大小)
+    """
+    interval = run_time / (n_points - 1)
+    window = baseline_window if baseline_window is not None else run_time * DEFAULT_BASELINE_FRACTION
+    window_points = max(3, int(round(window / interval)))
+    factor = max(1, -(-n_points // DETECTION_POINTS))
+    return interval, window_points, factor
+
+
+def find_candidates(envelope: np.ndarray, envelope_index: Optional[np.ndarray], prominence: float,
+                    min_height: Optional[float], window_points: int, factor: int) -> np.ndarray:
+    """在包络上检测峰，返回原始分辨率下的峰顶下标"""
+    candidates, _ = sp_signal.find_peaks(
+        envelope,
+        prominence=prominence,
+        height=min_height,
+        wlen=2 * (window_points // factor) + 1,
+    )
+    return envelope_index[candidates] if envelope_index is not None else candidates
+
+
+def measure_peaks(
+    corrected: np.ndarray,
+    peaks: np.ndarray,
+    window_points: int,
+    interval: float,
+    min_width: Optional[float] = None,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    在原始分辨率下测量峰的突出度、各高度处的峰宽边界和顶点位置
+
+    突出度只在峰两侧各 window_points 点内搜索，峰宽边界不超出突出度的基点，
+    因此 corrected 只需覆盖各峰 ± window_points 的范围
+
+    返回：
+        (保留的峰顶下标, {"height", "half_left", "half_right", "base_left", "base_right",
+         "left", "right", "apex"})，位置均为 corrected 内的小数下标
+    """
+    prominence_data = sp_signal.peak_prominences(corrected, peaks, wlen=2 * window_points + 1)
+
+    if min_width and peaks.shape[0]:
+        widths = sp_signal.peak_widths(corrected, peaks, rel_height=0.5, prominence_data=prominence_data)[0]
+        keep = widths * interval >= min_width
+        peaks = peaks[keep]
+        prominence_data = tuple(item[keep] for item in prominence_data)
+    if peaks.shape[0] == 0:
+        return peaks, {}
+
+    # 峰宽（半峰高 / 5%峰高 / 积分区间）
+    _, _, half_left, half_right = sp_signal.peak_widths(
+        corrected, peaks, rel_height=0.5, prominence_data=prominence_data
+    )
+    _, _, base_left, base_right = sp_signal.peak_widths(
+        corrected, peaks, rel_height=0.95, prominence_data=prominence_data
+    )
+    _, _, limit_left, limit_right = sp_signal.peak_widths(
+        corrected, peaks, rel_height=INTEGRATION_REL_HEIGHT, prominence_data=prominence_data
+    )
+
+    # 顶点位置：三点抛物线插值
+    inner = np.clip(peaks, 1, corrected.shape[0] - 2)
+    y0, y1, y2 = corrected[inner - 1], corrected[inner], corrected[inner + 1]
+    curvature = y0 - 2 * y1 + y2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        offset = np.where(curvature < 0, 0.5 * (y0 - y2) / curvature, 0.0)
+
+    return peaks, {
+        "height": prominence_data[0],
+        "half_left": half_left,
+        "half_right": half_right,
+        "base_left": base_left,
+        "base_right": base_right,
+        "left": limit_left,
+        "right": limit_right,
+        "apex": inner + np.clip(offset, -0.5, 0.5),
+    }
+
+
+def summarize_peaks(result: Dict, geometry: Dict[str, np.ndarray], areas: np.ndarray, time_at) -> Dict:
+    """
+    由峰的位置和面积计算色谱参数并填入结果
+
+    参数：
+        geometry: measure_peaks 的位置（积分区间已按谷点分割）
+        time_at: 小数下标 -> 时间（分钟）
+    """
+    retention = time_at(geometry["apex"])
+    w_half = time_at(geometry["half_right"]) - time_at(geometry["half_left"])
+    w_base = time_at(geometry["base_right"]) - time_at(geometry["base_left"])
+    front = retention - time_at(geometry["base_left"])
+    heights = geometry["height"]
+    total_area = float(areas.sum())
+
+    # 色谱参数
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plates = 5.54 * (retention / w_half) ** 2
+        tailing = np.where(front > 0, w_base / (2 * front), np.nan)
+        resolution = np.full(areas.shape[0], np.nan)
+        resolution[1:] = 1.18 * np.diff(retention) / (w_half[1:] + w_half[:-1])
+
+    start_times = time_at(geometry["left"])
+    end_times = time_at(geometry["right"])
+    main = int(np.argmax(areas))
+    percentages = areas / total_area * 100 if total_area > 0 else np.zeros_like(areas)
+    valid_resolution = resolution[np.isfinite(resolution)]
+
+    def clean(value: float, digits: int) -> Optional[float]:
+        return round(float(value), digits) if np.isfinite(value) else None
+
+    result.update({
+        "main_peak_retention_time": round(float(retention[main]), 3),
+        "main_peak_area": round(float(areas[main]), 4),
+        "total_area": round(total_area, 4),
+        "purity_percentage": round(float(percentages[main]), 2),
+        "average_resolution": round(float(valid_resolution.mean()), 3) if valid_resolution.size else 0.0,
+        "peaks": [
+            {
+                "retention_time": round(float(retention[i]), 4),
+                "height": round(float(heights[i]), 4),
+                "area": round(float(areas[i]), 4),
+                "percentage": round(float(percentages[i]), 2),
+                "start_time": round(float(start_times[i]), 4),
+                "end_time": round(float(end_times[i]), 4),
+                "width_half": round(float(w_half[i]), 5),
+                "resolution": clean(resolution[i], 3),
+                "plates": clean(plates[i], 0),
+                "tailing": clean(tailing[i], 3),
+            }
+            for i in range(areas.shape[0])
+        ],
+    })
+    return result
+
+
+def empty_result(n_points: int, run_time: float, noise: float, prominence: float) -> Dict:
+    return {
+        "num_peaks": 0,
+        "main_peak_retention_time": 0.0,
+        "main_peak_area": 0.0,
+        "total_area": 0.0,
+        "purity_percentage": 0.0,
+        "average_resolution": 0.0,
+        "peaks": [],
+        "points": n_points,
+        "run_time": round(run_time, 4),
+        "noise": noise,
+        "prominence_threshold": float(prominence),
+    }
+
+
+def default_prominence(noise: float, min_prominence: Optional[float]) -> float:
+    return min_prominence if min_prominence is not None else max(DEFAULT_PROMINENCE_SNR * noise, np.finfo(float).tiny)
+
+
+def analyze_trace(
+    times,
+    values,
+    baseline_window: Optional[float] = None,
+    min_prominence: Optional[float] = None,
+    min_height: Optional[float] = None,
+    min_width: Optional[float] = None,
+) -> Dict:
+    """
+    分析一条原始色谱信号
+
+    参数：
+        times: 时间（分钟），严格递增；可以是 np.memmap
+        values: 检测器响应值
+        baseline_window: 基线窗口（分钟），默认运行时长的5%；应明显宽于色谱峰
+        min_prominence: 最小峰突出度，默认噪声的10倍
+        min_height: 最小峰高（基线校正后）
+        min_width: 最小半峰宽（分钟）
+
+    返回：
+        与 analyze_chromatogram 兼容的汇总字段（num_peaks、main_peak_*、total_area、
+        purity_percentage、average_resolution），以及每个峰的详细参数和基线/噪声信息
+
+    异常：
+        ValueError: 输入不合法
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    _validate_trace(times, values)
+
+    n_points = values.shape[0]
+    run_time = float(times[-1] - times[0])
+    interval, window_points, factor = detection_settings(n_points, run_time, baseline_window)
+
+    # 1. 基线校正
+    baseline = estimate_baseline(values, window_points)
+    corrected = values - baseline
+
+    # 2-3. 噪声与峰检测
+    noise = estimate_noise(corrected)
+    prominence = default_prominence(noise, min_prominence)
+    envelope, envelope_index = block_envelope(corrected, factor) if factor > 1 else (corrected, None)
+    candidates = find_candidates(envelope, envelope_index, prominence, min_height, window_points, factor)
+
+    # 4. 峰宽与顶点
+    peaks, geometry = measure_peaks(corrected, candidates, window_points, interval, min_width)
+    result = empty_result(n_points, run_time, noise, prominence)
+    result["num_peaks"] = int(peaks.shape[0])
+    if peaks.shape[0] == 0:
+        return result
+
+    # 5. 积分
+    left, right = split_overlaps(corrected, peaks, geometry["left"], geometry["right"])
+    areas = interval_areas(corrected, times, left, right)
+
+    # 6. 色谱参数
+    return summarize_peaks(result, geometry, areas, lambda positions: _at(positions, times))
+
+
+# ============================================================================
+# 请求解码（在工作线程/进程中执行，大数组不经过事件循环）
+# ============================================================================
+
+TRACE_PARAMS = ("baseline_window", "min_prominence", "min_height", "min_width")
+
+
+def _optional_float(options: Dict, name: str) -> Optional[float]:
+    value = options.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} 必须是数值")
+
+
+def _trace_arrays(signal, times, options: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """signal + times，或 signal + sampling_interval/start_time"""
+    if signal is None:
+        raise ValueError("缺少 signal")
+    try:
+        values = np.asarray(signal, dtype=np.float64)
+        if times is not None:
+            return np.asarray(times, dtype=np.float64), values
+    except (TypeError, ValueError):
+        raise ValueError("signal 和 times 必须是数值数组")
+    interval = _optional_float(options, "sampling_interval")
+    if interval is None:
+        raise ValueError("需要提供 times 或 sampling_interval")
+    start_time = _optional_float(options, "start_time") or 0.0
+    return make_times(values.shape[0], interval, start_time), values
+
+
+def analyze_trace_payload(payload) -> Dict:
+    """JSON请求体（见 TraceAnalysisRequest）"""
+    if not isinstance(payload, dict):
+        raise ValueError("请求体必须是JSON对象")
+    times, values = _trace_arrays(payload.get("signal"), payload.get("times"), payload)
+    return analyze_trace(times, values, **{name: _optional_float(payload, name) for name in TRACE_PARAMS})
+
+
+def analyze_trace_json(body: bytes) -> Dict:
+    """原始JSON请求体：解析也在计算线程/进程中完成，数百万个数值不经过事件循环和进程间序列化"""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise ValueError("请求体不是有效的JSON")
+    return analyze_trace_payload(payload)
+
+
+def analyze_trace_binary(body: bytes) -> Dict:
+    """二进制数组请求体：列 signal（可选 time），其余参数在头部 meta 中"""
+    meta, arrays = decode_arrays(body)
+    times, values = _trace_arrays(arrays.get("signal"), arrays.get("time"), meta)
+    return analyze_trace(times, values, **{name: _optional_float(meta, name) for name in TRACE_PARAMS})
@@ -0,0 +1,239 @@
+"""
+试剂因子库
+
+评分请求原本需要为每个试剂提交完整的9个小因子和密度。试剂因子库把这些数据保存在数据库
+（reagents 表）中，并在内存中维护一个只读数组索引：
+- 每个试剂一行：S1…E3、密度、再生因子、处置因子
+- 按ID或名称（忽略大小写和多余空格）O(1) 查找，批量引用时用一次数组索引取出全部行
+- 数据库变更后整体重建索引并原子替换，读取方不需要加锁
+
+内置试剂与前端 defaultReagents.ts 中的预定义试剂一致，数据库为空时自动写入。
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app.core.logging_config import get_logger
+from app.database.connection import AsyncSessionLocal, AsyncReadSessionLocal
+from app.database.models import Reagent
+from app.services.batch_scoring import SUB_FACTOR_NAMES
+
+
+logger = get_logger("reagents")
+
+# 索引数组的列顺序
+LIBRARY_COLUMNS = SUB_FACTOR_NAMES + ["density", "regeneration", "disposal"]
+DENSITY_COLUMN = LIBRARY_COLUMNS.index("density")
+
+# 内置试剂：(名称, 密度, S1, S2, S3, S4, H1, H2, E1, E2, E3, 再生因子, 处置因子)
+BUILTIN_REAGENTS: List[Tuple] = [
+    ('Acetone', 0.784, 0.699, 1.0, 0.0, 0.297, 0.185, 0.625, 0.126, 0.185, 0.0, 0.25, 0.25),
+    ('Acetonitrile', 0.786, 0.612, 1.0, 0.6, 0.509, 0.431, 0.625, 0.346, 0.431, 0.0, 0.75, 0.5),
+    ('Chloroform', 1.48, 0.681, 0.0, 0.0, 0.393, 0.8, 0.625, 0.458, 0.8, 0.178, 0.75, 0.75),
+    ('CO2', 1.56, 1.0, 0.0, 0.0, 0.026, 0.0, 0.0, 0.0, 0.0, 0.0, 0.25, 0.0),
+    ('Dichloromethane', 1.327, 0.753, 1.0, 0.6, 0.264, 0.29, 0.349, 0.023, 0.29, 0.031, 0.75, 0.75),
+    ('Ethanol', 0.789, 0.579, 1.0, 0.0, 0.292, 0.205, 0.0, 0.282, 0.205, 0.0, 0.5, 0.25),
+    ('Ethyl acetate', 0.897, 0.628, 1.0, 0.0, 0.276, 0.168, 0.625, 0.026, 0.168, 0.003, 0.5, 0.25),
+    ('Heptane', 0.684, 0.557, 1.0, 0.0, 0.368, 0.157, 0.625, 0.43, 0.157, 0.5, 0.75, 0.5),
+    ('Hexane (n)', 0.661, 0.656, 1.0, 0.0, 0.343, 0.351, 0.625, 0.429, 0.351, 0.325, 0.75, 0.5),
+    ('Isooctane', 0.69, 0.63, 1.0, 0.0, 0.0, 0.0, 0.33, 0.68, 0.0, 0.875, 0.75, 0.5),
+    ('Isopropanol', 0.786, 0.565, 1.0, 0.0, 0.317, 0.261, 0.625, 0.282, 0.261, 0.0, 0.5, 0.5),
+    ('Methanol', 0.791, 0.625, 1.0, 0.0, 0.266, 0.316, 0.113, 0.0, 0.316, 0.0, 0.5, 0.5),
+    ('Sulfuric acid 96%', 1.84, 0.0, 0.0, 0.8, 0.946, 1.0, 1.0, 0.485, 1.0, 0.5, 1.0, 0.75),
+    ('t-butyl methyl ether', 0.74, 0.716, 1.0, 0.0, 0.0, 0.349, 0.22, 0.716, 0.349, 0.125, 0.75, 0.5),
+    ('Tetrahydrofuran(THF)', 0.889, 0.68, 1.0, 0.6, 0.297, 0.366, 0.625, 0.536, 0.366, 0.0, 0.75, 0.75),
+    ('Water', 1.0, 0.552, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+    ('Formic Acid', 1.22, 0.549, 0.0, 0.0, 0.802, 0.605, 1.0, 0.306, 0.605, 0.125, 0.5, 0.75),
+    ('Ammonium Acetate', 1.17, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.75, 1.0),
+    ('Diethyl Ether', 0.714, 0.785, 1.0, 0.6, 0.3, 0.183, 0.113, 0.666, 0.183, 0.0, 0.75, 0.75),
+    ('Triethylamine(TEA)', 0.726, 0.589, 1.0, 0.0, 0.511, 1.0, 1.0, 0.378, 1.0, 0.125, 0.75, 0.75),
+    ('Potassium dihydrogen phosphate', 1.88, 0.0, 0.0, 0.0, 0.0, 0.0, 0.625, 0.0, 0.0, 0.0, 1.0, 1.0),
+    ('Sodium Hydroxide', 2.13, 0.0, 0.0, 0.8, 0.99, 1.0, 1.0, 0.0, 1.0, 0.5, 1.0, 1.0),
+    ('Hydrochloric Acid', 1.18, 1.0, 0.0, 0.8, 0.772, 1.0, 1.0, 0.485, 1.0, 0.5, 1.0, 0.75),
+    ('Ammonium Carbonate', 1.5, 0.0, 0.0, 0.6, 0.015, 0.0, 0.625, 0.0, 0.0, 0.125, 0.75, 1.0),
+    ('Ammonium hydroxide', 0.89, 0.759, 0.0, 0.0, 0.66, 1.0, 1.0, 0.0, 1.0, 0.5, 0.75, 0.75),
+    ('Dipotassium hydrogen phosphate', 2.44, 0.0, 0.0, 0.0, 0.0, 0.0, 0.625, 0.0, 0.0, 0.0, 1.0, 1.0),
+    ('Sodium phosphate dibasic', 1.064, 0.0, 0.0, 0.0, 0.0, 0.0, 0.625, 0.0, 0.0, 0.0, 1.0, 1.0),
+    ('Sodium Dihydrogen Phosphate', 1.91, 0.0, 0.0, 0.0, 0.0, 0.0, 0.625, 0.0, 0.0, 0.0, 1.0, 1.0),
+    ('Trifluoroacetic Acid(TFA)', 1.49, 0.644, 0.0, 0.0, 0.24, 1.0, 1.0, 0.187, 1.0, 0.131, 1.0, 1.0),
+    ('Acetic Acid', 1.049, 0.492, 0.5, 0.0, 0.718, 1.0, 1.0, 0.247, 1.0, 0.002, 0.5, 0.75),
+    ('Difluoroacetic Acid(DFA)', 1.526, 0.439, 0.0, 0.0, 0.31, 1.0, 1.0, 0.026, 1.0, 0.131, 1.0, 1.0),
+    ('Phosphoric Acid', 1.685, 0.485, 0.0, 0.0, 0.49, 1.0, 1.0, 0.485, 1.0, 0.5, 1.0, 1.0),
+    ('Heptafluorobutyric Acid(HFBA)', 1.645, 0.359, 0.0, 0.0, 0.31, 1.0, 1.0, 0.026, 1.0, 0.131, 1.0, 1.0),
+    ('Ammonium Formate', 1.26, 0.0, 0.0, 0.0, 0.0, 0.0, 0.625, 0.0, 0.0, 0.0, 0.75, 1.0),
+    ('Ammonium Bicarbonate', 1.586, 0.0, 0.0, 0.0, 0.045, 0.0, 0.113, 0.0, 0.0, 0.125, 0.75, 1.0),
+    ('Sodium Heptanesulfonate', 1.017, 0.0, 0.0, 0.0, 0.0, 0.0, 0.625, 0.0, 0.0, 0.001, 1.0, 1.0),
+    ('Sodium Dodecyl Sulfate(SDS)', 1.03, 0.0, 0.0, 0.0, 0.092, 0.0, 0.625, 0.0, 0.0, 0.125, 1.0, 1.0),
+    ('Tetrabutylammonium Hydroxide', 0.995, 0.0, 0.0, 0.0, 0.31, 1.0, 1.0, 0.0, 1.0, 0.125, 1.0, 1.0),
+    ('Sodium Perchlorate', 2.02, 0.0, 1.0, 0.8, 0.0, 0.0, 0.625, 0.0, 0.0, 0.125, 1.0, 1.0),
+]
+
+ReagentRef = Union[int, str]
+
+
+def normalize_reagent_key(name: str) -> str:
+    """名称规范化：去掉首尾空格、合并连续空白、忽略大小写"""
+    return " ".join(str(name).split()).casefold()
+
+
+@dataclass(frozen=True)
+class ReagentIndex:
+    """试剂因子的只读数组索引"""
+    ids: Tuple[Optional[int], ...]
+    names: Tuple[str, ...]
+    matrix: np.ndarray  # (试剂数, len(LIBRARY_COLUMNS))
+    _rows: Dict[str, int] = field(repr=False)
+
+    @classmethod
+    def build(cls, entries: Sequence[Tuple[Optional[int], str, Sequence[float]]]) -> "ReagentIndex":
+        """由 (ID, 名称, 按 LIBRARY_COLUMNS 顺序的数值) 构建索引"""
+        ids = tuple(entry[0] for entry in entries)
+        names = tuple(entry[1] for entry in entries)
+        matrix = np.array([entry[2] for entry in entries], dtype=np.float64).reshape(-1, len(LIBRARY_COLUMNS))
+        matrix.setflags(write=False)
+
+        rows: Dict[str, int] = {}
+        for row, (reagent_id, name) in enumerate(zip(ids, names)):
+            rows[normalize_reagent_key(name)] = row
+            if reagent_id is not None:
+                rows[f"#{reagent_id}"] = row
+        return cls(ids, names, matrix, rows)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def row_of(self, ref: ReagentRef) -> int:
+        """
+        查找试剂所在行
+
+        参数：
+            ref: 试剂ID（int 或纯数字字符串）或名称
+
+        异常：
+            ValueError: 试剂不在库中
+        """
+        if isinstance(ref, int) or (isinstance(ref, str) and ref.strip().isdigit()):
+            row = self._rows.get(f"#{int(ref)}")
+            if row is not None:
+                return row
+        row = self._rows.get(normalize_reagent_key(ref))
+        if row is None:
+            raise ValueError(f"试剂库中没有试剂：{ref}")
+        return row
+
+    def find_name(self, name: str) -> Optional[int]:
+        """按名称查找（不按ID），不存在时返回None"""
+        return self._rows.get(normalize_reagent_key(name))
+
+    def rows_of(self, refs: Iterable[ReagentRef]) -> np.ndarray:
+        return np.array([self.row_of(ref) for ref in refs], dtype=np.intp)
+
+    def record(self, row: int) -> Dict:
+        return {
+            "id": self.ids[row],
+            "name": self.names[row],
+            **dict(zip(LIBRARY_COLUMNS, self.matrix[row].tolist())),
+        }
+
+
+def _stage_from_library(
+    index: ReagentIndex,
+    refs: Sequence[ReagentRef],
+    density_overrides: Optional[Dict[str, float]]
+) -> Tuple[List[str], Dict[str, float], Dict[str, Dict[str, float]]]:
+    """一个阶段的试剂：规范名称、密度（可被请求覆盖）、小因子矩阵"""
+    rows = index.rows_of(refs)
+    block = index.matrix[rows]
+    names = [index.names[row] for row in rows]
+    densities = dict(zip(names, block[:, DENSITY_COLUMN].tolist()))
+    for ref, density in (density_overrides or {}).items():
+        densities[index.names[index.row_of(ref)]] = density
+    factors = {
+        name: dict(zip(SUB_FACTOR_NAMES, values))
+        for name, values in zip(names, block[:, :len(SUB_FACTOR_NAMES)].tolist())
+    }
+    return names, densities, factors
+
+
+def resolve_method_reagents(
+    index: ReagentIndex,
+    composition: Dict[str, List[float]],
+    prep_volumes: Dict[str, float],
+    instrument_densities: Optional[Dict[str, float]] = None,
+    prep_densities: Optional[Dict[str, float]] = None
+) -> Dict:
+    """
+    把按ID/名称引用试剂的方法数据展开为 calculate_full_scores 的试剂相关参数
+    （结果中的试剂统一使用库中的名称）
+
+    异常：
+        ValueError: 试剂不在库中，或同一试剂被重复引用
+    """
+    inst_names, inst_densities, inst_factors = _stage_from_library(
+        index, list(composition), instrument_densities
+    )
+    prep_names, prep_density_map, prep_factors = _stage_from_library(
+        index, list(prep_volumes), prep_densities
+    )
+    for stage_names, label in ((inst_names, "仪器分析"), (prep_names, "前处理")):
+        if len(set(stage_names)) != len(stage_names):
+            raise ValueError(f"{label}阶段重复引用了同一试剂")
+
+    return {
+        "instrument_composition": dict(zip(inst_names, composition.values())),
+        "instrument_densities": inst_densities,
+        "instrument_factor_matrix": inst_factors,
+        "prep_volumes": dict(zip(prep_names, prep_volumes.values())),
+        "prep_densities": prep_density_map,
+        "prep_factor_matrix": prep_factors,
+    }
+
+
+def reagent_values(reagent: Reagent) -> List[float]:
+    return [float(getattr(reagent, column) or 0.0) for column in LIBRARY_COLUMNS]
+
+
+class ReagentLibrary:
+    """试剂因子库（数据库 + 内存索引）"""
+
+    def __init__(self, session_factory=AsyncSessionLocal, read_session_factory=None):
+        self.session_factory = session_factory
+        # 重建索引走只读连接：增删改路由调用 reload 时请求自身的写会话可能仍占着唯一的写连接
+        self.read_session_factory = read_session_factory or session_factory
+        # 数据库加载之前使用内置试剂（无ID），保证离线脚本和测试也能按名称引用
+        self.index = ReagentIndex.build([(None, entry[0], entry[1:]) for entry in _builtin_rows()])
+
+    def contains(self, name: str, exclude_id: Optional[int] = None) -> bool:
+        """名称（规范化后）是否已被其他试剂使用"""
+        row = self.index.find_name(name)
+        return row is not None and self.index.ids[row] != exclude_id
+
+    async def load(self):
+        """写入缺失的内置试剂（仅在表为空时），并从数据库重建索引"""
+        async with self.session_factory() as db:
+            count = await db.scalar(select(func.count()).select_from(Reagent))
+            if not count:
+                db.add_all(
+                    Reagent(name=name, is_builtin=True, **dict(zip(LIBRARY_COLUMNS, values)))
+                    for name, *values in _builtin_rows()
+                )
+                await db.commit()
+                logger.info("已写入 %d 个内置试剂", len(BUILTIN_REAGENTS))
+        await self.reload()
+
+    async def reload(self):
+        async with self.read_session_factory() as db:
+            reagents = (await db.execute(select(Reagent).order_by(Reagent.id))).scalars().all()
+        self.index = ReagentIndex.build([(r.id, r.name, reagent_values(r)) for r in reagents])
+
+
+def _builtin_rows() -> List[Tuple]:
+    """内置试剂按 (名称, *LIBRARY_COLUMNS) 的顺序"""
+    return [(name, *factors, density, regeneration, disposal)
+            for name, density, *factors, regeneration, disposal in BUILTIN_REAGENTS]
+
+
+# 全局试剂因子库
+reagent_library = ReagentLibrary(read_session_factory=AsyncReadSessionLocal)
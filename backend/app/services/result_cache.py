@@ -0,0 +1,165 @@
+"""
+评分结果缓存模块
+
+以请求内容的规范化哈希为键缓存 calculate_full_scores 的结果：
+- 试剂按名称排序，数值统一为float（1 与 1.0 视为相同）
+- 数值及数值列表汇总为一个float64数组一次写入哈希，计算键的开销低于评分本身
+- 权重方案和自定义权重都参与哈希
+- 超过容量上限时淘汰最久未使用的条目
+- 计算量超过 SCORE_CACHE_MAX_COST 的请求不走缓存：此时计算键和复制结果的开销
+  已接近重新评分（见 benchmarks/bench_scoring.py 的 cache.* 基准）
+"""
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services import scoring_service
+
+
+def _flatten(value: Any, tokens: List[str], numbers: List[float]):
+    """
+    把值展开为结构标记和数值序列：字典按键排序，数值（包括数值列表）只在结构中留下占位符，
+    实际数值按出现顺序收集，最后一次性转为float64数组写入哈希
+    """
+    if isinstance(value, dict):
+        tokens.append("{%d" % len(value))
+        for key, item in sorted(value.items(), key=lambda entry: str(entry[0])):
+            tokens.append(repr(str(key)))
+            if type(item) is float:  # 小因子等标量值直接收集，不再递归
+                tokens.append("#")
+                numbers.append(item)
+            else:
+                _flatten(item, tokens, numbers)
+        tokens.append("}")
+    elif isinstance(value, (list, tuple)):
+        first = value[0] if value else None
+        if isinstance(first, (int, float)) and not isinstance(first, bool):
+            tokens.append("#%d" % len(value))
+            numbers.extend(value)
+        elif isinstance(first, (dict, list, tuple)):
+            tokens.append("[%d" % len(value))
+            for item in value:
+                _flatten(item, tokens, numbers)
+        else:
+            tokens.append("[" + repr(list(value)))
+    elif isinstance(value, bool) or value is None or isinstance(value, str):
+        tokens.append(repr(value))
+    elif isinstance(value, (int, float)):
+        tokens.append("#")
+        numbers.append(value)
+    else:
+        tokens.append(repr(value))
+
+
+def make_cache_key(scoring_kwargs: Dict) -> str:
+    """
+    计算评分请求的规范化哈希
+
+    参数：
+        scoring_kwargs: calculate_full_scores 的关键字参数
+
+    返回：
+        str: SHA-256 十六进制摘要
+    """
+    tokens: List[str] = []
+    numbers: List[float] = []
+    _flatten(scoring_kwargs, tokens, numbers)
+    digest = hashlib.sha256("\x00".join(tokens).encode("utf-8"))
+    try:
+        values = np.array(numbers, dtype=np.float64)
+    except (TypeError, ValueError):
+        # 数值列表中混有其他类型：逐个按repr写入
+        values = None
+        digest.update(repr(numbers).encode("utf-8"))
+    if values is not None:
+        digest.update((values + 0.0).tobytes())  # -0.0 视为 0.0
+    return digest.hexdigest()
+
+
+class ScoreResultCache:
+    """线程安全的LRU评分结果缓存"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        """命中时返回结果副本（调用方可以自由修改）"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return copy.deepcopy(result)
+
+    def put(self, key: str, result: Dict):
+        if self.max_entries <= 0:
+            return
+        stored = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """
+        使缓存失效
+
+        参数：
+            key: 指定条目的键；为None时清空全部缓存
+
+        返回：
+            int: 被移除的条目数
+        """
+        with self._lock:
+            if key is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            return 1 if self._entries.pop(key, None) is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# 全局评分结果缓存实例
+score_cache = ScoreResultCache(max_entries=settings.SCORE_CACHE_MAX_ENTRIES)
+
+
+def cached_full_scores(scoring_kwargs: Dict, cache: Optional[ScoreResultCache] = None) -> Tuple[Dict, bool]:
+    """
+    带缓存的完整评分（在工作线程中执行：计算键、查找、评分和写入都不占用事件循环）
+
+    返回：
+        (评分结果, 是否命中缓存)
+    """
+    cache = score_cache if cache is None else cache
+    cache_key = make_cache_key(scoring_kwargs)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached, True
+    result = scoring_service.calculate_full_scores(**scoring_kwargs)
+    cache.put(cache_key, result)
+    return result, False
@@ -12,8 +12,17 @@ Layer 5: 最终总分（Score₃）
 """
 
 from typing import Dict, List, Tuple, Optional
+import logging
 import math
 
+import numpy as np
+
+from app.core.logging_config import get_logger, timed
+from app.services.weight_registry import WeightSchemeRegistry
+
+
+logger = get_logger("scoring")
+
 
 # ============================================================================
 # 权重配置常量（12种方案）
@@ -69,10 +78,79 @@ PREPARATION_STAGE_WEIGHTS = {
 }
 
 
+# ============================================================================
+# 权重方案注册表（启动时编译为固定顺序的权重向量）
+# ============================================================================
+
+# 大因子类型 -> 权重类别
+MAJOR_FACTOR_CATEGORIES = {"S": "safety", "H": "health", "E": "environment"}
+
+# custom_weights 的键 -> 权重类别（阶段权重 "stage" 同时用于仪器分析和前处理）
+CUSTOM_WEIGHT_CATEGORIES = {
+    "safety": ["safety"],
+    "health": ["health"],
+    "environment": ["environment"],
+    "stage": ["instrument_stage", "prep_stage"],
+    "final": ["final"]
+}
+
+scheme_registry = WeightSchemeRegistry()
+scheme_registry.register_category("safety", ["S1", "S2", "S3", "S4"], "安全因子", SAFETY_WEIGHTS)
+scheme_registry.register_category("health", ["H1", "H2"], "健康因子", HEALTH_WEIGHTS)
+scheme_registry.register_category("environment", ["E1", "E2", "E3"], "环境因子", ENVIRONMENT_WEIGHTS)
+# 键顺序即 Score₁/Score₂ 的求和顺序
+scheme_registry.register_category("instrument_stage", ["S", "H", "E", "P", "R", "D"], "仪器阶段", INSTRUMENT_STAGE_WEIGHTS)
+scheme_registry.register_category("prep_stage", ["S", "H", "E", "R", "D", "P"], "前处理阶段", PREPARATION_STAGE_WEIGHTS)
+scheme_registry.register_category("final", ["instrument", "preparation"], "最终", FINAL_WEIGHTS)
+
+
+def validate_custom_weights(custom_weights: Optional[Dict[str, Dict[str, float]]]):
+    """
+    校验并预编译请求中的全部自定义权重（完整性、非负、总和为1）
+    
+    异常：
+        ValueError: 未知的自定义权重类别或权重不合法
+    """
+    for key, weights in (custom_weights or {}).items():
+        if key not in CUSTOM_WEIGHT_CATEGORIES:
+            raise ValueError(f"未知的自定义权重类别：{key}")
+        for category in CUSTOM_WEIGHT_CATEGORIES[key]:
+            scheme_registry.compile_custom(category, weights)
+
+
 # ============================================================================
 # Layer 0: 质量计算函数
 # ============================================================================
 
+# 各曲线类型从0到1的积分系数 ∫[0→1] f(u) du
+CURVE_INTEGRAL_FACTORS = {
+    # 线性曲线: f(u) = u, 积分 = 0.5
+    'linear': 0.5,
+    'initial': 0.5,
+    None: 0.5,
+    
+    # Pre-step: f(u) = 1, 积分 = 1
+    'pre-step': 1.0,
+    
+    # Post-step: f(u) = 0, 积分 = 0
+    'post-step': 0.0,
+    
+    # Convex curves: f(u) = 1 - (1-u)^n
+    # ∫[0→1] [1 - (1-u)^n] du = 1 - 1/(n+1) = n/(n+1)
+    'weak-convex': 2.0 / 3.0,    # n=2, 0.6667
+    'medium-convex': 3.0 / 4.0,  # n=3, 0.75
+    'strong-convex': 4.0 / 5.0,  # n=4, 0.8
+    'ultra-convex': 6.0 / 7.0,   # n=6, 0.8571
+    
+    # Concave curves: f(u) = u^n
+    # ∫[0→1] u^n du = 1/(n+1)
+    'weak-concave': 1.0 / 3.0,   # n=2, 0.3333
+    'medium-concave': 1.0 / 4.0, # n=3, 0.25
+    'strong-concave': 1.0 / 5.0, # n=4, 0.2
+    'ultra-concave': 1.0 / 7.0,  # n=6, 0.1429
+}
+
+
 def calculate_curve_integral_factor(curve_type: str) -> float:
     """
     计算不同曲线类型从0到1的积分系数
@@ -80,7 +158,7 @@ def calculate_curve_integral_factor(curve_type: str) -> float:
     对于曲线 y(t) = y0 + (y1-y0) * f(t/T)，积分 ∫[0→T] y(t) dt
     = y0*T + (y1-y0) * T * ∫[0→1] f(u) du
     
-    返回 ∫[0→1] f(u) du 的值
+    返回 ∫[0→1] f(u) du 的值（未知类型按线性处理）
     
     参数：
         curve_type: 曲线类型字符串
@@ -88,43 +166,27 @@ def calculate_curve_integral_factor(curve_type: str) -> float:
     返回：
         float: 积分系数（0-1之间）
     """
-    # 线性曲线: f(u) = u, 积分 = 0.5
-    if curve_type in ['linear', 'initial', None]:
-        return 0.5
-    
-    # Pre-step: f(u) = 1, 积分 = 1
-    elif curve_type == 'pre-step':
-        return 1.0
-    
-    # Post-step: f(u) = 0, 积分 = 0
-    elif curve_type == 'post-step':
-        return 0.0
+    return CURVE_INTEGRAL_FACTORS.get(curve_type, 0.5)
+
+
+def segment_integral_factors(curve_types: Optional[List[str]], num_points: int) -> np.ndarray:
+    """
+    一次性查表得到每个梯度段的积分系数
     
-    # Convex curves: f(u) = 1 - (1-u)^n
-    # ∫[0→1] [1 - (1-u)^n] du = 1 - 1/(n+1) = n/(n+1)
-    elif curve_type == 'weak-convex':    # n=2
-        return 2.0 / 3.0  # 0.6667
-    elif curve_type == 'medium-convex':  # n=3
-        return 3.0 / 4.0  # 0.75
-    elif curve_type == 'strong-convex':  # n=4
-        return 4.0 / 5.0  # 0.8
-    elif curve_type == 'ultra-convex':   # n=6
-        return 6.0 / 7.0  # 0.8571
+    第i段（time_points[i] → time_points[i+1]）使用目标时间点的曲线类型 curve_types[i+1]，
+    缺失时按线性处理。
     
-    # Concave curves: f(u) = u^n
-    # ∫[0→1] u^n du = 1/(n+1)
-    elif curve_type == 'weak-concave':   # n=2
-        return 1.0 / 3.0  # 0.3333
-    elif curve_type == 'medium-concave': # n=3
-        return 1.0 / 4.0  # 0.25
-    elif curve_type == 'strong-concave': # n=4
-        return 1.0 / 5.0  # 0.2
-    elif curve_type == 'ultra-concave':  # n=6
-        return 1.0 / 7.0  # 0.1429
-    
-    # 默认使用线性
-    else:
-        return 0.5
+    返回：
+        np.ndarray: 形状 (num_points-1,) 的积分系数
+    """
+    curve_types = curve_types or []
+    return np.array(
+        [
+            CURVE_INTEGRAL_FACTORS.get(curve_types[i], 0.5) if i < len(curve_types) else 0.5
+            for i in range(1, num_points)
+        ],
+        dtype=np.float64
+    )
 
 
 def calculate_gradient_integral(
@@ -137,6 +199,11 @@ def calculate_gradient_integral(
     """
     计算梯度洗脱流动相的总质量（支持11种曲线类型的精确积分）
     
+    对全部试剂×全部时间段一次性做数组运算：
+        平均比例 = p1 + (p2-p1) × 积分系数
+        每段质量 = 流速 × dt × 平均比例 × 密度
+    各段质量按时间顺序累加（cumsum），与逐段循环的结果逐位一致。
+    
     参数：
         time_points: 时间点列表（分钟），如 [0, 5, 15, 20]
         composition_data: 各试剂的组成百分比，如 {"MeOH": [10, 50, 95, 95], "H2O": [90, 50, 5, 5]}
@@ -148,53 +215,39 @@ def calculate_gradient_integral(
     返回：
         Dict[str, float]: 各试剂的总质量（克），如 {"MeOH": 123.45, "H2O": 234.56}
     """
-    reagent_masses = {}
+    reagents = list(composition_data.keys())
+    num_points = len(time_points)
     
-    # 如果没有提供曲线类型，默认全部使用线性
-    if curve_types is None:
-        curve_types = ['linear'] * len(time_points)
-    
-    for reagent, percentages in composition_data.items():
+    for reagent in reagents:
         if reagent not in reagent_densities:
             raise ValueError(f"缺少试剂 {reagent} 的密度数据")
-        
-        density = reagent_densities[reagent]
-        total_mass = 0.0
-        
-        # 对每个时间段进行积分
-        for i in range(len(time_points) - 1):
-            t1, t2 = time_points[i], time_points[i + 1]
-            p1, p2 = percentages[i] / 100.0, percentages[i + 1] / 100.0  # 转换为小数
-            
-            # 获取该段的曲线类型（使用目标时间点的曲线类型）
-            curve_type = curve_types[i + 1] if i + 1 < len(curve_types) else 'linear'
-            
-            # 计算该曲线的积分系数
-            integral_factor = calculate_curve_integral_factor(curve_type)
-            
-            # 该时间段的时长
-            dt = t2 - t1
-            
-            # 该时间段的体积（mL）
-            volume_segment = flow_rate * dt
-            
-            # 该时间段该试剂的平均百分比（考虑曲线类型）
-            # y(t) = p1 + (p2-p1) * f(t/T)
-            # 积分 = p1*T + (p2-p1) * T * integral_factor
-            # 平均值 = (p1*T + (p2-p1)*T*factor) / T = p1 + (p2-p1)*factor
-            avg_percentage = p1 + (p2 - p1) * integral_factor
-            
-            # 该时间段该试剂的体积（mL）
-            reagent_volume = volume_segment * avg_percentage
-            
-            # 该时间段该试剂的质量（g）
-            reagent_mass = reagent_volume * density
-            
-            total_mass += reagent_mass
-        
-        reagent_masses[reagent] = total_mass
+        if len(composition_data[reagent]) < num_points:
+            raise ValueError(f"试剂 {reagent} 的组成数据点数少于梯度时间点数")
     
-    return reagent_masses
+    if not reagents or num_points < 2:
+        return {reagent: 0.0 for reagent in reagents}
+    
+    # (试剂数, 时间点数) 组成矩阵，转换为小数
+    fractions = np.array(
+        [composition_data[reagent][:num_points] for reagent in reagents],
+        dtype=np.float64
+    ) / 100.0
+    densities = np.array([reagent_densities[reagent] for reagent in reagents], dtype=np.float64)
+    
+    times = np.asarray(time_points, dtype=np.float64)
+    volume_segment = flow_rate * (times[1:] - times[:-1])  # 每段体积（mL）
+    integral_factors = segment_integral_factors(curve_types, num_points)
+    
+    # y(t) = p1 + (p2-p1) * f(t/T)，平均值 = p1 + (p2-p1) * factor
+    p1 = fractions[:, :-1]
+    p2 = fractions[:, 1:]
+    avg_percentage = p1 + (p2 - p1) * integral_factors
+    
+    # 每段每个试剂的质量（g）= 体积 × 平均比例 × 密度
+    segment_masses = volume_segment * avg_percentage * densities[:, None]
+    total_masses = np.cumsum(segment_masses, axis=1)[:, -1]
+    
+    return dict(zip(reagents, total_masses.tolist()))
 
 
 def calculate_prep_masses(
@@ -330,12 +383,7 @@ def merge_sub_factors(
     返回：
         Dict[str, float]: 合成后的9个小因子得分（用于雷达图）
     """
-    if final_weight_scheme not in FINAL_WEIGHTS:
-        raise ValueError(f"未知的最终权重方案：{final_weight_scheme}")
-    
-    weights = FINAL_WEIGHTS[final_weight_scheme]
-    w_inst = weights["instrument"]
-    w_prep = weights["preparation"]
+    w_inst, w_prep = scheme_registry.get("final", final_weight_scheme).vector
     
     merged_scores = {}
     sub_factor_names = ["S1", "S2", "S3", "S4", "H1", "H2", "E1", "E2", "E3"]
@@ -372,47 +420,13 @@ def calculate_major_factor(
     返回：
         float: 大因子得分（0-100）
     """
-    # 如果是Custom方案，使用自定义权重
-    if weight_scheme == "Custom":
-        if custom_weights is None:
-            raise ValueError(f"Custom权重方案需要提供custom_weights参数")
-        weights = custom_weights
-        if major_factor_type == "S":
-            sub_factors = ["S1", "S2", "S3", "S4"]
-        elif major_factor_type == "H":
-            sub_factors = ["H1", "H2"]
-        elif major_factor_type == "E":
-            sub_factors = ["E1", "E2", "E3"]
-        else:
-            raise ValueError(f"未知的大因子类型：{major_factor_type}")
-    else:
-        # 使用预定义权重方案
-        if major_factor_type == "S":
-            if weight_scheme not in SAFETY_WEIGHTS:
-                raise ValueError(f"未知的安全因子权重方案：{weight_scheme}")
-            weights = SAFETY_WEIGHTS[weight_scheme]
-            sub_factors = ["S1", "S2", "S3", "S4"]
-        
-        elif major_factor_type == "H":
-            if weight_scheme not in HEALTH_WEIGHTS:
-                raise ValueError(f"未知的健康因子权重方案：{weight_scheme}")
-            weights = HEALTH_WEIGHTS[weight_scheme]
-            sub_factors = ["H1", "H2"]
-        
-        elif major_factor_type == "E":
-            if weight_scheme not in ENVIRONMENT_WEIGHTS:
-                raise ValueError(f"未知的环境因子权重方案：{weight_scheme}")
-            weights = ENVIRONMENT_WEIGHTS[weight_scheme]
-            sub_factors = ["E1", "E2", "E3"]
-        
-        else:
-            raise ValueError(f"未知的大因子类型：{major_factor_type}")
+    if major_factor_type not in MAJOR_FACTOR_CATEGORIES:
+        raise ValueError(f"未知的大因子类型：{major_factor_type}")
+    
+    scheme = scheme_registry.resolve(MAJOR_FACTOR_CATEGORIES[major_factor_type], weight_scheme, custom_weights)
     
     # 加权求和
-    major_score = sum(
-        sub_factor_scores.get(sub, 0.0) * weights[sub]
-        for sub in sub_factors
-    )
+    major_score = scheme.dot([sub_factor_scores.get(sub, 0.0) for sub in scheme.keys])
     
     return major_score
 
@@ -443,24 +457,11 @@ def calculate_score1(
     返回：
         float: Score₁（0-100）
     """
-    # 如果是Custom方案，使用自定义权重
-    if weight_scheme == "Custom":
-        if custom_weights is None:
-            raise ValueError(f"Custom权重方案需要提供custom_weights参数")
-        weights = custom_weights
-    else:
-        if weight_scheme not in INSTRUMENT_STAGE_WEIGHTS:
-            raise ValueError(f"未知的仪器阶段权重方案：{weight_scheme}")
-        weights = INSTRUMENT_STAGE_WEIGHTS[weight_scheme]
-    
-    score1 = (
-        major_factors["S"] * weights["S"] +
-        major_factors["H"] * weights["H"] +
-        major_factors["E"] * weights["E"] +
-        p_factor * weights["P"] +
-        r_factor * weights["R"] +
-        d_factor * weights["D"]
-    )
+    scheme = scheme_registry.resolve("instrument_stage", weight_scheme, custom_weights)
+    
+    factors = {"S": major_factors["S"], "H": major_factors["H"], "E": major_factors["E"],
+               "P": p_factor, "R": r_factor, "D": d_factor}
+    score1 = scheme.dot([factors[k] for k in scheme.keys])
     
     return score1
 
@@ -487,24 +488,11 @@ def calculate_score2(
     返回：
         float: Score₂（0-100）
     """
-    # 如果是Custom方案，使用自定义权重
-    if weight_scheme == "Custom":
-        if custom_weights is None:
-            raise ValueError(f"Custom权重方案需要提供custom_weights参数")
-        weights = custom_weights
-    else:
-        if weight_scheme not in PREPARATION_STAGE_WEIGHTS:
-            raise ValueError(f"未知的前处理阶段权重方案：{weight_scheme}")
-        weights = PREPARATION_STAGE_WEIGHTS[weight_scheme]
-    
-    score2 = (
-        major_factors["S"] * weights["S"] +
-        major_factors["H"] * weights["H"] +
-        major_factors["E"] * weights["E"] +
-        r_factor * weights["R"] +
-        d_factor * weights["D"] +
-        p_factor * weights["P"]
-    )
+    scheme = scheme_registry.resolve("prep_stage", weight_scheme, custom_weights)
+    
+    factors = {"S": major_factors["S"], "H": major_factors["H"], "E": major_factors["E"],
+               "R": r_factor, "D": d_factor, "P": p_factor}
+    score2 = scheme.dot([factors[k] for k in scheme.keys])
     
     return score2
 
@@ -533,17 +521,9 @@ def calculate_score3(
     返回：
         float: Score₃（0-100）
     """
-    # 如果是Custom方案，使用自定义权重
-    if weight_scheme == "Custom":
-        if custom_weights is None:
-            raise ValueError(f"Custom权重方案需要提供custom_weights参数")
-        weights = custom_weights
-    else:
-        if weight_scheme not in FINAL_WEIGHTS:
-            raise ValueError(f"未知的最终权重方案：{weight_scheme}")
-        weights = FINAL_WEIGHTS[weight_scheme]
+    scheme = scheme_registry.resolve("final", weight_scheme, custom_weights)
     
-    score3 = (score1 * weights["instrument"]) + (score2 * weights["preparation"])
+    score3 = scheme.dot([score1, score2])
     
     return score3
 
@@ -608,132 +588,145 @@ def calculate_full_scores(
         }
     }
     """
-    # 打印接收到的P/R/D因子和权重方案
-    print("\n" + "=" * 80)
-    print("🎯 评分计算开始")
-    print(f"🔬 仪器分析阶段:")
-    print(f"   ⚡ P因子 (能耗): {p_factor:.2f}")
-    print(f"   ♻️ R因子 (可回收性): {instrument_r_factor:.2f}")
-    print(f"   🗑️ D因子 (可降解性): {instrument_d_factor:.2f}")
-    print(f"🧪 前处理阶段:")
-    print(f"   ⚡ P因子 (能耗): {pretreatment_p_factor:.2f}")
-    print(f"   ♻️ R因子 (可回收性): {pretreatment_r_factor:.2f}")
-    print(f"   🗑️ D因子 (可降解性): {pretreatment_d_factor:.2f}")
-    print(f"📋 权重方案:")
-    print(f"  - Safety: {safety_scheme}")
-    print(f"  - Health: {health_scheme}")
-    print(f"  - Environment: {environment_scheme}")
-    print(f"  - Instrument Stage: {instrument_stage_scheme}")
-    print(f"  - Prep Stage: {prep_stage_scheme}")
-    print(f"  - Final: {final_scheme}")
-    print(f"🎯 自定义权重 (custom_weights): {custom_weights}")
-    print("=" * 80 + "\n")
-    
-    # ========== 仪器分析阶段 ==========
-    
-    # Layer 0: 计算质量
-    inst_masses = calculate_gradient_integral(
-        instrument_time_points,
-        instrument_composition,
-        instrument_flow_rate,
-        instrument_densities,
-        instrument_curve_types  # 传递曲线类型
-    )
-    
-    print(f"🔍 仪器分析质量计算结果: {inst_masses}")
-    
-    # Layer 1: 小因子归一化（使用新公式）
-    inst_sub_scores = calculate_all_sub_factors(inst_masses, instrument_factor_matrix)
-    
-    print(f"🔍 仪器分析小因子得分: {inst_sub_scores}")
-    
-    # Layer 3: 大因子合成
-    inst_major_S = calculate_major_factor(
-        inst_sub_scores, "S", safety_scheme, 
-        custom_weights=custom_weights.get('safety') if custom_weights and safety_scheme == 'Custom' else None
-    )
-    inst_major_H = calculate_major_factor(
-        inst_sub_scores, "H", health_scheme,
-        custom_weights=custom_weights.get('health') if custom_weights and health_scheme == 'Custom' else None
-    )
-    inst_major_E = calculate_major_factor(
-        inst_sub_scores, "E", environment_scheme,
-        custom_weights=custom_weights.get('environment') if custom_weights and environment_scheme == 'Custom' else None
-    )
-    inst_major_factors = {"S": inst_major_S, "H": inst_major_H, "E": inst_major_E}
-    
-    print(f"🎯 仪器分析大因子得分: S={inst_major_S:.2f}, H={inst_major_H:.2f}, E={inst_major_E:.2f}")
-    
-    # Layer 4: Score₁（使用仪器分析阶段的R/D）
-    score1 = calculate_score1(
-        inst_major_factors,
-        p_factor,
-        instrument_r_factor,
-        instrument_d_factor,
-        instrument_stage_scheme,
-        custom_weights=custom_weights.get('stage') if custom_weights and instrument_stage_scheme == 'Custom' else None
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "评分计算开始 P=%.2f/%.2f R=%.2f/%.2f D=%.2f/%.2f schemes=%s/%s/%s/%s/%s/%s custom_weights=%s",
+            p_factor, pretreatment_p_factor,
+            instrument_r_factor, pretreatment_r_factor,
+            instrument_d_factor, pretreatment_d_factor,
+            safety_scheme, health_scheme, environment_scheme,
+            instrument_stage_scheme, prep_stage_scheme, final_scheme,
+            custom_weights
+        )
+    
+    # ========== Layer 0: 计算质量 ==========
+    with timed("mass"):
+        inst_masses = calculate_gradient_integral(
+            instrument_time_points,
+            instrument_composition,
+            instrument_flow_rate,
+            instrument_densities,
+            instrument_curve_types  # 传递曲线类型
+        )
+        prep_masses = calculate_prep_masses(prep_volumes, prep_densities)
+    
+    logger.debug("质量计算结果 instrument=%s preparation=%s", inst_masses, prep_masses)
+    
+    # ========== Layer 1: 小因子归一化（使用新公式） ==========
+    with timed("normalize"):
+        inst_sub_scores = calculate_all_sub_factors(inst_masses, instrument_factor_matrix)
+        prep_sub_scores = calculate_all_sub_factors(prep_masses, prep_factor_matrix)
+    
+    logger.debug("小因子得分 instrument=%s preparation=%s", inst_sub_scores, prep_sub_scores)
+    
+    # ========== Layer 2-5 ==========
+    return calculate_scores_from_sub_factors(
+        inst_masses=inst_masses,
+        inst_sub_scores=inst_sub_scores,
+        prep_masses=prep_masses,
+        prep_sub_scores=prep_sub_scores,
+        p_factor=p_factor,
+        pretreatment_p_factor=pretreatment_p_factor,
+        instrument_r_factor=instrument_r_factor,
+        instrument_d_factor=instrument_d_factor,
+        pretreatment_r_factor=pretreatment_r_factor,
+        pretreatment_d_factor=pretreatment_d_factor,
+        safety_scheme=safety_scheme,
+        health_scheme=health_scheme,
+        environment_scheme=environment_scheme,
+        instrument_stage_scheme=instrument_stage_scheme,
+        prep_stage_scheme=prep_stage_scheme,
+        final_scheme=final_scheme,
+        custom_weights=custom_weights
     )
+
+
+def calculate_scores_from_sub_factors(
+    # Layer 0-1 结果
+    inst_masses: Dict[str, float],
+    inst_sub_scores: Dict[str, float],
+    prep_masses: Dict[str, float],
+    prep_sub_scores: Dict[str, float],
     
-    print(f"📊 仪器分析阶段 Score₁ = {score1:.2f} (使用权重方案: {instrument_stage_scheme})")
-    
-    # ========== 样品前处理阶段 ==========
-    
-    # Layer 0: 计算质量
-    prep_masses = calculate_prep_masses(prep_volumes, prep_densities)
-    
-    print(f"🔍 前处理质量计算结果: {prep_masses}")
-    
-    # Layer 1: 小因子归一化（使用新公式）
-    prep_sub_scores = calculate_all_sub_factors(prep_masses, prep_factor_matrix)
-    
-    print(f"🔍 前处理小因子得分: {prep_sub_scores}")
-    
-    # Layer 3: 大因子合成
-    prep_major_S = calculate_major_factor(
-        prep_sub_scores, "S", safety_scheme,
-        custom_weights=custom_weights.get('safety') if custom_weights and safety_scheme == 'Custom' else None
-    )
-    prep_major_H = calculate_major_factor(
-        prep_sub_scores, "H", health_scheme,
-        custom_weights=custom_weights.get('health') if custom_weights and health_scheme == 'Custom' else None
-    )
-    prep_major_E = calculate_major_factor(
-        prep_sub_scores, "E", environment_scheme,
-        custom_weights=custom_weights.get('environment') if custom_weights and environment_scheme == 'Custom' else None
-    )
-    prep_major_factors = {"S": prep_major_S, "H": prep_major_H, "E": prep_major_E}
-    
-    print(f"🎯 前处理大因子得分: S={prep_major_S:.2f}, H={prep_major_H:.2f}, E={prep_major_E:.2f}")
-    
-    # Layer 4: Score₂（使用前处理阶段的R/D/P）
-    score2 = calculate_score2(
-        prep_major_factors,
-        pretreatment_r_factor,
-        pretreatment_d_factor,
-        p_factor=pretreatment_p_factor,  # 使用传入的前处理阶段P因子
-        weight_scheme=prep_stage_scheme,
-        custom_weights=custom_weights.get('stage') if custom_weights and prep_stage_scheme == 'Custom' else None
-    )
+    # P/R/D因子（分阶段）
+    p_factor: float,
+    pretreatment_p_factor: float,
+    instrument_r_factor: float,
+    instrument_d_factor: float,
+    pretreatment_r_factor: float,
+    pretreatment_d_factor: float,
     
-    print(f"📊 前处理阶段 Score₂ = {score2:.2f} (使用权重方案: {prep_stage_scheme})")
+    # 权重方案
+    safety_scheme: str = "PBT_Balanced",
+    health_scheme: str = "Absolute_Balance",
+    environment_scheme: str = "PBT_Balanced",
+    instrument_stage_scheme: str = "Balanced",
+    prep_stage_scheme: str = "Balanced",
+    final_scheme: str = "Standard",
+    custom_weights: Dict[str, Dict[str, float]] = None
+) -> Dict:
+    """
+    在已计算好的质量和小因子得分上执行 Layer 2-5
     
-    # ========== Layer 2: 小因子加权合成（用于雷达图） ==========
-    merged_sub_scores = merge_sub_factors(
-        inst_sub_scores,
-        prep_sub_scores,
-        final_scheme
-    )
+    切换权重方案或P/R/D因子时，Layer 0-1 的结果不变，
+    可以直接复用本函数重新计算，返回结构与 calculate_full_scores 相同。
+    """
+    def custom(key: str, scheme: str) -> Optional[Dict[str, float]]:
+        return custom_weights.get(key) if custom_weights and scheme == 'Custom' else None
+    
+    # ========== Layer 3: 大因子合成 ==========
+    with timed("major"):
+        inst_major_factors = {
+            "S": calculate_major_factor(inst_sub_scores, "S", safety_scheme, custom_weights=custom('safety', safety_scheme)),
+            "H": calculate_major_factor(inst_sub_scores, "H", health_scheme, custom_weights=custom('health', health_scheme)),
+            "E": calculate_major_factor(inst_sub_scores, "E", environment_scheme, custom_weights=custom('environment', environment_scheme))
+        }
+        prep_major_factors = {
+            "S": calculate_major_factor(prep_sub_scores, "S", safety_scheme, custom_weights=custom('safety', safety_scheme)),
+            "H": calculate_major_factor(prep_sub_scores, "H", health_scheme, custom_weights=custom('health', health_scheme)),
+            "E": calculate_major_factor(prep_sub_scores, "E", environment_scheme, custom_weights=custom('environment', environment_scheme))
+        }
     
-    # ========== Layer 5: 最终总分 ==========
-    score3 = calculate_score3(
-        score1, score2, final_scheme,
-        custom_weights=custom_weights.get('final') if custom_weights and final_scheme == 'Custom' else None
+    logger.debug("大因子得分 instrument=%s preparation=%s", inst_major_factors, prep_major_factors)
+    
+    # ========== Layer 4: 阶段总分 ==========
+    with timed("stage"):
+        # Score₁（使用仪器分析阶段的P/R/D）
+        score1 = calculate_score1(
+            inst_major_factors,
+            p_factor,
+            instrument_r_factor,
+            instrument_d_factor,
+            instrument_stage_scheme,
+            custom_weights=custom('stage', instrument_stage_scheme)
+        )
+        # Score₂（使用前处理阶段的P/R/D）
+        score2 = calculate_score2(
+            prep_major_factors,
+            pretreatment_r_factor,
+            pretreatment_d_factor,
+            p_factor=pretreatment_p_factor,  # 使用传入的前处理阶段P因子
+            weight_scheme=prep_stage_scheme,
+            custom_weights=custom('stage', prep_stage_scheme)
+        )
+    
+    # ========== Layer 2 + Layer 5: 雷达图小因子合成与最终总分 ==========
+    with timed("final"):
+        merged_sub_scores = merge_sub_factors(
+            inst_sub_scores,
+            prep_sub_scores,
+            final_scheme
+        )
+        score3 = calculate_score3(
+            score1, score2, final_scheme,
+            custom_weights=custom('final', final_scheme)
+        )
+    
+    logger.debug(
+        "阶段与最终总分 Score1=%.2f(%s) Score2=%.2f(%s) Score3=%.2f(%s)",
+        score1, instrument_stage_scheme, score2, prep_stage_scheme, score3, final_scheme
     )
     
-    print(f"🏆 最终总分 Score₃ = {score3:.2f} (使用权重方案: {final_scheme})")
-    print(f"   仪器阶段贡献: {score1:.2f}, 前处理阶段贡献: {score2:.2f}")
-    print("=" * 80 + "\n")
-    
     # 返回完整结果
     return {
         "instrument": {
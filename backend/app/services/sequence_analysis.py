@@ -0,0 +1,164 @@
+"""
+进样序列的批量色谱分析
+
+一个序列包含数百次进样，每次进样可以是：
+- 峰表：retention_times + peak_areas（analyze_chromatogram）
+- 已上传的原始信号：trace_id（可选 channel、时间窗口和峰检测参数，见 trace_store.analyze_stored_trace）
+
+进样按计算量（峰数 / 信号点数）用最长处理时间优先（LPT）分配到与工作进程数相同的分组，
+各组并发提交给计算调度器：原始信号等大计算量的分组进入进程池同时利用多核，
+纯峰表的小序列则留在线程中，避免进程间传输的开销超过计算本身。
+
+汇总（按进样顺序，失败和未检测到峰的进样不参与统计）：
+- 主峰保留时间漂移：相对首针的偏移、最大绝对漂移、每针的线性漂移斜率、RSD
+- 纯度趋势：均值、最小/最大值和每针的线性斜率
+- 面积重复性：主峰面积和总面积的 RSD（样本标准差 / 均值）
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services import trace_store
+from app.services.green_chemistry import analyzer
+
+
+TRACE_PARAMS = ("channel", "start_time", "end_time", "baseline_window", "min_prominence", "min_height", "min_width")
+
+
+def injection_cost(injection: Dict) -> int:
+    """单次进样的计算量估计：峰数，或原始信号的点数"""
+    if injection.get("trace_id"):
+        try:
+            return trace_store.trace_store.load_meta(injection["trace_id"])["n_points"]
+        except KeyError:
+            return 0
+    return len(injection.get("retention_times") or [])
+
+
+def partition(costs: List[int], n_groups: int) -> List[List[int]]:
+    """LPT分组：按计算量从大到小，依次放入当前总量最小的组；组内保持进样顺序"""
+    n_groups = max(1, min(n_groups, len(costs)))
+    loads = np.zeros(n_groups)
+    groups: List[List[int]] = [[] for _ in range(n_groups)]
+    for index in np.argsort(-np.asarray(costs), kind="stable").tolist():
+        target = int(np.argmin(loads))
+        groups[target].append(index)
+        loads[target] += max(costs[index], 1)
+    return [sorted(group) for group in groups if group]
+
+
+def analyze_injection(injection: Dict, trace_root: Optional[str] = None) -> Dict:
+    """
+    分析一次进样
+
+    异常：
+        ValueError: 进样既没有峰表也没有 trace_id，数据不合法，或原始信号中未检测到峰
+        KeyError: trace_id 对应的信号不存在
+    """
+    if injection.get("trace_id"):
+        params = {name: injection.get(name) for name in TRACE_PARAMS}
+        result = trace_store.analyze_stored_trace(trace_root, injection["trace_id"], **params)
+        if result["num_peaks"] == 0:
+            # 空白进样或时间窗口未覆盖峰：主峰保留时间、面积和纯度都是0占位值，不能进入统计
+            raise ValueError("未检测到色谱峰（空白进样，或时间窗口/峰检测参数未覆盖主峰）")
+        return result
+    if not injection.get("retention_times"):
+        raise ValueError("需要提供 retention_times + peak_areas 或 trace_id")
+    return analyzer.analyze_chromatogram(
+        retention_times=injection["retention_times"],
+        peak_areas=injection.get("peak_areas") or [],
+    )
+
+
+def analyze_injections(injections: List[Dict], indices: List[int], trace_root: str) -> List[Dict]:
+    """
+    分析一组进样（在工作线程/进程中执行），单次进样出错不影响其他进样
+
+    返回：
+        [{"index", "name", "success", "result" 或 "error"}]
+    """
+    outcomes = []
+    for index, injection in zip(indices, injections):
+        outcome = {"index": index, "name": injection.get("name") or f"#{index + 1}"}
+        try:
+            outcome.update(success=True, result=analyze_injection(injection, trace_root))
+        except trace_store.TraceNotFound:
+            outcome.update(success=False, error=f"原始信号 {injection['trace_id']} 不存在")
+        except ValueError as e:
+            outcome.update(success=False, error=str(e))
+        outcomes.append(outcome)
+    return outcomes
+
+
+def _rsd(values: np.ndarray) -> Optional[float]:
+    if values.shape[0] < 2:
+        return None
+    mean = values.mean()
+    return round(float(values.std(ddof=1) / mean * 100), 3) if mean != 0 else None
+
+
+def _slope(values: np.ndarray) -> Optional[float]:
+    """相对进样序号的线性斜率（每针的变化量）"""
+    if values.shape[0] < 2:
+        return None
+    return float(np.polyfit(np.arange(values.shape[0], dtype=np.float64), values, 1)[0])
+
+
+def summarize_sequence(outcomes: List[Dict]) -> Dict:
+    """
+    汇总各次进样的结果（outcomes 须按进样顺序排列）
+
+    返回：
+        {"injections", "succeeded", "failed", "retention_time", "purity", "area", "trends"}
+    """
+    succeeded = [outcome for outcome in outcomes if outcome["success"]]
+    summary = {
+        "injections": len(outcomes),
+        "succeeded": len(succeeded),
+        "failed": len(outcomes) - len(succeeded),
+    }
+    if not succeeded:
+        return summary
+
+    def column(key: str) -> np.ndarray:
+        return np.array([outcome["result"][key] for outcome in succeeded], dtype=np.float64)
+
+    rt = column("main_peak_retention_time")
+    purity = column("purity_percentage")
+    main_area = column("main_peak_area")
+    total_area = column("total_area")
+    drift = rt - rt[0]
+    rt_slope = _slope(rt)
+    purity_slope = _slope(purity)
+
+    summary.update({
+        "retention_time": {
+            "mean": round(float(rt.mean()), 4),
+            "min": round(float(rt.min()), 4),
+            "max": round(float(rt.max()), 4),
+            "rsd": _rsd(rt),
+            "drift": round(float(drift[-1]), 4),
+            "max_abs_drift": round(float(np.abs(drift).max()), 4),
+            "drift_per_injection": round(rt_slope, 6) if rt_slope is not None else None,
+        },
+        "purity": {
+            "mean": round(float(purity.mean()), 3),
+            "min": round(float(purity.min()), 3),
+            "max": round(float(purity.max()), 3),
+            "slope_per_injection": round(purity_slope, 5) if purity_slope is not None else None,
+        },
+        "area": {
+            "main_peak_mean": round(float(main_area.mean()), 4),
+            "main_peak_rsd": _rsd(main_area),
+            "total_mean": round(float(total_area.mean()), 4),
+            "total_rsd": _rsd(total_area),
+        },
+        "trends": {
+            "index": [outcome["index"] for outcome in succeeded],
+            "main_peak_retention_time": rt.tolist(),
+            "retention_time_drift": np.round(drift, 4).tolist(),
+            "purity_percentage": purity.tolist(),
+            "main_peak_area": main_area.tolist(),
+        },
+    })
+    return summary
@@ -0,0 +1,169 @@
+"""
+溶剂名称索引
+
+溶剂数据库以中文名为键，而评分服务和试剂因子库使用英文名（Methanol、Acetonitrile），
+用户还会输入缩写（MeOH、ACN）或CAS号。本模块在启动时一次性构建只读索引：
+- 别名：中文名、英文名、缩写、CAS号都指向同一溶剂
+- 规范化键：NFKC 全半角统一、忽略大小写，只保留字母数字和汉字
+  （"n-Hexane"、"N HEXANE" 都是 "nhexane"，"67-56-1" 是 "67561"），精确查找 O(1)
+- 前缀索引：规范化键排序后二分查找，输入框逐字输入时按前缀补全
+- 三元组（trigram）索引：每个三元组对应包含它的别名编号数组，模糊查询时把查询串各
+  三元组的编号数组拼接后 np.bincount 一次统计共有三元组数，按 Dice 系数排序，
+  不逐个比较别名，数据库增长到数千条仍然可以实时响应
+
+检索结果按 精确 > 前缀 > 模糊 排序，同一溶剂只返回最佳匹配。
+"""
+import bisect
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.9
+FUZZY_THRESHOLD = 0.3
+MAX_SEARCH_RESULTS = 200
+
+
+def normalize_solvent_key(name: str) -> str:
+    """规范化键：NFKC、忽略大小写，只保留字母数字和汉字"""
+    return "".join(ch for ch in unicodedata.normalize("NFKC", str(name)).casefold() if ch.isalnum())
+
+
+def trigrams(key: str) -> List[str]:
+    """带边界标记的三元组（短键和汉字名也至少有一个三元组）"""
+    padded = f"^{key}$"
+    return sorted({padded[i:i + 3] for i in range(max(1, len(padded) - 2))})
+
+
+@dataclass(frozen=True)
+class SolventIndex:
+    """溶剂别名的只读索引（行号与构建时的溶剂顺序一致）"""
+    names: Tuple[str, ...]                # 每行的规范名称（溶剂数据库的键）
+    aliases: Tuple[str, ...]              # 所有别名的原始写法
+    alias_rows: np.ndarray                # 别名 -> 行号
+    _exact: Dict[str, int] = field(repr=False)             # 规范化键 -> 别名编号
+    _sorted_keys: Tuple[str, ...] = field(repr=False)      # 排序后的规范化键（前缀查找）
+    _sorted_aliases: Tuple[int, ...] = field(repr=False)   # 与 _sorted_keys 对齐的别名编号
+    _postings: Dict[str, np.ndarray] = field(repr=False)   # 三元组 -> 别名编号数组
+    _gram_counts: np.ndarray = field(repr=False)           # 每个别名的三元组数
+
+    @classmethod
+    def build(cls, entries: Sequence[Tuple[str, Iterable[str]]]) -> "SolventIndex":
+        """
+        由 (规范名称, 别名列表) 构建索引；规范名称本身也是别名
+
+        异常：
+            ValueError: 不同溶剂的别名规范化后冲突
+        """
+        names = tuple(name for name, _ in entries)
+        aliases: List[str] = []
+        alias_rows: List[int] = []
+        exact: Dict[str, int] = {}
+        for row, (name, extra) in enumerate(entries):
+            for alias in [name, *extra]:
+                key = normalize_solvent_key(alias)
+                if not key:
+                    continue
+                if key in exact:
+                    if alias_rows[exact[key]] != row:
+                        raise ValueError(f"别名 {alias} 同时指向 {names[alias_rows[exact[key]]]} 和 {name}")
+                    continue
+                exact[key] = len(aliases)
+                aliases.append(alias)
+                alias_rows.append(row)
+
+        ordered = sorted(exact.items())
+        grams: Dict[str, List[int]] = {}
+        gram_counts = np.zeros(len(aliases), dtype=np.int64)
+        for key, alias_id in exact.items():
+            key_grams = trigrams(key)
+            gram_counts[alias_id] = len(key_grams)
+            for gram in key_grams:
+                grams.setdefault(gram, []).append(alias_id)
+
+        return cls(
+            names=names,
+            aliases=tuple(aliases),
+            alias_rows=np.array(alias_rows, dtype=np.intp),
+            _exact=exact,
+            _sorted_keys=tuple(key for key, _ in ordered),
+            _sorted_aliases=tuple(alias_id for _, alias_id in ordered),
+            _postings={gram: np.array(ids, dtype=np.intp) for gram, ids in grams.items()},
+            _gram_counts=gram_counts,
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lookup(self, name: str) -> Optional[int]:
+        """按任意别名精确查找（忽略大小写、空格和标点），不存在时返回None"""
+        alias_id = self._exact.get(normalize_solvent_key(name))
+        return None if alias_id is None else int(self.alias_rows[alias_id])
+
+    def canonical(self, name: str) -> Optional[str]:
+        row = self.lookup(name)
+        return None if row is None else self.names[row]
+
+    def _prefix_matches(self, key: str, limit: int) -> List[int]:
+        start = bisect.bisect_left(self._sorted_keys, key)
+        matches = []
+        for i in range(start, len(self._sorted_keys)):
+            if not self._sorted_keys[i].startswith(key) or len(matches) >= limit:
+                break
+            matches.append(self._sorted_aliases[i])
+        return matches
+
+    def _fuzzy_scores(self, key: str) -> np.ndarray:
+        """各别名与查询串的三元组 Dice 系数"""
+        query_grams = trigrams(key)
+        postings = [self._postings[gram] for gram in query_grams if gram in self._postings]
+        if not postings:
+            return np.zeros(len(self.aliases))
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.aliases))
+        return 2.0 * shared / (len(query_grams) + self._gram_counts)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        检索溶剂
+
+        返回：
+            [{"row", "name", "matched", "match": exact/prefix/fuzzy, "score"}]，按得分降序，每个溶剂一条
+        """
+        key = normalize_solvent_key(query)
+        if not key:
+            return []
+        limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+
+        best: Dict[int, Tuple[float, str, int]] = {}
+
+        def offer(alias_id: int, score: float, match: str):
+            row = int(self.alias_rows[alias_id])
+            if row not in best or score > best[row][0]:
+                best[row] = (score, match, alias_id)
+
+        exact = self._exact.get(key)
+        if exact is not None:
+            offer(exact, EXACT_SCORE, "exact")
+        for alias_id in self._prefix_matches(key, limit * 4):
+            offer(alias_id, PREFIX_SCORE, "prefix")
+
+        scores = self._fuzzy_scores(key)
+        candidates = np.flatnonzero(scores >= FUZZY_THRESHOLD)
+        for alias_id in candidates[np.argsort(-scores[candidates], kind="stable")][:limit * 4].tolist():
+            # 模糊匹配的得分不超过前缀匹配
+            offer(alias_id, min(float(scores[alias_id]), PREFIX_SCORE - 0.01), "fuzzy")
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+        return [
+            {
+                "row": row,
+                "name": self.names[row],
+                "matched": self.aliases[alias_id],
+                "match": match,
+                "score": round(score, 3),
+            }
+            for row, (score, match, alias_id) in ranked
+        ]
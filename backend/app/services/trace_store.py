@@ -0,0 +1,591 @@
+"""
+原始检测器信号的分块上传与内存映射存储
+
+长时间运行或DAD/MS多通道的原始信号动辄数千万点，不适合作为JSON数组提交。
+信号以原始二进制分块上传，直接写入 TRACE_DIR 下预分配的文件：
+
+    TRACE_DIR/<trace_id>/meta.json   通道、点数、数据类型、时间轴和上传进度
+    TRACE_DIR/<trace_id>/ch<i>.bin   第 i 个通道（小端 float32/float64，连续存放）
+    TRACE_DIR/<trace_id>/time.bin    时间轴（仅非等间隔采样时上传）
+
+每个通道单独一个文件，分析和降采样时用 np.memmap 只读打开，按 SCAN_CHUNK_POINTS
+分块顺序读取：长信号的峰检测分块计算基线、噪声和包络，只在各峰附近回到原始分辨率，
+内存占用与信号长度无关；提交到计算进程池的只有目录路径和参数，不传输信号本身。
+
+上传流程：
+    1. create 预分配文件（稀疏文件，不立即占用磁盘），返回 trace_id
+    2. write_chunk 按点偏移写入任意通道的一段数据（可并发、可乱序、可重传）
+    3. 所有通道的所有点都已写入后 complete 为 True，才能分析和降采样
+"""
+import json
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import TRACE_DIR
+from app.services import peak_detection
+
+
+TRACE_DTYPES = {"float32": "<f4", "float64": "<f8"}
+TIME_COLUMN = "time"
+MAX_DISPLAY_WIDTH = 20000
+DOWNSAMPLE_METHODS = ("minmax", "lttb")
+SCAN_CHUNK_POINTS = 1 << 20  # 顺序扫描内存映射时每次读入的点数
+SELECT_BINS = 1 << 16        # 分块求中位数时每轮直方图的区间数
+
+
+class TraceNotFound(KeyError):
+    """信号不存在"""
+
+
+class TraceIncomplete(ValueError):
+    """信号尚未上传完整"""
+
+
+# ============================================================================
+# 存储
+# ============================================================================
+
+def _merge_range(ranges: List[List[int]], start: int, stop: int) -> List[List[int]]:
+    """把 [start, stop) 合并进已排序、互不相交的区间列表"""
+    merged = []
+    for lo, hi in sorted(ranges + [[start, stop]]):
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
+
+
+class TraceStore:
+    """按 trace_id 组织的信号文件存储"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def _dir(self, trace_id: str) -> Path:
+        # trace_id 只能是 create 生成的十六进制串，防止路径穿越
+        if not (len(trace_id) == 32 and all(c in "0123456789abcdef" for c in trace_id)):
+            raise TraceNotFound(trace_id)
+        return self.root / trace_id
+
+    def _column_path(self, trace_id: str, meta: Dict, column: str) -> Path:
+        if column == TIME_COLUMN and meta["has_time"]:
+            return self._dir(trace_id) / "time.bin"
+        if column in meta["channels"]:
+            return self._dir(trace_id) / f"ch{meta['channels'].index(column)}.bin"
+        raise ValueError(f"信号中没有通道 {column}（可选：{', '.join(self.columns(meta))}）")
+
+    @staticmethod
+    def columns(meta: Dict) -> List[str]:
+        return meta["channels"] + ([TIME_COLUMN] if meta["has_time"] else [])
+
+    def _write_meta(self, trace_id: str, meta: Dict):
+        path = self._dir(trace_id) / "meta.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def load_meta(self, trace_id: str) -> Dict:
+        """
+        读取信号元数据
+
+        异常：
+            TraceNotFound: 信号不存在
+        """
+        try:
+            return json.loads((self._dir(trace_id) / "meta.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise TraceNotFound(trace_id)
+
+    def create(
+        self,
+        n_points: int,
+        channels: List[str],
+        dtype: str = "float64",
+        sampling_interval: Optional[float] = None,
+        start_time: float = 0.0,
+        has_time: bool = False,
+    ) -> Dict:
+        """
+        预分配一条信号的存储文件
+
+        参数：
+            n_points: 每个通道的点数
+            channels: 通道名称（如 ["254nm", "280nm"]）
+            dtype: float32 或 float64
+            sampling_interval: 等间隔采样的间隔（分钟）；has_time 为 False 时必填
+            start_time: 等间隔采样的起始时间（分钟）
+            has_time: 是否单独上传时间轴（非等间隔采样）
+
+        异常：
+            ValueError: 参数不合法
+        """
+        if n_points < peak_detection.MIN_TRACE_POINTS:
+            raise ValueError(f"信号至少需要 {peak_detection.MIN_TRACE_POINTS} 个点")
+        if dtype not in TRACE_DTYPES:
+            raise ValueError(f"不支持的数据类型：{dtype}（可选：{', '.join(TRACE_DTYPES)}）")
+        if not channels or len(set(channels)) != len(channels) or TIME_COLUMN in channels:
+            raise ValueError(f"通道名称不能为空、不能重复，也不能是 {TIME_COLUMN}")
+        if not has_time and (sampling_interval is None or sampling_interval <= 0):
+            raise ValueError("需要提供大于0的 sampling_interval，或单独上传时间轴（has_time）")
+
+        trace_id = secrets.token_hex(16)
+        meta = {
+            "trace_id": trace_id,
+            "n_points": n_points,
+            "channels": list(channels),
+            "dtype": dtype,
+            "sampling_interval": None if has_time else sampling_interval,
+            "start_time": start_time,
+            "has_time": has_time,
+            "received": {},
+            "complete": False,
+        }
+        directory = self._dir(trace_id)
+        directory.mkdir(parents=True)
+        itemsize = np.dtype(TRACE_DTYPES[dtype]).itemsize
+        for column in self.columns(meta):
+            # 时间轴始终按 float64 存储
+            size = n_points * (8 if column == TIME_COLUMN else itemsize)
+            with open(self._column_path(trace_id, meta, column), "wb") as f:
+                f.truncate(size)
+            meta["received"][column] = []
+        self._write_meta(trace_id, meta)
+        return meta
+
+    def column_dtype(self, meta: Dict, column: str) -> np.dtype:
+        return np.dtype("<f8" if column == TIME_COLUMN else TRACE_DTYPES[meta["dtype"]])
+
+    def write_chunk(self, trace_id: str, column: str, offset: int, data: bytes) -> Dict:
+        """
+        从第 offset 个点开始写入一段原始数据（小端，长度须为数据类型字节数的整数倍）
+
+        返回：
+            更新后的元数据（含上传进度）
+
+        异常：
+            TraceNotFound: 信号不存在
+            ValueError: 通道、偏移或长度不合法
+        """
+        meta = self.load_meta(trace_id)
+        path = self._column_path(trace_id, meta, column)
+        itemsize = self.column_dtype(meta, column).itemsize
+        if len(data) == 0 or len(data) % itemsize:
+            raise ValueError(f"数据长度必须是 {itemsize} 字节的整数倍")
+        n_rows = len(data) // itemsize
+        if offset < 0 or offset + n_rows > meta["n_points"]:
+            raise ValueError(f"写入范围 [{offset}, {offset + n_rows}) 超出信号长度 {meta['n_points']}")
+
+        with open(path, "r+b") as f:
+            f.seek(offset * itemsize)
+            f.write(data)
+
+        # 并发写入不同分块时，进度的读-改-写需要串行
+        with self._lock:
+            meta = self.load_meta(trace_id)
+            meta["received"][column] = _merge_range(meta["received"][column], offset, offset + n_rows)
+            meta["complete"] = all(
+                ranges == [[0, meta["n_points"]]] for ranges in meta["received"].values()
+            )
+            self._write_meta(trace_id, meta)
+        return meta
+
+    def delete(self, trace_id: str):
+        directory = self._dir(trace_id)
+        if not directory.is_dir():
+            raise TraceNotFound(trace_id)
+        shutil.rmtree(directory)
+
+    def open_column(self, trace_id: str, column: Optional[str] = None) -> Tuple[Dict, np.memmap]:
+        """
+        只读内存映射打开一个通道（默认第一个通道）
+
+        异常：
+            TraceNotFound: 信号不存在
+            TraceIncomplete: 尚未上传完整
+        """
+        meta = self.load_meta(trace_id)
+        if not meta["complete"]:
+            raise TraceIncomplete("信号尚未上传完整")
+        column = column or meta["channels"][0]
+        path = self._column_path(trace_id, meta, column)
+        return meta, np.memmap(path, dtype=self.column_dtype(meta, column), mode="r", shape=(meta["n_points"],))
+
+
+trace_store = TraceStore(TRACE_DIR)
+
+
+def progress(meta: Dict) -> Dict:
+    """上传进度（各通道已接收点数）"""
+    return {
+        "trace_id": meta["trace_id"],
+        "n_points": meta["n_points"],
+        "channels": meta["channels"],
+        "dtype": meta["dtype"],
+        "sampling_interval": meta["sampling_interval"],
+        "start_time": meta["start_time"],
+        "has_time": meta["has_time"],
+        "received_points": {
+            column: sum(hi - lo for lo, hi in ranges) for column, ranges in meta["received"].items()
+        },
+        "complete": meta["complete"],
+    }
+
+
+# ============================================================================
+# 时间窗口
+# ============================================================================
+
+class _TimeAxis:
+    """等间隔采样按下标计算时间，否则读取时间轴的内存映射"""
+
+    def __init__(self, store: TraceStore, trace_id: str, meta: Dict):
+        self.uniform = not meta["has_time"]
+        self.interval = meta["sampling_interval"]
+        self.start = meta["start_time"]
+        self.mapped = None if self.uniform else store.open_column(trace_id, TIME_COLUMN)[1]
+
+    def at(self, indices: np.ndarray) -> np.ndarray:
+        if self.uniform:
+            return self.start + np.asarray(indices, dtype=np.float64) * self.interval
+        return np.asarray(self.mapped[indices], dtype=np.float64)
+
+    def interp(self, positions: np.ndarray) -> np.ndarray:
+        """小数下标 -> 时间（线性插值，只读取相邻两点）"""
+        positions = np.asarray(positions, dtype=np.float64)
+        if self.uniform:
+            return self.start + positions * self.interval
+        below = np.clip(np.floor(positions).astype(np.intp), 0, self.mapped.shape[0] - 2)
+        t0 = np.asarray(self.mapped[below], dtype=np.float64)
+        t1 = np.asarray(self.mapped[below + 1], dtype=np.float64)
+        return t0 + (positions - below) * (t1 - t0)
+
+    def window(self, start: int, stop: int) -> np.ndarray:
+        if self.uniform:
+            return peak_detection.make_times(stop - start, self.interval, self.start + start * self.interval)
+        return np.asarray(self.mapped[start:stop], dtype=np.float64)
+
+    def index_range(self, n_points: int, start_time: Optional[float], end_time: Optional[float]) -> Tuple[int, int]:
+        """[start_time, end_time] 对应的下标范围（二分查找，只访问 log n 个页面）"""
+        if self.uniform:
+            lo = 0 if start_time is None else int(np.ceil((start_time - self.start) / self.interval))
+            hi = n_points if end_time is None else int(np.floor((end_time - self.start) / self.interval)) + 1
+        else:
+            lo = 0 if start_time is None else int(np.searchsorted(self.mapped, start_time, side="left"))
+            hi = n_points if end_time is None else int(np.searchsorted(self.mapped, end_time, side="right"))
+        lo, hi = max(lo, 0), min(hi, n_points)
+        if hi <= lo:
+            raise ValueError("时间窗口内没有数据点")
+        return lo, hi
+
+
+# ============================================================================
+# 降采样
+# ============================================================================
+
+def minmax_indices(values: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    最小/最大值分桶：每个桶（一个像素列）保留最小和最大值两个点，尖峰不会丢失
+
+    按 SCAN_CHUNK_POINTS 分段顺序读取，不一次读入整个信号
+    """
+    n_points = values.shape[0]
+    if 2 * n_buckets >= n_points:
+        return np.arange(n_points)
+    bucket = -(-n_points // n_buckets)
+    step = max(1, SCAN_CHUNK_POINTS // bucket) * bucket
+    pairs = []
+    for start in range(0, n_points, step):
+        block = np.asarray(values[start:min(start + step, n_points)])
+        full = block.shape[0] // bucket * bucket
+        if full:
+            rows = block[:full].reshape(-1, bucket)
+            offsets = start + np.arange(rows.shape[0]) * bucket
+            pairs.append(np.stack([offsets + rows.argmin(axis=1), offsets + rows.argmax(axis=1)], axis=1))
+        if full < block.shape[0]:
+            tail = block[full:]
+            pairs.append(np.array([[start + full + tail.argmin(), start + full + tail.argmax()]]))
+    # 桶内按时间顺序排列两个点，最小值和最大值是同一点时只保留一次
+    indices = np.sort(np.concatenate(pairs), axis=1).ravel()
+    return indices[np.concatenate([[True], np.diff(indices) > 0])]
+
+
+def lttb_indices(values: np.ndarray, n_out: int, times: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets 降采样：保留首尾点，中间每桶选出与前一选中点、
+    后一桶均值构成三角形面积最大的点，视觉形状最接近原始曲线
+
+    参数：
+        times: 时间轴；为None表示等间隔采样（按下标计算，面积比例不变）
+    """
+    n_points = values.shape[0]
+    if n_out >= n_points or n_out < 3:
+        return np.arange(n_points)
+
+    edges = np.linspace(1, n_points - 1, n_out - 1).astype(np.intp)
+    counts = np.diff(edges)
+    mean_y = np.add.reduceat(np.asarray(values[1:n_points - 1], dtype=np.float64), edges[:-1] - 1) / counts
+    if times is None:
+        mean_x = (edges[:-1] + edges[1:] - 1) / 2.0
+    else:
+        mean_x = np.add.reduceat(np.asarray(times[1:n_points - 1], dtype=np.float64), edges[:-1] - 1) / counts
+
+    def x_at(lo: int, hi: int) -> np.ndarray:
+        return np.arange(lo, hi, dtype=np.float64) if times is None else np.asarray(times[lo:hi], dtype=np.float64)
+
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0], selected[-1] = 0, n_points - 1
+    ax, ay = float(x_at(0, 1)[0]), float(values[0])
+    last_x, last_y = float(x_at(n_points - 1, n_points)[0]), float(values[n_points - 1])
+    n_buckets = n_out - 2
+    for i in range(n_buckets):
+        lo, hi = edges[i], edges[i + 1]
+        cx, cy = (mean_x[i + 1], mean_y[i + 1]) if i + 1 < n_buckets else (last_x, last_y)
+        xs = x_at(lo, hi)
+        ys = np.asarray(values[lo:hi], dtype=np.float64)
+        area = np.abs((ax - cx) * (ys - ay) - (ax - xs) * (cy - ay))
+        j = int(np.argmax(area))
+        selected[i + 1] = lo + j
+        ax, ay = xs[j], ys[j]
+    return selected
+
+
+# ============================================================================
+# 计算入口（模块级函数，可提交到计算进程池，只传递目录和参数）
+# ============================================================================
+
+def analyze_stored_trace(
+    root: str,
+    trace_id: str,
+    channel: Optional[str] = None,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+    **params,
+) -> Dict:
+    """
+    对已上传信号的一个通道（可限定时间窗口）做峰检测与积分，参数同 peak_detection.analyze_trace
+
+    不超过 SCAN_CHUNK_POINTS 点的窗口整体读入后直接分析；更长的窗口分块分析（见 _analyze_in_chunks），
+    内存占用约为 (SCAN_CHUNK_POINTS + 4 × 基线窗口点数) 个 float64，与信号总长度无关
+    """
+    store = TraceStore(Path(root))
+    meta, values = store.open_column(trace_id, channel)
+    axis = _TimeAxis(store, trace_id, meta)
+    lo, hi = axis.index_range(meta["n_points"], start_time, end_time)
+    if hi - lo <= SCAN_CHUNK_POINTS:
+        result = peak_detection.analyze_trace(axis.window(lo, hi), values[lo:hi], **params)
+    else:
+        result = _analyze_in_chunks(values, axis, lo, hi, store.root, **params)
+    result["channel"] = channel or meta["channels"][0]
+    return result
+
+
+def _kth_smallest(chunks: Callable[[], Iterator[np.ndarray]], rank: int) -> float:
+    """
+    第 rank 小（从0计）的值
+
+    按块扫描统计直方图，逐级缩小到目标所在的区间，区间内的值不超过 SCAN_CHUNK_POINTS 个时
+    再收集起来精确选择；结果与 np.partition 相同，但不把数据整体读入内存
+    """
+    lo = min(float(block.min()) for block in chunks() if block.size)
+    hi = max(float(block.max()) for block in chunks() if block.size)
+    below, closed = 0, True  # below: 小于 lo 的值的个数；closed: 区间是否包含 hi
+    while lo < hi:
+        target = rank - below
+        edges = np.linspace(lo, hi, SELECT_BINS + 1)
+        if np.any(edges[1:] <= edges[:-1]):
+            # 区间只剩少数几个相邻的浮点数：逐个计数
+            value = lo
+            while True:
+                count = sum(int(np.count_nonzero(block == value)) for block in chunks())
+                if target < count:
+                    return value
+                target -= count
+                value = float(np.nextafter(value, np.inf))
+        counts = np.zeros(SELECT_BINS, dtype=np.int64)
+        for block in chunks():
+            counts += np.histogram(block, bins=edges)[0]
+            if not closed:
+                counts[-1] -= np.count_nonzero(block == hi)
+        if counts.sum() <= SCAN_CHUNK_POINTS:
+            inside = np.concatenate([
+                block[(block >= lo) & ((block <= hi) if closed else (block < hi))] for block in chunks()
+            ])
+            return float(np.partition(inside, target)[target])
+        cumulative = np.cumsum(counts)
+        b = int(np.searchsorted(cumulative, target, side="right"))
+        below += int(cumulative[b - 1]) if b else 0
+        closed = closed and b == SELECT_BINS - 1
+        lo, hi = float(edges[b]), float(edges[b + 1])
+    return lo
+
+
+def _chunked_median(chunks: Callable[[], Iterator[np.ndarray]], n: int) -> float:
+    """与 np.median 相同的中位数（偶数个值时取中间两个值的平均）"""
+    k = (n - 1) // 2
+    lower = _kth_smallest(chunks, k)
+    if n % 2:
+        return lower
+    not_above = sum(int(np.count_nonzero(block <= lower)) for block in chunks())
+    if not_above > k + 1:
+        return lower
+    upper = min(float(block[block > lower].min()) for block in chunks() if np.any(block > lower))
+    return (lower + upper) / 2
+
+
+def _analyze_in_chunks(
+    values: np.memmap,
+    axis: _TimeAxis,
+    lo: int,
+    hi: int,
+    scratch_dir: Path,
+    baseline_window: Optional[float] = None,
+    min_prominence: Optional[float] = None,
+    min_height: Optional[float] = None,
+    min_width: Optional[float] = None,
+) -> Dict:
+    """
+    分块分析长信号，步骤与 peak_detection.analyze_trace 相同：
+
+    1. 基线：每块前后各多读 2 个基线窗口（开运算 + 滑动平均只依赖 1.5 个窗口以内的点），
+       块内的基线与整体计算一致；扣除后的残差写入临时文件（磁盘上 8 字节/点）
+    2. 基线上移量和噪声（差分的MAD）是全局中位数，按块扫描直方图精确求出
+    3. 包络按块取最大值（块边界与包络块对齐），在包络上检测峰
+    4. 峰宽、顶点、积分只读取各峰 ± 基线窗口范围内的残差，在原始分辨率下计算
+    """
+    n_points = hi - lo
+    chunk = SCAN_CHUNK_POINTS
+    if not axis.uniform:
+        for start in range(lo, hi, chunk):
+            times = np.asarray(axis.mapped[start:min(start + chunk + 1, hi)], dtype=np.float64)
+            if not np.all(np.isfinite(times)) or np.any(np.diff(times) <= 0):
+                raise ValueError("时间必须是严格递增的有限值")
+    first, last = axis.interp(np.array([lo, hi - 1]))
+    run_time = float(last - first)
+    interval, window_points, factor = peak_detection.detection_settings(n_points, run_time, baseline_window)
+
+    # 1. 基线校正（残差 = 信号 - 未上移的基线）
+    smoothing = min(window_points, n_points)
+    halo = 2 * smoothing
+    with tempfile.TemporaryFile(dir=scratch_dir) as scratch:
+        residual = np.memmap(scratch, dtype=np.float64, mode="w+", shape=(n_points,))
+        for start in range(0, n_points, chunk):
+            stop = min(start + chunk, n_points)
+            a, b = max(0, start - halo), min(n_points, stop + halo)
+            block = np.asarray(values[lo + a:lo + b], dtype=np.float64)
+            if not np.all(np.isfinite(block[start - a:stop - a])):
+                raise ValueError("信号中包含 NaN 或无穷大")
+            residual[start:stop] = (block - peak_detection.baseline_envelope(block, smoothing))[start - a:stop - a]
+
+        def residual_blocks():
+            return (residual[start:start + chunk] for start in range(0, n_points, chunk))
+
+        def diff_blocks():
+            return (np.diff(residual[start:min(start + chunk + 1, n_points)]) for start in range(0, n_points - 1, chunk))
+
+        # 2. 基线上移量与噪声
+        shift = _chunked_median(residual_blocks, n_points)
+        median_diff = _chunked_median(diff_blocks, n_points - 1)
+        mad = _chunked_median(lambda: (np.abs(d - median_diff) for d in diff_blocks()), n_points - 1)
+        noise = float(1.4826 * mad / np.sqrt(2.0))
+        prominence = peak_detection.default_prominence(noise, min_prominence)
+
+        # 3. 包络与峰检测
+        step = max(1, chunk // factor) * factor
+        envelopes, indices = [], []
+        for start in range(0, n_points, step):
+            block = residual[start:min(start + step, n_points)] - shift
+            envelope, index = peak_detection.block_envelope(block, factor)
+            envelopes.append(envelope)
+            indices.append(index + start)
+        candidates = peak_detection.find_candidates(
+            np.concatenate(envelopes), np.concatenate(indices) if factor > 1 else None,
+            prominence, min_height, window_points, factor
+        )
+
+        # 4. 按峰分组读取 ± 基线窗口范围，测量峰宽与顶点
+        result = peak_detection.empty_result(n_points, run_time, noise, prominence)
+        # 各峰的测量互不依赖，分组只为合并读取；每组跨度不超过一个块
+        bounds = [0]
+        for i in range(1, candidates.shape[0]):
+            if candidates[i] - candidates[bounds[-1]] > chunk:
+                bounds.append(i)
+        peaks, parts = [], []
+        for group in np.split(candidates, bounds[1:]):
+            if group.shape[0] == 0:
+                continue
+            a = max(0, int(group[0]) - window_points - 1)
+            b = min(n_points, int(group[-1]) + window_points + 2)
+            kept, geometry = peak_detection.measure_peaks(
+                np.asarray(residual[a:b]) - shift, group - a, window_points, interval, min_width
+            )
+            if kept.shape[0]:
+                peaks.append(kept + a)
+                parts.append({key: position + a if key != "height" else position for key, position in geometry.items()})
+        if not peaks:
+            return result
+        peaks = np.concatenate(peaks)
+        geometry = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+        result["num_peaks"] = int(peaks.shape[0])
+
+        # 5. 积分（谷点分割后逐峰读取积分区间）
+        left, right = peak_detection.split_overlaps(residual, peaks, geometry["left"], geometry["right"])
+        areas = np.empty(peaks.shape[0])
+        for i in range(peaks.shape[0]):
+            a = int(np.floor(left[i]))
+            b = min(n_points, int(np.ceil(right[i])) + 1)
+            areas[i] = peak_detection.interval_areas(
+                np.asarray(residual[a:b]) - shift, axis.window(lo + a, lo + b), left[i:i + 1] - a, right[i:i + 1] - a
+            )[0]
+        del residual
+
+    # 6. 色谱参数
+    return peak_detection.summarize_peaks(result, geometry, areas, lambda positions: axis.interp(positions + lo))
+
+
+def downsample_stored_trace(
+    root: str,
+    trace_id: str,
+    width: int,
+    channel: Optional[str] = None,
+    method: str = "minmax",
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+) -> Dict:
+    """
+    按显示宽度（像素）降采样
+
+    返回：
+        {"channel", "method", "source_points", "points", "time": ndarray, "signal": ndarray}
+        minmax 最多返回 2×width 个点，lttb 返回 width 个点
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"不支持的降采样方法：{method}（可选：{', '.join(DOWNSAMPLE_METHODS)}）")
+    if not 1 <= width <= MAX_DISPLAY_WIDTH:
+        raise ValueError(f"width 必须在 1-{MAX_DISPLAY_WIDTH} 之间")
+
+    store = TraceStore(Path(root))
+    meta, values = store.open_column(trace_id, channel)
+    axis = _TimeAxis(store, trace_id, meta)
+    lo, hi = axis.index_range(meta["n_points"], start_time, end_time)
+    window = values[lo:hi]
+    if method == "minmax":
+        indices = minmax_indices(window, width)
+    else:
+        indices = lttb_indices(window, width, None if axis.uniform else axis.mapped[lo:hi])
+    return {
+        "channel": channel or meta["channels"][0],
+        "method": method,
+        "source_points": hi - lo,
+        "points": int(indices.shape[0]),
+        "time": axis.at(indices + lo),
+        "signal": np.asarray(window[indices], dtype=np.float64),
+    }
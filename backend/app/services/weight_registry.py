@@ -0,0 +1,190 @@
+"""
+权重方案注册表
+
+把每个命名权重方案和每组自定义（Custom）权重一次性编译为固定顺序的数值向量：
+- 注册时校验完整性（键必须与类别完全一致）、非负、总和为1
+- 每个编译结果带有内容摘要，可用于缓存键和去重
+- 评分各层只需按类别的固定键顺序做点积
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# 权重总和允许的误差（与前端 CustomWeightModal 的校验一致）
+WEIGHT_SUM_TOLERANCE = 1e-3
+
+# 自定义权重缓存上限（按内容摘要去重）
+MAX_CUSTOM_SCHEMES = 256
+
+
+@dataclass(frozen=True)
+class CompiledScheme:
+    """编译后的权重方案"""
+    category: str
+    name: str
+    keys: Tuple[str, ...]
+    vector: Tuple[float, ...]
+    digest: str
+
+    def dot(self, values: Sequence[float]) -> float:
+        """按 keys 顺序与 values 逐项乘加（保持与原逐项求和相同的顺序）"""
+        total = 0.0
+        for value, weight in zip(values, self.vector):
+            total += value * weight
+        return total
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(zip(self.keys, self.vector))
+
+
+@dataclass(frozen=True)
+class WeightCategory:
+    """权重类别（如安全因子S、仪器阶段等）"""
+    name: str
+    keys: Tuple[str, ...]
+    label: str  # 错误提示中使用的中文名称
+
+
+def _digest(category: str, keys: Tuple[str, ...], vector: Tuple[float, ...]) -> str:
+    payload = category + "|" + ",".join(keys) + "|" + ",".join(repr(v) for v in vector)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class WeightSchemeRegistry:
+    """权重方案注册表"""
+
+    def __init__(self):
+        self._categories: Dict[str, WeightCategory] = {}
+        self._schemes: Dict[str, Dict[str, CompiledScheme]] = {}
+        self._matrices: Dict[str, np.ndarray] = {}
+        self._custom: "OrderedDict[Tuple[str, Tuple[float, ...]], CompiledScheme]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 注册
+    # ------------------------------------------------------------------
+
+    def register_category(
+        self,
+        category: str,
+        keys: Sequence[str],
+        label: str,
+        schemes: Optional[Dict[str, Dict[str, float]]] = None
+    ):
+        """注册一个权重类别及其全部命名方案"""
+        self._categories[category] = WeightCategory(category, tuple(keys), label)
+        self._schemes[category] = {}
+        for name, weights in (schemes or {}).items():
+            self.register(category, name, weights)
+
+    def register(self, category: str, name: str, weights: Dict[str, float]) -> CompiledScheme:
+        """注册（或覆盖）一个命名方案，返回编译结果"""
+        compiled = self.compile(category, weights, name=name)
+        self._schemes[category][name] = compiled
+        self._matrices.pop(category, None)
+        return compiled
+
+    def compile(self, category: str, weights: Dict[str, float], name: str = "Custom") -> CompiledScheme:
+        """
+        校验并编译一组权重
+
+        异常：
+            ValueError: 类别未知、缺少/多余的键、负权重或总和不为1
+        """
+        spec = self._get_category(category)
+        if not isinstance(weights, dict):
+            raise ValueError(f"{spec.label}权重方案 {name} 必须是键值对")
+
+        missing = [k for k in spec.keys if k not in weights]
+        if missing:
+            raise ValueError(f"{spec.label}权重方案 {name} 缺少权重：{', '.join(missing)}")
+        unknown = [k for k in weights if k not in spec.keys]
+        if unknown:
+            raise ValueError(f"{spec.label}权重方案 {name} 包含未知的权重：{', '.join(unknown)}")
+
+        vector = tuple(float(weights[k]) for k in spec.keys)
+        if any(w < 0 for w in vector):
+            raise ValueError(f"{spec.label}权重方案 {name} 包含负权重")
+        total = sum(vector)
+        if abs(total - 1.0) > WEIGHT_SUM_TOLERANCE:
+            raise ValueError(f"{spec.label}权重方案 {name} 的权重总和为 {total:.3f}，应为 1.000")
+
+        return CompiledScheme(category, name, spec.keys, vector, _digest(category, spec.keys, vector))
+
+    def compile_custom(self, category: str, weights: Dict[str, float]) -> CompiledScheme:
+        """编译自定义权重；相同内容只编译一次"""
+        spec = self._get_category(category)
+        if isinstance(weights, dict) and set(weights) == set(spec.keys):
+            cache_key = (category, tuple(float(weights[k]) for k in spec.keys))
+            with self._lock:
+                cached = self._custom.get(cache_key)
+                if cached is not None:
+                    self._custom.move_to_end(cache_key)
+                    return cached
+        else:
+            cache_key = None
+
+        compiled = self.compile(category, weights)
+        if cache_key is not None:
+            with self._lock:
+                self._custom[cache_key] = compiled
+                while len(self._custom) > MAX_CUSTOM_SCHEMES:
+                    self._custom.popitem(last=False)
+        return compiled
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def _get_category(self, category: str) -> WeightCategory:
+        if category not in self._categories:
+            raise ValueError(f"未知的权重类别：{category}")
+        return self._categories[category]
+
+    def get(self, category: str, name: str) -> CompiledScheme:
+        """按名称获取命名方案"""
+        spec = self._get_category(category)
+        scheme = self._schemes[category].get(name)
+        if scheme is None:
+            raise ValueError(f"未知的{spec.label}权重方案：{name}")
+        return scheme
+
+    def resolve(
+        self,
+        category: str,
+        name: str,
+        custom_weights: Optional[Dict[str, float]] = None
+    ) -> CompiledScheme:
+        """
+        获取评分使用的方案：name 为 "Custom" 时编译 custom_weights，否则按名称查找
+        """
+        if name == "Custom":
+            if custom_weights is None:
+                raise ValueError(f"Custom权重方案需要提供custom_weights参数")
+            return self.compile_custom(category, custom_weights)
+        return self.get(category, name)
+
+    def keys(self, category: str) -> Tuple[str, ...]:
+        return self._get_category(category).keys
+
+    def names(self, category: str) -> List[str]:
+        self._get_category(category)
+        return list(self._schemes[category].keys())
+
+    def matrix(self, category: str) -> np.ndarray:
+        """该类别全部命名方案的权重矩阵 (方案数, 键数)，行顺序与 names() 一致"""
+        matrix = self._matrices.get(category)
+        if matrix is None:
+            keys = self.keys(category)
+            matrix = np.array(
+                [scheme.vector for scheme in self._schemes[category].values()],
+                dtype=np.float64
+            ).reshape(-1, len(keys))
+            matrix.setflags(write=False)
+            self._matrices[category] = matrix
+        return matrix
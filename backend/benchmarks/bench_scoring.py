@@ -0,0 +1,389 @@
+"""
+评分服务与HTTP API的性能基准测试
+
+用法（在 backend 目录下运行）：
+    python -m benchmarks.bench_scoring                         # 运行全部基准并打印结果
+    python -m benchmarks.bench_scoring --output results.json   # 保存机器可读结果
+    python -m benchmarks.bench_scoring --compare baseline.json # 与基线比较，回归时退出码为1
+    python -m benchmarks.bench_scoring --filter full_scores    # 只运行名称包含该字符串的基准
+
+覆盖范围：
+- 各层函数（质量计算、小因子归一化、大因子、阶段总分、最终总分）
+- calculate_full_scores：2-50种试剂 × 3-500个梯度点
+- 评分结果缓存：命中与未命中（命中不快于未命中时退出码为1）
+- 批量评分引擎与权重方案扫描
+- FastAPI 应用（进程内直接调用ASGI接口，不经过网络）
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.core import responses  # noqa: E402
+from app.services import scoring_service  # noqa: E402
+from app.services import batch_scoring  # noqa: E402
+from app.services.result_cache import ScoreResultCache, cached_full_scores, score_cache  # noqa: E402
+
+
+SUB_FACTORS = ["S1", "S2", "S3", "S4", "H1", "H2", "E1", "E2", "E3"]
+CURVES = list(scoring_service.CURVE_INTEGRAL_FACTORS.keys() - {None})
+
+# (试剂数, 梯度点数)
+METHOD_SIZES = {
+    "small": (2, 3),
+    "medium": (5, 20),
+    "large": (20, 100),
+    "huge": (50, 500),
+}
+
+# 默认回归阈值：比基线慢20%以上视为回归
+DEFAULT_THRESHOLD = 0.20
+
+
+# ============================================================================
+# 测试数据
+# ============================================================================
+
+def make_method(n_reagents: int, n_points: int, seed: int = 0) -> Dict:
+    """生成一个确定性的随机方法（calculate_full_scores 关键字参数格式）"""
+    rng = random.Random(seed * 100003 + n_reagents * 1009 + n_points)
+    reagents = [f"Reagent_{k}" for k in range(n_reagents)]
+    time_points = [float(t) for t in range(n_points)]
+    composition = {r: [rng.uniform(0, 100) for _ in range(n_points)] for r in reagents}
+    factors = {r: {sf: round(rng.random(), 3) for sf in SUB_FACTORS} for r in reagents}
+    return {
+        "instrument_time_points": time_points,
+        "instrument_composition": composition,
+        "instrument_flow_rate": 1.0,
+        "instrument_densities": {r: rng.uniform(0.6, 1.5) for r in reagents},
+        "instrument_factor_matrix": factors,
+        "instrument_curve_types": [rng.choice(CURVES) for _ in range(n_points)],
+        "prep_volumes": {r: rng.uniform(0, 20) for r in reagents},
+        "prep_densities": {r: rng.uniform(0.6, 1.5) for r in reagents},
+        "prep_factor_matrix": factors,
+        "p_factor": 40.0,
+        "pretreatment_p_factor": 20.0,
+        "instrument_r_factor": 30.0,
+        "instrument_d_factor": 50.0,
+        "pretreatment_r_factor": 10.0,
+        "pretreatment_d_factor": 60.0,
+    }
+
+
+def to_request_payload(method: Dict) -> Dict:
+    """把评分关键字参数转换为 /scoring/full-score 的请求体"""
+    return {
+        "instrument": {
+            "time_points": method["instrument_time_points"],
+            "composition": method["instrument_composition"],
+            "flow_rate": method["instrument_flow_rate"],
+            "densities": method["instrument_densities"],
+            "factor_matrix": method["instrument_factor_matrix"],
+            "curve_types": method["instrument_curve_types"],
+        },
+        "preparation": {
+            "volumes": method["prep_volumes"],
+            "densities": method["prep_densities"],
+            "factor_matrix": method["prep_factor_matrix"],
+        },
+        "p_factor": method["p_factor"],
+        "pretreatment_p_factor": method["pretreatment_p_factor"],
+        "instrument_r_factor": method["instrument_r_factor"],
+        "instrument_d_factor": method["instrument_d_factor"],
+        "pretreatment_r_factor": method["pretreatment_r_factor"],
+        "pretreatment_d_factor": method["pretreatment_d_factor"],
+    }
+
+
+# ============================================================================
+# 计时
+# ============================================================================
+
+def measure(func: Callable[[], object], min_time: float = 0.2, repeat: int = 5) -> Dict[str, float]:
+    """
+    多轮计时：先标定每轮循环次数使单轮耗时约 min_time 秒，再重复 repeat 轮
+
+    返回：
+        单次调用耗时统计（毫秒）
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops * 1000.0)
+
+    return {
+        "loops": loops,
+        "repeat": repeat,
+        "min_ms": min(samples),
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.mean(samples),
+        "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+# ============================================================================
+# ASGI进程内客户端
+# ============================================================================
+
+async def asgi_request(app, method: str, path: str, body: Optional[bytes] = None) -> int:
+    """直接调用ASGI应用完成一次HTTP请求，返回状态码（不依赖网络和第三方客户端）"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    messages = [{"type": "http.request", "body": body or b"", "more_body": False}]
+    status = {}
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await app(scope, receive, send)
+    return status.get("code", 0)
+
+
+# ============================================================================
+# 基准用例
+# ============================================================================
+
+def build_benchmarks() -> Dict[str, Callable[[], object]]:
+    """返回 {基准名称: 无参调用}"""
+    benchmarks: Dict[str, Callable[[], object]] = {}
+
+    # ---------- 各层函数 ----------
+    for label, (n_reagents, n_points) in METHOD_SIZES.items():
+        m = make_method(n_reagents, n_points)
+        masses = scoring_service.calculate_gradient_integral(
+            m["instrument_time_points"], m["instrument_composition"],
+            m["instrument_flow_rate"], m["instrument_densities"], m["instrument_curve_types"]
+        )
+        sub_scores = scoring_service.calculate_all_sub_factors(masses, m["instrument_factor_matrix"])
+
+        benchmarks[f"layer0.gradient_integral.{label}"] = (
+            lambda m=m: scoring_service.calculate_gradient_integral(
+                m["instrument_time_points"], m["instrument_composition"],
+                m["instrument_flow_rate"], m["instrument_densities"], m["instrument_curve_types"]
+            )
+        )
+        benchmarks[f"layer0.prep_masses.{label}"] = (
+            lambda m=m: scoring_service.calculate_prep_masses(m["prep_volumes"], m["prep_densities"])
+        )
+        benchmarks[f"layer1.sub_factors.{label}"] = (
+            lambda masses=masses, m=m: scoring_service.calculate_all_sub_factors(masses, m["instrument_factor_matrix"])
+        )
+        if label == "small":
+            major = {"S": 50.0, "H": 40.0, "E": 30.0}
+            benchmarks["layer2.merge_sub_factors"] = (
+                lambda s=sub_scores: scoring_service.merge_sub_factors(s, s, "Standard")
+            )
+            benchmarks["layer3.major_factor"] = (
+                lambda s=sub_scores: scoring_service.calculate_major_factor(s, "S", "PBT_Balanced")
+            )
+            benchmarks["layer4.score1"] = (
+                lambda: scoring_service.calculate_score1(major, 40.0, 30.0, 50.0, "Balanced")
+            )
+            benchmarks["layer4.score2"] = (
+                lambda: scoring_service.calculate_score2(major, 10.0, 60.0, 20.0, "Balanced")
+            )
+            benchmarks["layer5.score3"] = (
+                lambda: scoring_service.calculate_score3(70.0, 60.0, "Standard")
+            )
+
+    # ---------- 完整评分 ----------
+    for n_reagents in (2, 10, 50):
+        for n_points in (3, 50, 500):
+            m = make_method(n_reagents, n_points)
+            benchmarks[f"full_scores.r{n_reagents}_p{n_points}"] = (
+                lambda m=m: scoring_service.calculate_full_scores(**m)
+            )
+
+    # ---------- 评分结果缓存（命中须快于未命中，见 cache_violations） ----------
+    for label, (n_reagents, n_points) in METHOD_SIZES.items():
+        m = make_method(n_reagents, n_points)
+        cache = ScoreResultCache(max_entries=4)
+        cached_full_scores(m, cache)
+
+        def miss(m=m, cache=cache):
+            cache.invalidate()
+            cached_full_scores(m, cache)
+
+        benchmarks[f"cache.full_score.miss.{label}"] = miss
+        benchmarks[f"cache.full_score.hit.{label}"] = lambda m=m, cache=cache: cached_full_scores(m, cache)
+
+    # ---------- 批量引擎与方案扫描 ----------
+    for n_methods in (100, 1000):
+        methods = [make_method(5, 20, seed=i) for i in range(n_methods)]
+        benchmarks[f"batch.methods{n_methods}_r5_p20"] = (
+            lambda methods=methods: batch_scoring.calculate_batch_scores(methods)
+        )
+    sweep_method = make_method(5, 20)
+    benchmarks["sweep.r5_p20"] = lambda: batch_scoring.calculate_scheme_sweep(sweep_method)
+
+    # ---------- 响应序列化 ----------
+    batch_results = batch_scoring.calculate_batch_scores(methods)
+    benchmarks["serialize.batch1000.json"] = lambda: json.dumps(batch_results, ensure_ascii=False).encode("utf-8")
+    benchmarks["serialize.batch1000.fast"] = lambda: responses.dumps(batch_results)
+
+    # ---------- HTTP API（进程内ASGI） ----------
+    from main import app
+    loop = asyncio.new_event_loop()
+
+    def api_call(method: str, path: str, payload: Optional[Dict] = None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        status = loop.run_until_complete(asgi_request(app, method, path, body))
+        if status != 200:
+            raise RuntimeError(f"{method} {path} 返回 {status}")
+
+    benchmarks["api.health"] = lambda: api_call("GET", "/health")
+    benchmarks["api.weight_schemes"] = lambda: api_call("GET", "/api/v1/scoring/weight-schemes")
+    for label in ("small", "large", "huge"):
+        payload = to_request_payload(make_method(*METHOD_SIZES[label]))
+
+        def full_score(payload=payload):
+            # 清空结果缓存，测量的是完整计算路径
+            score_cache.invalidate()
+            api_call("POST", "/api/v1/scoring/full-score", payload)
+
+        benchmarks[f"api.full_score.{label}"] = full_score
+        if label == "small":  # 更大的方法超过 SCORE_CACHE_MAX_COST，不走缓存
+            benchmarks[f"api.full_score_cached.{label}"] = (
+                lambda payload=payload: api_call("POST", "/api/v1/scoring/full-score", payload)
+            )
+    batch_payload = {"methods": [to_request_payload(make_method(5, 20, seed=i)) for i in range(100)]}
+    benchmarks["api.batch.methods100"] = lambda: api_call("POST", "/api/v1/scoring/batch", batch_payload)
+
+    return benchmarks
+
+
+# ============================================================================
+# 运行与比较
+# ============================================================================
+
+def run(name_filter: Optional[str], min_time: float, repeat: int) -> Dict:
+    results = {}
+    for name, func in build_benchmarks().items():
+        if name_filter and name_filter not in name:
+            continue
+        stats = measure(func, min_time=min_time, repeat=repeat)
+        results[name] = stats
+        print(f"{name:<40} median {stats['median_ms']:>10.4f} ms   min {stats['min_ms']:>10.4f} ms", flush=True)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    与基线比较各基准的中位数耗时
+
+    返回：
+        回归的基准名称列表（比基线慢 threshold 以上）
+    """
+    regressions = []
+    print(f"\n{'benchmark':<40} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, stats in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"{name:<40} {'-':>12} {stats['median_ms']:>12.4f} {'new':>9}")
+            continue
+        change = stats["median_ms"] / base["median_ms"] - 1.0 if base["median_ms"] > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  <-- 回归"
+        print(f"{name:<40} {base['median_ms']:>12.4f} {stats['median_ms']:>12.4f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def cache_violations(current: Dict) -> List[str]:
+    """
+    检查缓存命中是否快于未命中
+
+    返回：
+        命中耗时不低于未命中的方法规模列表
+    """
+    results = current["results"]
+    violations = []
+    for label in METHOD_SIZES:
+        hit = results.get(f"cache.full_score.hit.{label}")
+        miss = results.get(f"cache.full_score.miss.{label}")
+        if hit and miss and hit["median_ms"] >= miss["median_ms"]:
+            violations.append(label)
+    return violations
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="LC GAUGE 评分服务性能基准")
+    parser.add_argument("--output", type=Path, help="把结果写入JSON文件")
+    parser.add_argument("--compare", type=Path, help="与基线JSON文件比较")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="回归阈值（默认0.20即20%%）")
+    parser.add_argument("--filter", dest="name_filter", help="只运行名称包含该字符串的基准")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每轮最少计时秒数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复轮数")
+    args = parser.parse_args(argv)
+
+    current = run(args.name_filter, args.min_time, args.repeat)
+
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n结果已保存到 {args.output}")
+
+    violations = cache_violations(current)
+    if violations:
+        print(f"\n缓存命中不快于未命中: {', '.join(violations)}")
+        return 1
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能回归: {', '.join(regressions)}")
+            return 1
+        print("\n未发现性能回归")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
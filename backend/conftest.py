@@ -0,0 +1,82 @@
+"""
+测试共用的随机方法工厂
+"""
+import random
+import sys
+sys.path.append('.')
+
+import pytest
+
+from app.services import scoring_service
+
+SUB_FACTORS = ["S1", "S2", "S3", "S4", "H1", "H2", "E1", "E2", "E3"]
+CURVES = ['linear', 'pre-step', 'post-step', 'weak-convex', 'strong-concave', 'ultra-convex']
+PARAMETER_KEYS = [
+    "p_factor", "pretreatment_p_factor", "instrument_r_factor", "instrument_d_factor",
+    "pretreatment_r_factor", "pretreatment_d_factor", "safety_scheme", "health_scheme",
+    "environment_scheme", "instrument_stage_scheme", "prep_stage_scheme", "final_scheme",
+]
+
+
+def random_method(rng: random.Random, n_reagents: int, n_points: int) -> dict:
+    """生成一个随机方法（评分服务关键字参数格式）"""
+    reagents = [f"R{k}" for k in range(n_reagents)]
+    time_points = sorted(rng.uniform(0, 60) for _ in range(n_points))
+    composition = {r: [rng.uniform(0, 100) for _ in range(n_points)] for r in reagents}
+    factors = {r: {sf: rng.random() for sf in SUB_FACTORS} for r in reagents}
+    prep_reagents = reagents[:max(1, n_reagents // 2)]
+    return {
+        "instrument_time_points": time_points,
+        "instrument_composition": composition,
+        "instrument_flow_rate": rng.uniform(0.2, 2.0),
+        "instrument_densities": {r: rng.uniform(0.6, 1.5) for r in reagents},
+        "instrument_factor_matrix": factors,
+        "instrument_curve_types": [rng.choice(CURVES) for _ in range(n_points)],
+        "prep_volumes": {r: rng.uniform(0, 20) for r in prep_reagents},
+        "prep_densities": {r: rng.uniform(0.6, 1.5) for r in prep_reagents},
+        "prep_factor_matrix": {r: factors[r] for r in prep_reagents},
+        "p_factor": rng.uniform(0, 100),
+        "pretreatment_p_factor": rng.uniform(0, 100),
+        "instrument_r_factor": rng.uniform(0, 100),
+        "instrument_d_factor": rng.uniform(0, 100),
+        "pretreatment_r_factor": rng.uniform(0, 100),
+        "pretreatment_d_factor": rng.uniform(0, 100),
+        "safety_scheme": rng.choice(list(scoring_service.SAFETY_WEIGHTS)),
+        "health_scheme": rng.choice(list(scoring_service.HEALTH_WEIGHTS)),
+        "environment_scheme": rng.choice(list(scoring_service.ENVIRONMENT_WEIGHTS)),
+        "instrument_stage_scheme": rng.choice(list(scoring_service.INSTRUMENT_STAGE_WEIGHTS)),
+        "prep_stage_scheme": rng.choice(list(scoring_service.PREPARATION_STAGE_WEIGHTS)),
+        "final_scheme": rng.choice(list(scoring_service.FINAL_WEIGHTS)),
+    }
+
+
+def method_payload(method: dict) -> dict:
+    """把评分关键字参数转换为 /scoring/full-score 的请求体"""
+    return {
+        "instrument": {
+            "time_points": method["instrument_time_points"],
+            "composition": method["instrument_composition"],
+            "flow_rate": method["instrument_flow_rate"],
+            "densities": method["instrument_densities"],
+            "factor_matrix": method["instrument_factor_matrix"],
+            "curve_types": method["instrument_curve_types"],
+        },
+        "preparation": {
+            "volumes": method["prep_volumes"],
+            "densities": method["prep_densities"],
+            "factor_matrix": method["prep_factor_matrix"],
+        },
+        **{key: method[key] for key in PARAMETER_KEYS},
+    }
+
+
+@pytest.fixture
+def make_method():
+    """随机方法工厂：make_method(rng, n_reagents, n_points)"""
+    return random_method
+
+
+@pytest.fixture
+def to_request_payload():
+    """评分关键字参数 -> 请求体"""
+    return method_payload
@@ -10,7 +10,12 @@ import io
 
 from app.api.routes import router
 from app.core.config import settings
-from app.database.connection import init_db
+from app.core.logging_config import configure_logging, ServerTimingMiddleware
+from app.core.responses import CompressionMiddleware
+from app.database.connection import init_db, dispose_engines
+from app.services.executor import compute_executor
+from app.services.job_queue import job_queue
+from app.services.reagent_library import reagent_library
 
 # Force UTF-8 encoding for stdout/stderr to avoid GBK errors
 if sys.platform == 'win32':
@@ -18,13 +23,23 @@ if sys.platform == 'win32':
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
 
+configure_logging()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifecycle management"""
     # Initialize database on startup
     await init_db()
+    # 加载试剂因子库索引（首次启动时写入内置试剂）
+    await reagent_library.load()
+    # 启动后台评分任务工作协程
+    await job_queue.start(settings.JOB_WORKERS)
     yield
     # Cleanup resources on shutdown
+    await job_queue.stop()
+    compute_executor.shutdown()
+    await dispose_engines()
 
 
 app = FastAPI(
@@ -41,8 +56,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Methods-Scored", "X-Methods-Failed"],
 )
 
+# 评分各层耗时写入 Server-Timing 响应头
+if settings.SERVER_TIMING:
+    app.add_middleware(ServerTimingMiddleware)
+
+# 按 Accept-Encoding 协商gzip压缩（批量评分等大响应）
+if settings.GZIP_MIN_SIZE > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.GZIP_MIN_SIZE, compresslevel=settings.GZIP_LEVEL)
+
 # Register routes
 app.include_router(router, prefix="/api/v1")
 
@@ -67,6 +91,10 @@ if __name__ == "__main__":
     import sys
     import os
     import socket
+    import multiprocessing
+    
+    # 打包后的exe启动评分进程池时需要
+    multiprocessing.freeze_support()
     
     # 检测是否是PyInstaller打包的exe
     is_frozen = getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS')
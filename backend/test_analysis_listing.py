@@ -0,0 +1,97 @@
+"""
+测试HPLC分析列表的游标分页、排序与筛选
+"""
+import asyncio
+import random
+import sys
+sys.path.append('.')
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.connection import Base, _add_missing_columns
+from app.database.models import HPLCAnalysis
+from app.services.analysis_listing import build_list_query, build_page, encode_cursor
+
+
+def make_rows(n: int):
+    rng = random.Random(17)
+    rows = []
+    for i in range(n):
+        # 得分有重复、有空值；一半记录的 created_at 相同（数据库默认值）
+        score = None if i % 9 == 0 else rng.choice([55.5, 60.0, 72.25, 80.0, 91.0])
+        rows.append(HPLCAnalysis(name=f"方法{i}", score1=score, score2=score, score3=score))
+    return rows
+
+
+async def collect(engine, **params):
+    """按 next_cursor 翻完所有页"""
+    ids, cursor = [], None
+    async with AsyncSession(engine) as db:
+        while True:
+            stmt = build_list_query(limit=7, cursor=cursor, **params)
+            page = build_page((await db.execute(stmt)).all(), params.get("sort_by", "id"), params.get("order", "desc"), 7)
+            ids.extend(item["id"] for item in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+
+def test_keyset_pagination_visits_every_row_once(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'list.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as db:
+            db.add_all(make_rows(60))
+            await db.commit()
+            all_rows = (await db.execute(text("SELECT id, score3, created_at FROM hplc_analyses"))).all()
+
+        results = {
+            "id_desc": await collect(engine),
+            "score_desc": await collect(engine, sort_by="score3", order="desc"),
+            "score_asc_filtered": await collect(engine, sort_by="score3", order="asc", min_score=60, max_score=80),
+            "created_asc": await collect(engine, sort_by="created_at", order="asc"),
+        }
+        async with engine.connect() as conn:
+            plan = (await conn.execute(
+                text("EXPLAIN QUERY PLAN SELECT id FROM hplc_analyses WHERE score3 IS NOT NULL ORDER BY score3 DESC, id DESC")
+            )).all()
+        await engine.dispose()
+        return all_rows, results, plan
+
+    all_rows, results, plan = asyncio.run(scenario())
+
+    assert results["id_desc"] == sorted((r.id for r in all_rows), reverse=True)
+    scored = [r for r in all_rows if r.score3 is not None]
+    assert results["score_desc"] == [r.id for r in sorted(scored, key=lambda r: (r.score3, r.id), reverse=True)]
+    assert results["score_asc_filtered"] == [
+        r.id for r in sorted(scored, key=lambda r: (r.score3, r.id)) if 60 <= r.score3 <= 80
+    ]
+    assert results["created_asc"] == sorted(r.id for r in all_rows)
+    assert "ix_hplc_analyses_score3" in " ".join(str(row) for row in plan)
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        build_list_query(sort_by="green_score")
+    with pytest.raises(ValueError, match="不一致"):
+        build_list_query(sort_by="score3", cursor=encode_cursor("score1", "desc", 50.0, 3))
+
+
+def test_missing_columns_are_added_to_old_tables(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE hplc_analyses (id INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL)"))
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_add_missing_columns)
+            columns = {row[1] for row in (await conn.execute(text("PRAGMA table_info(hplc_analyses)"))).all()}
+            indexes = {row[1] for row in (await conn.execute(text("PRAGMA index_list(hplc_analyses)"))).all()}
+        await engine.dispose()
+        return columns, indexes
+
+    columns, indexes = asyncio.run(scenario())
+    assert {"score1", "score2", "score3", "created_at"} <= columns
+    assert "ix_hplc_analyses_score3" in indexes
@@ -0,0 +1,49 @@
+"""
+测试分析记录保存完整评分结果及批量插入
+"""
+import asyncio
+import random
+import sys
+sys.path.append('.')
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.connection import Base
+from app.database.models import HPLCAnalysis
+from app.schemas.schemas import HPLCAnalysisCreate
+from app.services import scoring_service
+from app.services.analysis_records import analysis_values
+
+
+BASE = {"name": "方法", "solvent_a": "Methanol", "solvent_b": "Water", "flow_rate": 1.0, "column_type": "C18", "temperature": 30}
+
+
+def test_values_keep_full_result_and_legacy_fallback(tmp_path, make_method, to_request_payload):
+    method = make_method(random.Random(0), 3, 6)
+    scored = HPLCAnalysisCreate(**BASE, scoring=to_request_payload(method))
+    legacy = HPLCAnalysisCreate(**BASE, ratio_a=0.8)
+    result = scoring_service.calculate_full_scores(**method)
+
+    rows = [analysis_values(scored, result), analysis_values(legacy)]
+    assert rows[0].keys() == rows[1].keys()
+    assert rows[0]["score3"] == result["final"]["score3"] == rows[0]["green_score"]
+    assert rows[0]["raw_data"]["instrument"]["flow_rate"] == method["instrument_flow_rate"]
+    assert rows[1]["score3"] is None and rows[1]["green_score"] is not None
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bulk.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as db:
+            stmt = insert(HPLCAnalysis).returning(HPLCAnalysis.id, sort_by_parameter_order=True)
+            ids = (await db.execute(stmt, rows * 50)).scalars().all()
+            await db.commit()
+            stored = (await db.execute(select(HPLCAnalysis).where(HPLCAnalysis.id == ids[0]))).scalar_one()
+        await engine.dispose()
+        return ids, stored
+
+    ids, stored = asyncio.run(scenario())
+    assert len(ids) == 100 and ids == sorted(ids)
+    assert stored.analysis_results["final"]["score3"] == result["final"]["score3"]
+    assert stored.score1 == result["instrument"]["score1"]
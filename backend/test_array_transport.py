@@ -0,0 +1,70 @@
+"""
+测试二进制数组传输格式
+"""
+import sys
+sys.path.append('.')
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from app.services.array_transport import (
+    ALIGNMENT,
+    batch_scores_binary,
+    decode_arrays,
+    encode_arrays,
+    scheme_sweep_binary,
+    wants_arrays,
+)
+from app.services.batch_scoring import calculate_batch_scores, calculate_scheme_sweep, SUB_FACTOR_NAMES
+
+
+def test_roundtrip_is_aligned_and_zero_copy():
+    columns = {"a": np.arange(7, dtype=np.float64), "b": np.ones((3, 9)), "counts": np.array([1, 2, 3])}
+    data = encode_arrays(columns, {"note": "测试"})
+    meta, arrays = decode_arrays(data)
+
+    assert meta == {"note": "测试"}
+    for name, values in columns.items():
+        np.testing.assert_array_equal(arrays[name], values)
+    assert arrays["counts"].dtype == np.dtype("<i8")
+    assert all(arrays[name].ctypes.data % ALIGNMENT == np.frombuffer(data, np.uint8).ctypes.data % ALIGNMENT for name in arrays)
+    assert not arrays["a"].flags.owndata
+
+    with pytest.raises(ValueError):
+        decode_arrays(b"not arrays")
+
+
+def test_batch_binary_matches_json(make_method):
+    rng = random.Random(16)
+    methods = [make_method(rng, rng.randint(1, 5), rng.randint(2, 8)) for _ in range(10)]
+    expected = calculate_batch_scores(methods)
+    meta, arrays = decode_arrays(batch_scores_binary(methods))
+
+    assert meta["methods"] == 10
+    masses = iter(arrays["instrument_masses"])
+    for i, result in enumerate(expected):
+        assert round(arrays["score3"][i], 2) == result["final"]["score3"]
+        assert list(arrays["merged_sub_factors"][i].round(2)) == [result["merged"]["sub_factors"][k] for k in SUB_FACTOR_NAMES]
+        assert meta["instrument_reagents"][i] == list(result["instrument"]["masses"])
+        for mass in result["instrument"]["masses"].values():
+            assert math.isclose(next(masses), mass, rel_tol=1e-12, abs_tol=1e-12)
+
+
+def test_sweep_binary_matches_json(make_method):
+    method = make_method(random.Random(3), 3, 5)
+    expected = calculate_scheme_sweep(method)
+    meta, arrays = decode_arrays(scheme_sweep_binary(method))
+
+    assert meta["combinations"] == expected["combinations"]
+    assert list(meta["axes"]) == list(expected["axes"])
+    assert np.round(arrays["score3"], 2).tolist() == expected["score3"]
+
+
+def test_accept_negotiation():
+    assert wants_arrays("application/vnd.lcgauge.arrays")
+    assert wants_arrays("application/json;q=0.5, application/vnd.lcgauge.arrays")
+    assert not wants_arrays("application/json")
+    assert not wants_arrays(None)
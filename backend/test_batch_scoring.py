@@ -0,0 +1,84 @@
+"""
+测试批量评分引擎与逐个评分结果一致
+"""
+import sys
+sys.path.append('.')
+
+import math
+import random
+
+from app.services import scoring_service
+from app.services.batch_scoring import calculate_batch_scores, calculate_scheme_sweep
+
+
+def assert_nested_close(actual, expected, path="result"):
+    if isinstance(expected, dict):
+        assert list(actual.keys()) == list(expected.keys()), path
+        for key in expected:
+            assert_nested_close(actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, float):
+        assert math.isclose(actual, expected, rel_tol=1e-12, abs_tol=1e-9), f"{path}: {actual} != {expected}"
+    else:
+        assert actual == expected, path
+
+
+def test_batch_matches_single_scoring(make_method):
+    rng = random.Random(42)
+    methods = [make_method(rng, rng.randint(1, 6), rng.randint(2, 12)) for _ in range(25)]
+
+    batch_results = calculate_batch_scores(methods)
+
+    assert len(batch_results) == len(methods)
+    for method, batch_result in zip(methods, batch_results):
+        assert_nested_close(batch_result, scoring_service.calculate_full_scores(**method))
+
+
+def test_batch_custom_weights(make_method):
+    rng = random.Random(7)
+    method = make_method(rng, 3, 5)
+    method["safety_scheme"] = "Custom"
+    method["instrument_stage_scheme"] = "Custom"
+    method["prep_stage_scheme"] = "Custom"
+    method["custom_weights"] = {
+        "safety": {"S1": 0.4, "S2": 0.3, "S3": 0.2, "S4": 0.1},
+        "stage": {"S": 0.2, "H": 0.2, "E": 0.2, "R": 0.1, "D": 0.1, "P": 0.2},
+    }
+
+    assert_nested_close(
+        calculate_batch_scores([method])[0],
+        scoring_service.calculate_full_scores(**method)
+    )
+
+
+def test_batch_rejects_missing_density(make_method):
+    rng = random.Random(3)
+    method = make_method(rng, 2, 3)
+    method["instrument_densities"].pop("R1")
+
+    try:
+        calculate_batch_scores([method])
+    except ValueError as e:
+        assert "R1" in str(e)
+    else:
+        raise AssertionError("缺少密度时应抛出ValueError")
+
+
+def test_scheme_sweep_matches_single_scoring(make_method):
+    rng = random.Random(11)
+    method = make_method(rng, 4, 6)
+
+    sweep = calculate_scheme_sweep(method)
+
+    assert sweep["combinations"] == 4096
+    axes = sweep["axes"]
+    for _ in range(20):
+        selection = {name: rng.choice(schemes) for name, schemes in axes.items()}
+        expected = scoring_service.calculate_full_scores(**{**method, **selection})
+        cell = sweep["score3"]
+        for name, schemes in axes.items():
+            cell = cell[schemes.index(selection[name])]
+        assert math.isclose(cell, expected["final"]["score3"], abs_tol=0.011)
+
+    summary = sweep["summary"]["score3"]
+    assert summary["min"] <= summary["mean"] <= summary["max"]
+    assert set(summary["argmax"]) == set(axes)
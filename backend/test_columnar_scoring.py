@@ -0,0 +1,79 @@
+"""
+测试列式评分与批量引擎结果一致
+"""
+import sys
+sys.path.append('.')
+
+import math
+import random
+
+import pytest
+
+from app.services.batch_scoring import calculate_batch_scores, SUB_FACTOR_NAMES, WEIGHT_ARRAY_SPECS
+from app.services.columnar_scoring import calculate_columnar_scores, to_columnar
+
+
+def test_columnar_matches_batch(make_method):
+    rng = random.Random(14)
+    methods = [make_method(rng, rng.randint(1, 6), rng.randint(1, 12)) for _ in range(25)]
+    # 列式格式所有方法共用一组权重方案
+    for method in methods[1:]:
+        for _, field_name, _, _, _ in WEIGHT_ARRAY_SPECS:
+            method[field_name] = methods[0][field_name]
+
+    expected = calculate_batch_scores(methods)
+    result = calculate_columnar_scores(to_columnar(methods))
+
+    assert result["score3"] == [r["final"]["score3"] for r in expected]
+    assert result["score1"] == [r["instrument"]["score1"] for r in expected]
+    assert result["score2"] == [r["preparation"]["score2"] for r in expected]
+    n = len(SUB_FACTOR_NAMES)
+    inst_row = prep_row = 0
+    for i, r in enumerate(expected):
+        assert result["merged_sub_factors"][i * n:(i + 1) * n] == [r["merged"]["sub_factors"][k] for k in SUB_FACTOR_NAMES]
+        for mass in r["instrument"]["masses"].values():
+            assert math.isclose(result["instrument_masses"][inst_row], mass, rel_tol=1e-12, abs_tol=1e-12)
+            inst_row += 1
+        for mass in r["preparation"]["masses"].values():
+            assert math.isclose(result["prep_masses"][prep_row], mass, rel_tol=1e-12)
+            prep_row += 1
+
+
+def test_columnar_validation(make_method):
+    rng = random.Random(1)
+    payload = to_columnar([make_method(rng, 2, 3)])
+
+    broken = dict(payload, composition=payload["composition"][:-1])
+    with pytest.raises(ValueError, match="composition"):
+        calculate_columnar_scores(broken)
+
+    factors = list(payload["instrument_factors"])
+    factors[4] = 1.5
+    with pytest.raises(ValueError, match="R0 的 H1"):
+        calculate_columnar_scores(dict(payload, instrument_factors=factors))
+
+    with pytest.raises(ValueError, match="flow_rate"):
+        calculate_columnar_scores(dict(payload, flow_rate=[-5.0]))
+    with pytest.raises(ValueError, match="flow_rate"):
+        calculate_columnar_scores(dict(payload, flow_rate=[float("nan")]))
+    composition = list(payload["composition"])
+    composition[2] = float("nan")
+    with pytest.raises(ValueError, match=r"composition\[2\]"):
+        calculate_columnar_scores(dict(payload, composition=composition))
+    with pytest.raises(ValueError, match="instrument_densities"):
+        calculate_columnar_scores(dict(payload, instrument_densities=[1.0, float("inf")]))
+    with pytest.raises(ValueError, match="方法 #0 的梯度时间点"):
+        calculate_columnar_scores(dict(payload, time_points=payload["time_points"][::-1]))
+
+
+def test_time_order_is_checked_within_methods_only(make_method):
+    rng = random.Random(2)
+    methods = [make_method(rng, 2, 3) for _ in range(3)]
+    payload = to_columnar(methods)
+    # 方法之间的边界允许时间回到0
+    payload["time_points"] = [0.0, 5.0, 10.0] * 3
+    assert len(calculate_columnar_scores(payload)["score3"]) == 3
+
+    payload["time_points"] = [0.0, 5.0, 10.0, 0.0, 5.0, 10.0, 0.0, 8.0, 6.0]
+    with pytest.raises(ValueError, match=r"方法 #2 .*time_points\[8\]"):
+        calculate_columnar_scores(payload)
@@ -0,0 +1,56 @@
+"""
+测试SQLite连接调优（PRAGMA、只读连接、WAL下读写并发）
+"""
+import asyncio
+import sys
+sys.path.append('.')
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database.connection import create_engine_for, sqlite_pragmas
+from app.core.config import settings
+
+
+def test_pragmas_and_read_write_split(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}"
+
+    async def scenario():
+        writer = create_engine_for(url)
+        reader = create_engine_for(url, read_only=True, pool_size=2)
+        try:
+            async with writer.begin() as conn:
+                await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+                await conn.execute(text("INSERT INTO t VALUES (1)"))
+
+            async with writer.connect() as conn:
+                journal = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+                busy = (await conn.execute(text("PRAGMA busy_timeout"))).scalar()
+                cache = (await conn.execute(text("PRAGMA cache_size"))).scalar()
+
+            # 写事务未提交时，只读连接仍能读到已提交的数据
+            async with writer.begin() as write_conn:
+                await write_conn.execute(text("INSERT INTO t VALUES (2)"))
+                async with reader.connect() as read_conn:
+                    visible = (await read_conn.execute(text("SELECT COUNT(*) FROM t"))).scalar()
+
+            async with reader.connect() as read_conn:
+                with pytest.raises(OperationalError):
+                    await read_conn.execute(text("INSERT INTO t VALUES (3)"))
+            return journal, busy, cache, visible
+        finally:
+            await writer.dispose()
+            await reader.dispose()
+
+    journal, busy, cache, visible = asyncio.run(scenario())
+    assert journal.upper() == settings.SQLITE_JOURNAL_MODE.upper()
+    assert busy == settings.SQLITE_BUSY_TIMEOUT_MS
+    assert cache == -settings.SQLITE_CACHE_SIZE_KB
+    assert visible == 1
+
+
+def test_invalid_pragma_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SQLITE_JOURNAL_MODE", "WAL; DROP TABLE t")
+    with pytest.raises(ValueError):
+        sqlite_pragmas()
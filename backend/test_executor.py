@@ -0,0 +1,49 @@
+"""
+测试CPU密集型计算在线程/进程池中的调度
+"""
+import asyncio
+import random
+import sys
+sys.path.append('.')
+
+from app.core.logging_config import capture_timings
+from app.services import scoring_service
+from app.services.executor import ComputeExecutor, scoring_cost
+
+
+def test_process_and_thread_paths_match_direct_call(make_method):
+    method = make_method(random.Random(3), 4, 12)
+    expected = scoring_service.calculate_full_scores(**method)
+    executor = ComputeExecutor(workers=1, process_threshold=10)
+
+    async def run_both():
+        with capture_timings() as timings:
+            in_thread = await executor.run(scoring_service.calculate_full_scores, cost=0, **method)
+            in_process = await executor.run(scoring_service.calculate_full_scores, cost=10, **method)
+        return in_thread, in_process, timings
+
+    try:
+        in_thread, in_process, timings = asyncio.run(run_both())
+    finally:
+        executor.shutdown()
+
+    assert in_thread == expected
+    assert in_process == expected
+    # 工作线程和进程中的分层耗时都合并回调用方
+    assert {"mass", "normalize", "major", "stage", "final"} <= set(timings)
+
+
+def test_errors_propagate_and_cost_estimate(make_method):
+    method = make_method(random.Random(4), 4, 12)
+    executor = ComputeExecutor(workers=1, process_threshold=10, enabled=False)
+    bad = {**method, "instrument_densities": {}}
+
+    try:
+        asyncio.run(executor.run(scoring_service.calculate_full_scores, cost=100, **bad))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("缺少密度时应抛出 ValueError")
+
+    points = len(method["instrument_time_points"])
+    assert scoring_cost(method) == len(method["instrument_composition"]) * points + len(method["prep_volumes"])
@@ -0,0 +1,96 @@
+"""
+测试向量化梯度积分与原逐段循环的结果逐位一致
+"""
+import sys
+sys.path.append('.')
+
+import random
+
+from app.services.scoring_service import calculate_gradient_integral
+
+CURVES = [
+    'linear', 'initial', 'pre-step', 'post-step', 'weak-convex', 'medium-convex', 'strong-convex',
+    'ultra-convex', 'weak-concave', 'medium-concave', 'strong-concave', 'ultra-concave',
+]
+
+
+def reference_curve_factor(curve_type):
+    """原实现的 if/elif 积分系数"""
+    if curve_type in ['linear', 'initial', None]:
+        return 0.5
+    elif curve_type == 'pre-step':
+        return 1.0
+    elif curve_type == 'post-step':
+        return 0.0
+    elif curve_type == 'weak-convex':
+        return 2.0 / 3.0
+    elif curve_type == 'medium-convex':
+        return 3.0 / 4.0
+    elif curve_type == 'strong-convex':
+        return 4.0 / 5.0
+    elif curve_type == 'ultra-convex':
+        return 6.0 / 7.0
+    elif curve_type == 'weak-concave':
+        return 1.0 / 3.0
+    elif curve_type == 'medium-concave':
+        return 1.0 / 4.0
+    elif curve_type == 'strong-concave':
+        return 1.0 / 5.0
+    elif curve_type == 'ultra-concave':
+        return 1.0 / 7.0
+    else:
+        return 0.5
+
+
+def reference_gradient_integral(time_points, composition_data, flow_rate, reagent_densities, curve_types=None):
+    """原实现：逐试剂、逐时间段循环累加"""
+    reagent_masses = {}
+    if curve_types is None:
+        curve_types = ['linear'] * len(time_points)
+
+    for reagent, percentages in composition_data.items():
+        density = reagent_densities[reagent]
+        total_mass = 0.0
+        for i in range(len(time_points) - 1):
+            t1, t2 = time_points[i], time_points[i + 1]
+            p1, p2 = percentages[i] / 100.0, percentages[i + 1] / 100.0
+            curve_type = curve_types[i + 1] if i + 1 < len(curve_types) else 'linear'
+            integral_factor = reference_curve_factor(curve_type)
+            volume_segment = flow_rate * (t2 - t1)
+            avg_percentage = p1 + (p2 - p1) * integral_factor
+            total_mass += volume_segment * avg_percentage * density
+        reagent_masses[reagent] = total_mass
+    return reagent_masses
+
+
+def random_curve_types(rng, n_points):
+    choice = rng.randrange(4)
+    if choice == 0:
+        return None
+    length = n_points if choice == 1 else rng.randint(0, n_points)  # 可能短于时间点数
+    pool = CURVES + [None, 'unknown-curve', '']
+    return [rng.choice(pool) for _ in range(length)]
+
+
+def test_matches_reference_loop_bit_for_bit():
+    rng = random.Random(2024)
+    for _ in range(500):
+        n_points = rng.randint(1, 40)
+        reagents = [f"R{k}" for k in range(rng.randint(1, 6))]
+        time_points = sorted(rng.uniform(0, 60) for _ in range(n_points))
+        if rng.random() < 0.2:
+            time_points = [float(round(t)) for t in time_points]  # 含相同时间点（零时长段）
+        composition = {
+            r: [rng.choice([0, 100, rng.randint(0, 100), rng.uniform(0, 100)]) for _ in range(n_points)]
+            for r in reagents
+        }
+        flow_rate = rng.uniform(0.05, 3.0)
+        densities = {r: rng.uniform(0.6, 1.6) for r in reagents}
+        curve_types = random_curve_types(rng, n_points)
+
+        expected = reference_gradient_integral(time_points, composition, flow_rate, densities, curve_types)
+        actual = calculate_gradient_integral(time_points, composition, flow_rate, densities, curve_types)
+
+        assert list(actual) == list(expected)
+        for reagent in reagents:
+            assert actual[reagent] == expected[reagent], (reagent, curve_types)
@@ -0,0 +1,80 @@
+"""
+测试后台评分任务队列（提交、分块进度、取消、结果持久化、重启恢复）
+"""
+import asyncio
+import random
+import sys
+sys.path.append('.')
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.database.connection import Base
+from app.database.models import ScoringJob
+from app.services import batch_scoring
+from app.services.job_queue import JobQueue, JOB_CANCELLED, JOB_COMPLETED, JOB_FAILED
+
+
+async def make_session_factory(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def test_job_lifecycle(tmp_path, make_method):
+    rng = random.Random(5)
+    methods = [make_method(rng, 3, 6) for _ in range(5)]
+
+    async def scenario():
+        engine, factory = await make_session_factory(tmp_path / "jobs.db")
+        queue = JobQueue(session_factory=factory, chunk_size=2)
+        await queue.start(workers=1)
+        try:
+            done = await queue.submit("batch", methods)
+            failed = await queue.submit("batch", [{**methods[0], "instrument_densities": {}}])
+            await queue.join()
+
+            # 排队中的任务可以直接取消
+            await queue.stop()
+            pending = await queue.submit("sweep", methods[:1])
+            cancelled = await queue.cancel(pending["job_id"])
+
+            completed = await queue.get(done["job_id"], with_result=True)
+            return completed, await queue.get(failed["job_id"]), cancelled
+        finally:
+            await queue.stop()
+            await engine.dispose()
+
+    completed, failed, cancelled = asyncio.run(scenario())
+
+    assert completed.status == JOB_COMPLETED
+    assert (completed.progress, completed.total) == (5, 5)
+    expected = batch_scoring.calculate_batch_scores(methods)
+    assert [r["final"]["score3"] for r in completed.result] == [r["final"]["score3"] for r in expected]
+
+    assert failed.status == JOB_FAILED and failed.error
+    assert cancelled["status"] == JOB_CANCELLED
+
+
+def test_unfinished_jobs_are_requeued_on_start(tmp_path, make_method):
+    method = make_method(random.Random(6), 2, 4)
+
+    async def scenario():
+        engine, factory = await make_session_factory(tmp_path / "jobs.db")
+        async with factory() as db:
+            db.add(ScoringJob(id="interrupted", kind="batch", status="running", progress=1,
+                              total=1, payload={"methods": [method]}))
+            await db.commit()
+
+        queue = JobQueue(session_factory=factory)
+        await queue.start(workers=1)
+        try:
+            await queue.join()
+            return await queue.get("interrupted", with_result=True)
+        finally:
+            await queue.stop()
+            await engine.dispose()
+
+    job = asyncio.run(scenario())
+    assert job.status == JOB_COMPLETED
+    assert len(job.result) == 1
@@ -0,0 +1,45 @@
+"""
+测试多方法对比（去重、对齐、差值、排名与最优方法）
+"""
+import sys
+sys.path.append('.')
+
+import random
+
+import pytest
+
+from app.services import scoring_service
+from app.services.method_comparison import compare_methods
+
+
+def test_compare_matches_individual_scores(make_method):
+    rng = random.Random(20)
+    methods = [make_method(rng, rng.randint(2, 5), rng.randint(3, 8)) for _ in range(4)]
+    methods.append(dict(methods[1]))  # 重复的方法只计算一次
+    labels = [f"M{i}" for i in range(len(methods))]
+
+    result = compare_methods(methods, labels, baseline=2)
+    expected = [scoring_service.calculate_full_scores(**m) for m in methods]
+    score3 = [r["final"]["score3"] for r in expected]
+
+    assert result["unique_methods"] == 4
+    assert result["layers"]["score3"] == score3
+    assert result["layers"]["S1"] == [r["merged"]["sub_factors"]["S1"] for r in expected]
+    assert result["deltas"]["score3"] == [round(s - score3[2], 2) for s in score3]
+    assert result["deltas"]["score3"][2] == 0
+    assert result["ranks"]["score3"][score3.index(min(score3))] == 1
+    assert result["ranks"]["score3"][1] == result["ranks"]["score3"][4]
+    assert set(result["winners"]["score3"]) == {i for i, s in enumerate(score3) if s == min(score3)}
+
+    # 试剂质量表：每个方法的质量与逐个评分一致，未使用的试剂为0
+    for row in result["reagents"]:
+        for i, r in enumerate(expected):
+            assert row["instrument_masses"][i] == pytest.approx(r["instrument"]["masses"].get(row["name"], 0.0))
+
+
+def test_compare_validation(make_method):
+    method = make_method(random.Random(1), 2, 3)
+    with pytest.raises(ValueError):
+        compare_methods([method], ["only"])
+    with pytest.raises(ValueError):
+        compare_methods([method, method], ["a", "b"], baseline=5)
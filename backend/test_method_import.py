@@ -0,0 +1,56 @@
+"""
+测试方法表分块导入与Excel报告
+"""
+import sys
+sys.path.append('.')
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from app.services import scoring_service
+from app.services.method_import import REPORT_COLUMNS, import_and_score, iter_methods
+
+FACTORS = {"S1": 0.6, "S2": 0.8, "S3": 0.2, "S4": 0.3, "H1": 0.4, "H2": 0.5, "E1": 0.3, "E2": 0.2, "E3": 0.1}
+PARAMS = {"flow_rate": 1.0, "p_factor": 40, "instrument_r_factor": 30, "instrument_d_factor": 50,
+          "pretreatment_r_factor": 10, "pretreatment_d_factor": 60}
+
+
+def method_rows(name, with_params=True, **params):
+    rows = []
+    for time, water in [(0, 90), (10, 50), (20, 10)]:
+        for reagent, percent, density in [("Water", water, 1.0), ("Methanol", 100 - water, 0.791)]:
+            rows.append({"method": name, "stage": "instrument", "reagent": reagent, "time": time,
+                         "percent": percent, "curve": "linear", "density": density, **FACTORS})
+    rows.append({"method": name, "stage": "preparation", "reagent": "Methanol", "volume": 5.0,
+                 "density": 0.791, **FACTORS})
+    if with_params:
+        rows[0].update(PARAMS, **params)
+    return rows
+
+
+@pytest.mark.filterwarnings("error::FutureWarning")
+def test_import_csv_and_xlsx_in_chunks(tmp_path):
+    rows = method_rows("A") + method_rows("B", with_params=False) + method_rows("C") + method_rows("D", flow_rate=-1.0)
+    frame = pd.DataFrame(rows)
+    csv_path, xlsx_path = tmp_path / "methods.csv", tmp_path / "methods.xlsx"
+    frame.to_csv(csv_path, index=False)
+    frame.to_excel(xlsx_path, index=False)
+
+    parsed = list(iter_methods(csv_path, chunk_rows=4))  # 每个方法跨越多块
+    assert [name for name, _, _ in parsed] == ["A", "B", "C", "D"]
+    assert parsed[1][1] is None and "flow_rate" in parsed[1][2]
+    assert parsed[3][1] is None and "instrument.flow_rate" in parsed[3][2]
+    expected = scoring_service.calculate_full_scores(**parsed[0][1])["final"]["score3"]
+
+    for source in (csv_path, xlsx_path):
+        report = tmp_path / f"report_{source.suffix[1:]}.xlsx"
+        summary = import_and_score(source, report, chunk_rows=4, chunk_methods=2)
+        assert summary == {"methods": 4, "scored": 2, "failed": 2}
+
+        sheet = load_workbook(report, read_only=True).worksheets[0]
+        table = [dict(zip(REPORT_COLUMNS, row)) for row in sheet.iter_rows(min_row=2, values_only=True)]
+        assert [r["method"] for r in table] == ["A", "B", "C", "D"]
+        assert abs(table[0]["Score3"] - expected) < 1e-9
+        assert table[1]["Score3"] is None and table[1]["error"]
+        assert table[3]["Score3"] is None and "greater than 0" in table[3]["error"]
@@ -0,0 +1,64 @@
+"""
+测试评分会话的增量重算与完整评分结果一致
+"""
+import sys
+sys.path.append('.')
+
+import random
+
+from app.services import scoring_service
+from app.services import method_sessions
+from app.services.result_cache import ScoreResultCache, cached_full_scores
+
+
+def test_rescore_matches_full_scoring(make_method):
+    method = make_method(random.Random(5), 3, 6)
+    session = method_sessions.create_session(method)
+    assert session["result"] == scoring_service.calculate_full_scores(**method)
+
+    overrides = {"safety_scheme": "Frontier_Focus", "final_scheme": "Equal", "p_factor": 12.5}
+    rescored = method_sessions.rescore_session(session["token"], overrides)
+
+    assert rescored == scoring_service.calculate_full_scores(**{**method, **overrides})
+
+
+
+def test_sessions_share_full_score_cache(make_method):
+    method = make_method(random.Random(7), 3, 6)
+    cache = ScoreResultCache(max_entries=4)
+
+    first = method_sessions.create_session(method, cache)
+    assert not first["cached"] and cached_full_scores(method, cache) == (first["result"], True)
+
+    # 再次建立会话直接使用缓存结果中的 Layer 0-1，重算结果不变
+    second = method_sessions.create_session(method, cache)
+    assert second["cached"] and second["result"] == first["result"]
+    overrides = {"health_scheme": "Absolute_Balance", "instrument_stage_scheme": "Balanced", "p_factor": 3.0}
+    assert method_sessions.rescore_session(second["token"], overrides) == (
+        scoring_service.calculate_full_scores(**{**method, **overrides})
+    )
+
+
+def test_rescore_keeps_parameters_on_error(make_method):
+    method = make_method(random.Random(6), 2, 4)
+    token = method_sessions.create_session(method)["token"]
+
+    try:
+        method_sessions.rescore_session(token, {"health_scheme": "Unknown"})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("未知方案应抛出ValueError")
+
+    assert method_sessions.rescore_session(token, {}) == scoring_service.calculate_full_scores(**method)
+
+
+def test_session_store_evicts_least_recently_used():
+    store = method_sessions.MethodSessionStore(max_sessions=2, ttl_seconds=60)
+    for token in ["a", "b", "c"]:
+        store.put(method_sessions.MethodSession(token, {}, {}, {}, {}, {}))
+
+    assert store.get("a") is None
+    assert store.get("c") is not None
+    assert store.delete("b")
+    assert store.get("unknown") is None
@@ -0,0 +1,39 @@
+"""
+测试NDJSON流式批量评分（分块、逐行错误、按输入顺序输出）
+"""
+import asyncio
+import json
+import random
+import sys
+sys.path.append('.')
+
+from app.api.routes import build_scoring_kwargs
+from app.services import scoring_service
+from app.services.ndjson_stream import score_ndjson
+
+
+def test_stream_scores_in_order_with_per_line_errors(make_method, to_request_payload):
+    methods = [make_method(random.Random(i), 3, 5) for i in range(5)]
+    lines = [json.dumps(to_request_payload(m)) for m in methods]
+    bad_density = {**to_request_payload(methods[0])}
+    bad_density["instrument"] = {**bad_density["instrument"], "densities": {}}
+    lines.insert(1, "{not json")
+    lines.insert(3, json.dumps(bad_density))
+    body = ("\n".join(lines) + "\n").encode()
+
+    async def chunks():
+        # 故意在行中间切开
+        for start in range(0, len(body), 97):
+            yield body[start:start + 97]
+
+    async def collect():
+        return [json.loads(line) async for line in score_ndjson(chunks(), build_scoring_kwargs, chunk_size=2)]
+
+    records = asyncio.run(collect())
+
+    assert [r["index"] for r in records] == list(range(7))
+    assert [r["success"] for r in records] == [True, False, True, False, True, True, True]
+    scored = [r for r in records if r["success"]]
+    for record, method in zip(scored, methods):
+        expected = scoring_service.calculate_full_scores(**method)
+        assert abs(record["data"]["final"]["score3"] - expected["final"]["score3"]) < 1e-9
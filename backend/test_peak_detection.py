@@ -0,0 +1,67 @@
+"""
+测试原始色谱信号的峰检测与积分
+"""
+import sys
+sys.path.append('.')
+
+import json
+import math
+
+import numpy as np
+import pytest
+
+from app.services.array_transport import encode_arrays
+from app.services.peak_detection import analyze_trace, analyze_trace_binary, analyze_trace_json, analyze_trace_payload
+
+
+PEAKS = [(5.0, 100.0, 0.05), (10.0, 400.0, 0.08), (10.5, 50.0, 0.08), (20.0, 30.0, 0.1)]
+
+
+def make_trace(n_points=200_000, noise=0.2, seed=21):
+    times = np.linspace(0.0, 30.0, n_points)
+    rng = np.random.default_rng(seed)
+    values = 0.5 + 0.01 * times + rng.normal(0.0, noise, n_points)
+    for retention, height, sigma in PEAKS:
+        values += height * np.exp(-0.5 * ((times - retention) / sigma) ** 2)
+    return times, values
+
+
+def test_detects_and_integrates_gaussian_peaks():
+    times, values = make_trace()
+    result = analyze_trace(times, values)
+
+    assert result["num_peaks"] == len(PEAKS)
+    for peak, (retention, height, sigma) in zip(result["peaks"], PEAKS):
+        assert math.isclose(peak["retention_time"], retention, abs_tol=0.01)
+        assert math.isclose(peak["area"], height * sigma * math.sqrt(2 * math.pi), rel_tol=0.02)
+        # 高斯峰：W½ = 2.355σ，拖尾因子≈1
+        assert math.isclose(peak["width_half"], 2.3548 * sigma, rel_tol=0.03)
+        assert math.isclose(peak["tailing"], 1.0, abs_tol=0.05)
+    assert result["main_peak_retention_time"] == pytest.approx(10.0, abs=0.01)
+    # 10.0 / 10.5 分钟两峰：Rs = 1.18 × 0.5 / (2 × 2.355 × 0.08)
+    assert result["peaks"][2]["resolution"] == pytest.approx(1.18 * 0.5 / (2 * 2.3548 * 0.08), rel=0.03)
+
+
+def test_payload_formats_match():
+    times, values = make_trace(n_points=20_000)
+    interval = float(times[1] - times[0])
+    direct = analyze_trace(times, values)
+
+    from_json = analyze_trace_payload({"signal": values.tolist(), "sampling_interval": interval})
+    from_binary = analyze_trace_binary(encode_arrays({"signal": values}, {"sampling_interval": interval}))
+    from_body = analyze_trace_json(json.dumps({"signal": values.tolist(), "sampling_interval": interval}).encode())
+    assert from_json["peaks"] == from_binary["peaks"] == from_body["peaks"]
+    assert [p["area"] for p in from_json["peaks"]] == pytest.approx([p["area"] for p in direct["peaks"]], rel=1e-6)
+
+    with pytest.raises(ValueError):
+        analyze_trace_payload({"signal": values.tolist()})
+    with pytest.raises(ValueError, match="JSON"):
+        analyze_trace_json(b'{"signal": [1, 2,')
+    with pytest.raises(ValueError):
+        analyze_trace(times[::-1], values)
+
+
+def test_flat_trace_has_no_peaks():
+    times = np.linspace(0.0, 10.0, 5_000)
+    values = np.random.default_rng(1).normal(0.0, 0.1, times.shape[0])
+    assert analyze_trace(times, values)["num_peaks"] == 0
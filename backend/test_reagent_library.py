@@ -0,0 +1,112 @@
+"""
+测试试剂因子库（数组索引、按ID/名称引用、数据库加载）
+"""
+import asyncio
+import sys
+sys.path.append('.')
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.api import routes
+from app.database.connection import Base, create_engine_for, get_db
+from app.services import scoring_service
+from app.services.reagent_library import BUILTIN_REAGENTS, ReagentLibrary, resolve_method_reagents
+
+
+def test_library_lookup_matches_explicit_factors():
+    library = ReagentLibrary()
+    index = library.index
+    assert index.row_of("  METHANOL ") == index.row_of("Methanol")
+
+    resolved = resolve_method_reagents(
+        index,
+        composition={"water": [90, 10], "Methanol": [10, 90]},
+        prep_volumes={"acetonitrile": 2.0},
+        prep_densities={"Acetonitrile": 0.8}
+    )
+    assert list(resolved["instrument_composition"]) == ["Water", "Methanol"]
+    assert resolved["instrument_densities"] == {"Water": 1.0, "Methanol": 0.791}
+    assert resolved["prep_densities"] == {"Acetonitrile": 0.8}
+    assert resolved["instrument_factor_matrix"]["Methanol"]["H1"] == 0.316  # 慢性毒性
+    assert resolved["instrument_factor_matrix"]["Methanol"]["H2"] == 0.113  # 刺激性
+
+    result = scoring_service.calculate_full_scores(
+        instrument_time_points=[0, 10], instrument_flow_rate=1.0,
+        p_factor=10, pretreatment_p_factor=0, instrument_r_factor=10, instrument_d_factor=10,
+        pretreatment_r_factor=10, pretreatment_d_factor=10, **resolved
+    )
+    assert 0 <= result["final"]["score3"] <= 100
+
+    for bad in ({"Unobtainium": [100, 100]}, {"Water": [50, 50], "water": [50, 50]}):
+        try:
+            resolve_method_reagents(index, composition=bad, prep_volumes={})
+        except ValueError:
+            continue
+        raise AssertionError(f"应拒绝 {bad}")
+
+
+def test_load_seeds_database_and_indexes_ids(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'reagents.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        library = ReagentLibrary(async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+        try:
+            await library.load()
+            await library.load()  # 已有数据时不重复写入
+            return library.index
+        finally:
+            await engine.dispose()
+
+    index = asyncio.run(scenario())
+    assert len(index) == len(BUILTIN_REAGENTS)
+    row = index.row_of("Acetonitrile")
+    assert index.row_of(str(index.ids[row])) == row
+    assert index.row_of(index.ids[row]) == row
+
+
+def test_reagent_routes_with_single_write_connection(tmp_path, monkeypatch):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'routes.db'}"
+    write_engine = create_engine_for(url)  # 与生产相同：写连接池只有一个连接
+    read_engine = create_engine_for(url, read_only=True, pool_size=2)
+    write_sessions = async_sessionmaker(write_engine, class_=AsyncSession, expire_on_commit=False)
+    library = ReagentLibrary(write_sessions, async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False))
+    monkeypatch.setattr(routes, "reagent_library", library)
+    monkeypatch.setattr(write_engine.pool, "_timeout", 2)  # 连接被占用时快速失败而不是等待30秒
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with write_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await library.load()
+        yield
+        await write_engine.dispose()
+        await read_engine.dispose()
+
+    async def override_get_db():
+        async with write_sessions() as session:
+            yield session
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(routes.router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = override_get_db
+
+    with TestClient(app) as client:
+        factors = {name: 0.1 for name in ["S1", "S2", "S3", "S4", "H1", "H2", "E1", "E2", "E3"]}
+        created = client.post("/api/v1/reagents", json={"name": "Ethyl lactate", "density": 1.03, **factors, "S1": 0.2})
+        assert created.status_code == 200, created.text
+        reagent_id = created.json()["data"]["id"]
+        assert created.json()["data"]["S1"] == 0.2
+        assert library.index.row_of("ethyl LACTATE") == library.index.row_of(reagent_id)
+
+        assert client.post("/api/v1/reagents", json={"name": "ethyl lactate", "density": 1.0, **factors}).status_code == 409
+
+        updated = client.put(f"/api/v1/reagents/{reagent_id}", json={"density": 1.04})
+        assert updated.status_code == 200 and updated.json()["data"]["density"] == 1.04
+
+        assert client.delete(f"/api/v1/reagents/{reagent_id}").status_code == 200
+        assert not library.contains("Ethyl lactate")
+        assert len(library.index) == len(BUILTIN_REAGENTS)
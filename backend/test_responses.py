@@ -0,0 +1,61 @@
+"""
+测试快速JSON序列化与gzip压缩协商
+"""
+import sys
+sys.path.append('.')
+
+import json
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.responses import CompressionMiddleware, accepts_gzip, api_response, dumps
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    async def big():
+        return api_response(message="ok", data={"scores": np.arange(500, dtype=np.float64) / 3})
+
+    @app.get("/events")
+    async def events():
+        async def lines():
+            for i in range(3):
+                yield f"data: {i}\n\n" * 50
+        return StreamingResponse(lines(), media_type="text/event-stream")
+
+    return app
+
+
+def test_dumps_matches_standard_json():
+    data = {"名称": "甲醇", "values": [0.1, 2.5, None], "nested": {"ok": True}}
+    assert json.loads(dumps(data)) == data
+    assert json.loads(dumps({"a": np.array([1.5, 2.0])})) == {"a": [1.5, 2.0]}
+
+
+def test_accept_encoding_negotiation():
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("br;q=1.0, gzip;q=0.5")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip(None)
+
+
+def test_gzip_only_when_negotiated_and_not_for_streams():
+    client = TestClient(make_app())
+
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["data"]["scores"]) == 500
+
+    raw = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers
+
+    stream = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in stream.headers
+    assert stream.text.startswith("data: 0")
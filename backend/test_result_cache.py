@@ -0,0 +1,69 @@
+"""
+测试评分结果缓存的规范化键与LRU淘汰
+"""
+import random
+import sys
+sys.path.append('.')
+
+from app.services import scoring_service
+from app.services.result_cache import ScoreResultCache, cached_full_scores, make_cache_key
+
+
+def test_cache_key_ignores_reagent_order_and_number_type():
+    a = {"prep_volumes": {"MeOH": 1, "H2O": 2.5}, "p_factor": 10, "custom_weights": None}
+    b = {"custom_weights": None, "p_factor": 10.0, "prep_volumes": {"H2O": 2.5, "MeOH": 1.0}}
+    c = {"prep_volumes": {"MeOH": 1, "H2O": 2.5}, "p_factor": 10, "custom_weights": {"final": {"instrument": 1.0}}}
+
+    assert make_cache_key(a) == make_cache_key(b)
+    assert make_cache_key(a) != make_cache_key(c)
+
+    # 数值列表按数组整体哈希，仍区分长度、位置和非数值元素
+    assert make_cache_key({"t": [1, 2.0], "u": [3.0]}) == make_cache_key({"u": [3], "t": [1.0, 2]})
+    assert make_cache_key({"t": [1.0, 2.0], "u": [3.0]}) != make_cache_key({"t": [1.0], "u": [2.0, 3.0]})
+    assert make_cache_key({"c": ["linear", None]}) != make_cache_key({"c": [None, "linear"]})
+    assert make_cache_key({"t": [0.0]}) == make_cache_key({"t": [-0.0]})
+
+
+def test_cache_lru_eviction_and_counters():
+    cache = ScoreResultCache(max_entries=2)
+    cache.put("a", {"score": 1})
+    cache.put("b", {"score": 2})
+    assert cache.get("a") == {"score": 1}
+    cache.put("c", {"score": 3})  # 淘汰最久未使用的 b
+
+    assert cache.get("b") is None
+    assert cache.get("c") == {"score": 3}
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1, 1)
+
+    # 返回副本，修改不影响缓存内容
+    cache.get("a")["score"] = 99
+    assert cache.get("a") == {"score": 1}
+
+    assert cache.invalidate("a") == 1
+    assert cache.invalidate() == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_hit_skips_scoring(make_method, monkeypatch):
+    method = make_method(random.Random(8), 5, 20)
+    expected = scoring_service.calculate_full_scores(**method)
+    cache = ScoreResultCache(max_entries=2)
+    calls = []
+    real_score = scoring_service.calculate_full_scores
+
+    def counting_score(**kwargs):
+        calls.append(1)
+        return real_score(**kwargs)
+
+    monkeypatch.setattr(scoring_service, "calculate_full_scores", counting_score)
+
+    assert cached_full_scores(method, cache) == (expected, False)
+    assert cached_full_scores(method, cache) == (expected, True)
+    assert cached_full_scores(dict(method), cache) == (expected, True)
+
+    # 命中时不再调用评分，只有首次未命中计算一次
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
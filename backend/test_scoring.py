@@ -49,8 +49,11 @@ def test_simple_case():
     
     # 其他因子
     p_factor = 50.0  # 0-100
-    r_factor_raw = 0.5  # 0-1
-    d_factor_raw = 0.5  # 0-1
+    pretreatment_p_factor = 50.0  # 0-100
+    instrument_r_factor = 50.0  # 0-100
+    instrument_d_factor = 50.0  # 0-100
+    pretreatment_r_factor = 50.0  # 0-100
+    pretreatment_d_factor = 50.0  # 0-100
     
     # 计算评分
     result = scoring_service.calculate_full_scores(
@@ -63,8 +66,11 @@ def test_simple_case():
         prep_densities=prep_densities,
         prep_factor_matrix=prep_factor_matrix,
         p_factor=p_factor,
-        r_factor_raw=r_factor_raw,
-        d_factor_raw=d_factor_raw,
+        pretreatment_p_factor=pretreatment_p_factor,
+        instrument_r_factor=instrument_r_factor,
+        instrument_d_factor=instrument_d_factor,
+        pretreatment_r_factor=pretreatment_r_factor,
+        pretreatment_d_factor=pretreatment_d_factor,
         safety_scheme="PBT_Balanced",
         health_scheme="Absolute_Balance",
         environment_scheme="PBT_Balanced",
@@ -91,11 +97,15 @@ def test_simple_case():
     # 验证数值范围
     print("【数值范围验证】")
     for key, value in result['merged']['sub_factors'].items():
-        if not (0 <= value <= 100):
-            print(f"❌ {key} = {value} 超出范围 [0, 100]")
-        else:
-            print(f"✅ {key} = {value}")
-    
+        assert 0 <= value <= 100, f"{key} = {value} 超出范围 [0, 100]"
+        print(f"✅ {key} = {value}")
+
+    # Water 全部因子为0，只有 Methanol 贡献：梯度积分 = 0.25 * 10 + 0.75 * 10 = 10 mL
+    assert abs(result['instrument']['masses']['Methanol'] - 10 * 0.791) < 1e-9
+    assert abs(result['preparation']['masses']['Water'] - 0.001) < 1e-12
+    for score in (result['instrument']['score1'], result['preparation']['score2'], result['final']['score3']):
+        assert 0 <= score <= 100
+
     print("\n" + "=" * 80)
 
 
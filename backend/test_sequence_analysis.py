@@ -0,0 +1,57 @@
+"""
+测试进样序列的批量色谱分析与汇总
+"""
+import sys
+sys.path.append('.')
+
+import pytest
+
+from app.services.sequence_analysis import analyze_injections, partition, summarize_sequence
+from app.services.trace_store import TraceStore
+from test_peak_detection import make_trace
+
+
+def test_sequence_summary(tmp_path):
+    injections = [
+        {"retention_times": [2.0, 5.0 + 0.01 * i, 7.5], "peak_areas": [10.0, 900.0 + 10 * i, 20.0]}
+        for i in range(6)
+    ]
+    injections.insert(3, {"name": "bad", "retention_times": [1.0], "peak_areas": []})
+
+    times, values = make_trace(n_points=20_000)
+    store = TraceStore(tmp_path)
+    meta = store.create(n_points=values.shape[0], channels=["uv"], sampling_interval=float(times[1] - times[0]))
+    store.write_chunk(meta["trace_id"], "uv", 0, values.tobytes())
+    injections.append({"trace_id": meta["trace_id"], "start_time": 4.0, "end_time": 6.0})
+    injections.append({"name": "blank", "trace_id": meta["trace_id"], "start_time": 0.5, "end_time": 1.5})
+
+    indices = list(range(len(injections)))
+    outcomes = sorted(
+        analyze_injections([injections[i] for i in indices[1::2]], indices[1::2], str(tmp_path))
+        + analyze_injections([injections[i] for i in indices[::2]], indices[::2], str(tmp_path)),
+        key=lambda outcome: outcome["index"]
+    )
+    assert [outcome["success"] for outcome in outcomes] == [True, True, True, False, True, True, True, True, False]
+    assert outcomes[3]["name"] == "bad" and outcomes[3]["error"]
+    assert outcomes[-2]["result"]["main_peak_retention_time"] == pytest.approx(5.0, abs=0.01)
+    # 时间窗口内没有峰：记为失败，0占位值不进入统计
+    assert outcomes[-1]["name"] == "blank" and "未检测到色谱峰" in outcomes[-1]["error"]
+    assert "result" not in outcomes[-1]
+
+    summary = summarize_sequence(outcomes[:-2] + outcomes[-1:])
+    assert summary["injections"] == 8 and summary["failed"] == 2
+    assert summary["retention_time"]["drift"] == pytest.approx(0.05)
+    assert summary["retention_time"]["drift_per_injection"] == pytest.approx(0.01, rel=1e-6)
+    assert summary["trends"]["index"] == [0, 1, 2, 4, 5, 6]
+    areas = [900.0 + 10 * i for i in range(6)]
+    mean = sum(areas) / 6
+    sd = (sum((a - mean) ** 2 for a in areas) / 5) ** 0.5
+    assert summary["area"]["main_peak_rsd"] == pytest.approx(sd / mean * 100, abs=1e-3)
+
+
+def test_partition_balances_cost():
+    groups = partition([1_000_000, 10, 10, 900_000, 10, 50_000], 2)
+    assert sorted(i for group in groups for i in group) == list(range(6))
+    # 两个大计算量的进样分到不同的组
+    assert not any(0 in group and 3 in group for group in groups)
+    assert partition([5, 5], 8) == [[0], [1]]
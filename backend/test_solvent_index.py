@@ -0,0 +1,43 @@
+"""
+测试溶剂名称索引（别名、CAS号、前缀与模糊检索）
+"""
+import sys
+sys.path.append('.')
+
+import pytest
+
+from app.services.green_chemistry import SOLVENT_INDEX, analyzer
+from app.services.solvent_index import SolventIndex, normalize_solvent_key
+
+
+def test_exact_lookup_by_alias_and_cas():
+    for alias in ["甲醇", "Methanol", "METHANOL ", "MeOH", "67-56-1", "６７５６１"]:
+        assert SOLVENT_INDEX.canonical(alias) == "甲醇", alias
+    assert SOLVENT_INDEX.canonical("Hexane (n)") == "正己烷"
+    assert SOLVENT_INDEX.canonical("n-hexane") == "正己烷"
+    assert SOLVENT_INDEX.canonical("苯") is None
+    assert normalize_solvent_key("Tetrahydrofuran(THF)") == "tetrahydrofuranthf"
+
+    # 英文名与中文名得到相同的评分
+    assert analyzer.calculate_solvent_score("Acetonitrile", "Water", 0.3) == analyzer.calculate_solvent_score("乙腈", "水", 0.3)
+
+
+def test_prefix_and_fuzzy_search():
+    hits = SOLVENT_INDEX.search("aceto")
+    assert hits[0]["name"] == "乙腈" and hits[0]["match"] == "prefix"
+    assert SOLVENT_INDEX.search("ACN")[0]["match"] == "exact"
+
+    hits = SOLVENT_INDEX.search("methnol")  # 拼写错误
+    assert hits[0]["name"] == "甲醇" and hits[0]["match"] == "fuzzy"
+    assert len({hit["name"] for hit in SOLVENT_INDEX.search("e", limit=50)}) == len(SOLVENT_INDEX.search("e", limit=50))
+    assert SOLVENT_INDEX.search("  ") == []
+
+
+def test_large_index_and_conflicts():
+    entries = [(f"溶剂{i}", [f"Solvent {i:05d}", f"{i}-00-0"]) for i in range(5000)]
+    index = SolventIndex.build(entries)
+    assert index.canonical("solvent 04321") == "溶剂4321"
+    assert [hit["name"] for hit in index.search("Solvent 0432", limit=3)] == ["溶剂4320", "溶剂4321", "溶剂4322"]
+
+    with pytest.raises(ValueError):
+        SolventIndex.build([("甲醇", ["MeOH"]), ("乙醇", ["meoh"])])
@@ -0,0 +1,42 @@
+"""
+测试多组分混合溶剂的向量化评分
+"""
+import sys
+sys.path.append('.')
+
+import numpy as np
+import pytest
+
+from app.services.green_chemistry import analyzer, mixture_grid, mixture_grid_size, solvent_mixture_landscape
+
+
+def test_binary_mixtures_match_scalar_score():
+    ratios = np.linspace(0, 1, 11)
+    fractions = np.stack([ratios, 1 - ratios], axis=1) * 100  # 百分比按行归一化
+    volumes = np.linspace(1, 300, 11)
+    scores = analyzer.calculate_mixture_scores(["甲醇", "未知溶剂X"], fractions, volumes)
+
+    for i, (ratio, volume) in enumerate(zip(ratios, volumes)):
+        expected = analyzer.calculate_solvent_score("甲醇", "未知溶剂X", ratio_a=ratio, volume_ml=volume)
+        assert expected.pop("unknown_solvents") == ["未知溶剂X"]
+        for key, value in expected.items():
+            assert round(float(scores[key][i]), 2) == pytest.approx(value, abs=0.011), key
+
+
+def test_ternary_grid():
+    grid = mixture_grid(3, 10)
+    assert grid.shape == (66, 3)
+    assert [mixture_grid_size(n, 7) for n in (1, 2, 3, 4)] == [mixture_grid(n, 7).shape[0] for n in (1, 2, 3, 4)]
+    assert mixture_grid_size(3, 0) == 0
+    assert np.allclose(grid.sum(axis=1), 1)
+    assert len({tuple(row) for row in np.round(grid, 6)}) == 66
+
+    result = solvent_mixture_landscape(["水", "甲醇", "乙腈"], grid_steps=10)
+    water = np.flatnonzero(np.all(result["fractions"] == [1, 0, 0], axis=1))[0]
+    assert result["overall_green_score"][water] == result["overall_green_score"].max()
+    assert result["unknown_solvents"] == []
+
+    with pytest.raises(ValueError):
+        solvent_mixture_landscape(["水", "甲醇"], fractions=[[1, 0]], grid_steps=4)
+    with pytest.raises(ValueError):
+        analyzer.calculate_mixture_scores(["水", "甲醇"], [[0, 0]])
@@ -0,0 +1,104 @@
+"""
+测试原始信号的分块上传、内存映射分析与降采样
+"""
+import sys
+sys.path.append('.')
+
+import numpy as np
+import pytest
+
+from app.services import trace_store
+from app.services.peak_detection import analyze_trace
+from app.services.trace_store import (
+    TraceStore, TraceIncomplete, _chunked_median, analyze_stored_trace, downsample_stored_trace, lttb_indices,
+    minmax_indices,
+)
+from test_peak_detection import make_trace
+
+
+def upload(store, values, dtype="float64", chunk=7_001, **kwargs):
+    meta = store.create(n_points=values.shape[0], channels=["254nm"], dtype=dtype, **kwargs)
+    raw = values.astype("<f4" if dtype == "float32" else "<f8")
+    # 乱序上传并重传一个分块
+    starts = list(range(0, values.shape[0], chunk))[::-1] + [0]
+    for start in starts:
+        meta = store.write_chunk(meta["trace_id"], "254nm", start, raw[start:start + chunk].tobytes())
+    return meta
+
+
+def test_chunked_upload_and_memmap_analysis(tmp_path):
+    times, values = make_trace(n_points=100_000)
+    interval = float(times[1] - times[0])
+    store = TraceStore(tmp_path)
+
+    partial = store.create(n_points=values.shape[0], channels=["254nm"], sampling_interval=interval)
+    store.write_chunk(partial["trace_id"], "254nm", 0, values[:10].tobytes())
+    with pytest.raises(TraceIncomplete):
+        store.open_column(partial["trace_id"])
+    with pytest.raises(ValueError):
+        store.write_chunk(partial["trace_id"], "254nm", values.shape[0] - 1, values[:2].tobytes())
+
+    meta = upload(store, values, sampling_interval=interval)
+    assert meta["complete"]
+    stored = analyze_stored_trace(str(tmp_path), meta["trace_id"])
+    direct = analyze_trace(times, values)
+    assert stored["peaks"] == direct["peaks"]
+
+    # 时间窗口只分析 9-11 分钟的两个峰
+    window = analyze_stored_trace(str(tmp_path), meta["trace_id"], start_time=9.0, end_time=11.0)
+    assert [p["retention_time"] for p in window["peaks"]] == pytest.approx([10.0, 10.5], abs=0.01)
+
+
+def test_long_windows_are_analyzed_in_chunks(tmp_path, monkeypatch):
+    times, values = make_trace(n_points=100_000)
+    store = TraceStore(tmp_path)
+    uniform = upload(store, values, dtype="float32", sampling_interval=float(times[1] - times[0]))
+    irregular = upload(store, values, has_time=True)
+    for start in range(0, times.shape[0], 30_000):
+        store.write_chunk(irregular["trace_id"], "time", start, times[start:start + 30_000].tobytes())
+
+    monkeypatch.setattr(trace_store, "SCAN_CHUNK_POINTS", 1 << 14)
+    for meta, signal in [(uniform, values.astype(np.float32)), (irregular, values)]:
+        for params in ({}, {"min_width": 0.1, "baseline_window": 0.8}):
+            chunked = analyze_stored_trace(str(tmp_path), meta["trace_id"], **params)
+            direct = analyze_trace(times, signal, **params)
+            assert chunked["num_peaks"] == direct["num_peaks"] == 4
+            assert chunked["noise"] == pytest.approx(direct["noise"], rel=1e-9)
+            assert chunked["total_area"] == pytest.approx(direct["total_area"], rel=1e-6)
+            for a, b in zip(chunked["peaks"], direct["peaks"]):
+                assert a == pytest.approx(b, rel=1e-4, abs=1e-4)
+
+
+def test_chunked_median_matches_numpy(monkeypatch):
+    monkeypatch.setattr(trace_store, "SCAN_CHUNK_POINTS", 1000)
+    rng = np.random.default_rng(4)
+    for data in (rng.normal(size=20_001), rng.normal(size=20_000), np.repeat(rng.normal(size=7), 3_001),
+                 np.concatenate([np.full(9_000, 2.5), rng.normal(size=8_000) * 1e-300])):
+        def blocks(data=data):
+            return (data[start:start + 3_000] for start in range(0, data.shape[0], 3_000))
+        assert _chunked_median(blocks, data.shape[0]) == np.median(data)
+
+
+def test_downsampling_keeps_peaks(tmp_path):
+    times, values = make_trace(n_points=100_000)
+    store = TraceStore(tmp_path)
+    meta = upload(store, values, dtype="float32", sampling_interval=float(times[1] - times[0]))
+
+    result = downsample_stored_trace(str(tmp_path), meta["trace_id"], 500, method="minmax")
+    assert result["points"] <= 1000
+    assert np.all(np.diff(result["time"]) > 0)
+    assert result["signal"].max() == pytest.approx(values.max(), rel=1e-6)
+
+    result = downsample_stored_trace(str(tmp_path), meta["trace_id"], 500, method="lttb")
+    assert result["points"] == 500
+    assert result["time"][0] == times[0] and result["time"][-1] == pytest.approx(times[-1])
+    assert abs(result["time"][np.argmax(result["signal"])] - 10.0) < 0.05
+
+
+def test_downsample_index_helpers():
+    values = np.sin(np.linspace(0, 20, 10_007))
+    indices = minmax_indices(values, 100)
+    assert indices[0] == 0 and np.all(np.diff(indices) > 0)
+    assert values[indices].min() == values.min() and values[indices].max() == values.max()
+    assert lttb_indices(values, 10_007).shape[0] == 10_007
+    assert np.all(np.diff(lttb_indices(values, 300)) > 0)
@@ -0,0 +1,42 @@
+"""
+测试权重方案注册表的编译与校验
+"""
+import sys
+sys.path.append('.')
+
+from app.services.scoring_service import scheme_registry, SAFETY_WEIGHTS, validate_custom_weights
+
+
+def expect_value_error(func, *args):
+    try:
+        func(*args)
+    except ValueError as e:
+        return str(e)
+    raise AssertionError("应抛出ValueError")
+
+
+def test_named_schemes_are_compiled_in_key_order():
+    scheme = scheme_registry.get("safety", "Frontier_Focus")
+    assert scheme.keys == ("S1", "S2", "S3", "S4")
+    assert scheme.as_dict() == SAFETY_WEIGHTS["Frontier_Focus"]
+    assert scheme_registry.matrix("safety").shape == (len(SAFETY_WEIGHTS), 4)
+    assert "未知的健康因子权重方案" in expect_value_error(scheme_registry.get, "health", "Nope")
+
+
+def test_custom_weights_validated_and_deduplicated():
+    weights = {"H1": 0.6, "H2": 0.4}
+    first = scheme_registry.resolve("health", "Custom", weights)
+    assert first is scheme_registry.resolve("health", "Custom", dict(weights))
+    assert first.digest != scheme_registry.get("health", "Absolute_Balance").digest
+
+    assert "缺少权重" in expect_value_error(scheme_registry.compile_custom, "health", {"H1": 1.0})
+    assert "未知的权重" in expect_value_error(scheme_registry.compile_custom, "health", {"H1": 0.5, "H2": 0.5, "X": 0})
+    assert "总和" in expect_value_error(scheme_registry.compile_custom, "health", {"H1": 0.5, "H2": 0.6})
+    assert "负权重" in expect_value_error(scheme_registry.compile_custom, "health", {"H1": 1.5, "H2": -0.5})
+    assert "Custom权重方案需要" in expect_value_error(scheme_registry.resolve, "health", "Custom", None)
+
+
+def test_validate_custom_weights_covers_both_stages():
+    stage = {"S": 0.2, "H": 0.2, "E": 0.2, "R": 0.1, "D": 0.1, "P": 0.2}
+    validate_custom_weights({"stage": stage})
+    assert "未知的自定义权重类别" in expect_value_error(validate_custom_weights, {"other": stage})
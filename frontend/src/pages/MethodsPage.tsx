@@ -614,6 +614,7 @@ const MethodsPage: React.FC = () => {
   // 使用 ref 来避免初始化时触发 dirty
   const isInitialMount = React.useRef(true)
   const isAutoCalcInitialized = React.useRef(false)  // 专门用于自动计算的初始化标志
+  const scoringSessionToken = React.useRef<string | null>(null)  // 后端评分会话令牌（切换权重方案时增量重算）
   const lastLocalData = React.useRef<string>('')
   const isSyncingFromContext = React.useRef(false)  // 🔥 新增：标记是否正在从Context同步
   
@@ -1210,14 +1211,55 @@ const MethodsPage: React.FC = () => {
   }
 
   // 计算完整评分（调用后端API）
-  const calculateFullScoreAPI = async (options?: { silent?: boolean; overrides?: any }) => {
+  const calculateFullScoreAPI = async (options?: { silent?: boolean; overrides?: any; schemesOnly?: boolean }) => {
     const silent = options?.silent || false
     const overrides = options?.overrides || {}
     setIsCalculatingScore(true)
     
     console.log('🚀 开始执行 calculateFullScoreAPI, silent:', silent, 'overrides:', overrides)
     
+    // 保存评分结果并通知其他页面
+    const applyScoreResults = async (scoreData: any) => {
+      setScoreResults(scoreData)
+      if (!silent) message.success('Scoring calculation completed successfully!')
+      
+      console.log('✅ 评分计算成功！完整结果:', scoreData)
+      console.log('🎯 最终总分 (Score₃):', scoreData.final.score3)
+      
+      // 保存评分结果到StorageHelper
+      await StorageHelper.setJSON(STORAGE_KEYS.SCORE_RESULTS, scoreData)
+      console.log('💾 MethodsPage: 评分结果已保存到 SCORE_RESULTS')
+      
+      // 触发GraphPage更新
+      console.log('🔔 MethodsPage: 触发 scoreDataUpdated 事件')
+      window.dispatchEvent(new CustomEvent('scoreDataUpdated'))
+    }
+    
     try {
+      // 仅切换权重方案时，复用后端会话中缓存的质量和小因子，只重算 Layer 2-5
+      if (options?.schemesOnly && scoringSessionToken.current) {
+        try {
+          const stage = overrides.stageScheme || stageScheme
+          const response = await api.rescoreScoringSession(scoringSessionToken.current, {
+            safety_scheme: overrides.safetyScheme || safetyScheme,
+            health_scheme: overrides.healthScheme || healthScheme,
+            environment_scheme: overrides.environmentScheme || environmentScheme,
+            instrument_stage_scheme: stage,
+            prep_stage_scheme: stage,
+            final_scheme: overrides.finalScheme || finalScheme,
+            custom_weights: overrides.customWeights || customWeights
+          })
+          if (response.data.success) {
+            await applyScoreResults(response.data.data)
+            return
+          }
+        } catch (error) {
+          // 会话过期或重算失败时回退到完整计算
+          console.warn('⚠️ 评分会话重算失败，回退到完整计算:', error)
+        }
+        scoringSessionToken.current = null
+      }
+      
       // 1. 获取梯度数据
       const gradientData = await StorageHelper.getJSON(STORAGE_KEYS.GRADIENT)
       if (!gradientData) {
@@ -1559,28 +1601,14 @@ const MethodsPage: React.FC = () => {
       console.log('✅ 数据验证通过')
 
       // 10. 调用后端API
-      console.log('🌐 调用后端API: /api/v1/scoring/full-score')
+      console.log('🌐 调用后端API: /api/v1/scoring/sessions')
       console.log('📦 请求数据:', JSON.stringify(requestData, null, 2))
-      const response = await api.calculateFullScore(requestData)
+      const response = await api.createScoringSession(requestData)
       
       if (response.data.success) {
-        setScoreResults(response.data.data)
-        if (!silent) message.success('Scoring calculation completed successfully!')
-        
-        // 详细日志输出
-        console.log('✅ 评分计算成功！完整结果:', response.data.data)
-        console.log('📊 小因子得分 (merged.sub_factors):', response.data.data.merged.sub_factors)
-        console.log('🎯 最终总分 (Score₃):', response.data.data.final.score3)
-        console.log('🔬 仪器阶段 (Score₁):', response.data.data.instrument.score1)
-        console.log('🧪 前处理阶段 (Score₂):', response.data.data.preparation.score2)
-        
-        // 保存评分结果到StorageHelper
-        await StorageHelper.setJSON(STORAGE_KEYS.SCORE_RESULTS, response.data.data)
-        console.log('💾 MethodsPage: 评分结果已保存到 SCORE_RESULTS')
-        
-        // 触发GraphPage更新
-        console.log('🔔 MethodsPage: 触发 scoreDataUpdated 事件')
-        window.dispatchEvent(new CustomEvent('scoreDataUpdated'))
+        // 记住会话令牌，后续切换权重方案时只需提交方案选择
+        scoringSessionToken.current = response.data.data.token
+        await applyScoreResults(response.data.data.result)
       } else {
         if (!silent) message.error('Scoring calculation failed: ' + response.data.message)
       }
@@ -2053,7 +2081,7 @@ const MethodsPage: React.FC = () => {
                 return;
               }
               setSafetyScheme(value); 
-              calculateFullScoreAPI({ silent: true, overrides: { safetyScheme: value } });
+              calculateFullScoreAPI({ silent: true, schemesOnly: true, overrides: { safetyScheme: value } });
               window.dispatchEvent(new CustomEvent('weightSchemeUpdated', { detail: { type: 'safety', scheme: value } }));
             }}>
               <Option value="PBT_Balanced">PBT Balanced (S1:0.25/S2:0.25/S3:0.25/S4:0.25)</Option>
@@ -2091,7 +2119,7 @@ const MethodsPage: React.FC = () => {
                 return;
               }
               setHealthScheme(value); 
-              calculateFullScoreAPI({ silent: true, overrides: { healthScheme: value } });
+              calculateFullScoreAPI({ silent: true, schemesOnly: true, overrides: { healthScheme: value } });
               window.dispatchEvent(new CustomEvent('weightSchemeUpdated', { detail: { type: 'health', scheme: value } }));
             }}>
               <Option value="Occupational_Exposure">Occupational Exposure (H1:0.70/H2:0.30)</Option>
@@ -2127,7 +2155,7 @@ const MethodsPage: React.FC = () => {
                 return;
               }
               setEnvironmentScheme(value); 
-              calculateFullScoreAPI({ silent: true, overrides: { environmentScheme: value } });
+              calculateFullScoreAPI({ silent: true, schemesOnly: true, overrides: { environmentScheme: value } });
               window.dispatchEvent(new CustomEvent('weightSchemeUpdated', { detail: { type: 'environment', scheme: value } }));
             }}>
               <Option value="PBT_Balanced">PBT Balanced (E1:0.334/E2:0.333/E3:0.333)</Option>
@@ -2165,7 +2193,7 @@ const MethodsPage: React.FC = () => {
                 return;
               }
               setStageScheme(value); 
-              calculateFullScoreAPI({ silent: true, overrides: { stageScheme: value } });
+              calculateFullScoreAPI({ silent: true, schemesOnly: true, overrides: { stageScheme: value } });
               window.dispatchEvent(new CustomEvent('weightSchemeUpdated', { detail: { type: 'stage', scheme: value } }));
             }}>
               <Option value="Balanced">Balanced (S:0.18 H:0.18 E:0.18 R:0.18 D:0.18 P:0.10)</Option>
@@ -2201,7 +2229,7 @@ const MethodsPage: React.FC = () => {
                 return;
               }
               setFinalScheme(value); 
-              calculateFullScoreAPI({ silent: true, overrides: { finalScheme: value } });
+              calculateFullScoreAPI({ silent: true, schemesOnly: true, overrides: { finalScheme: value } });
               window.dispatchEvent(new CustomEvent('weightSchemeUpdated', { detail: { type: 'final', scheme: value } }));
             }}>
               <Option value="Direct_Online">Direct Injection (Instrument:0.8 Prep:0.2)</Option>
@@ -2930,6 +2958,7 @@ const MethodsPage: React.FC = () => {
           // 重新计算评分
           calculateFullScoreAPI({ 
             silent: true, 
+            schemesOnly: true,
             overrides: { 
               [`${customWeightType}Scheme`]: 'Custom',
               customWeights: newCustomWeights
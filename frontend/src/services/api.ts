@@ -15,6 +15,10 @@ export const api = {
   calculateSolventScore: (data: any) =>
     axiosInstance.post('/green-chemistry/solvent-score', data),
 
+  // 多组分混合溶剂评分：fractions 为 [混合物][组分] 比例，或用 grid_steps 生成二元/三元网格
+  calculateSolventMixtureScores: (data: { solvents: string[]; fractions?: number[][]; grid_steps?: number; volume_ml?: number | number[] }) =>
+    axiosInstance.post('/green-chemistry/solvent-score/mixtures', data),
+
   calculateEcoScale: (data: any) =>
     axiosInstance.post('/green-chemistry/eco-scale', data),
 
@@ -26,17 +30,62 @@ export const api = {
   createHPLCAnalysis: (data: any) =>
     axiosInstance.post('/analysis/hplc', data),
 
-  listHPLCAnalyses: (skip = 0, limit = 100) =>
-    axiosInstance.get(`/analysis/hplc?skip=${skip}&limit=${limit}`),
+  // 游标分页：把返回的 next_cursor 作为下一页的 cursor
+  listHPLCAnalyses: (params: {
+    cursor?: string
+    limit?: number
+    sort_by?: 'id' | 'created_at' | 'score1' | 'score2' | 'score3'
+    order?: 'asc' | 'desc'
+    score_field?: 'score1' | 'score2' | 'score3'
+    min_score?: number
+    max_score?: number
+    name?: string
+  } = {}) =>
+    axiosInstance.get('/analysis/hplc', { params }),
 
   // 溶剂数据库
-  listSolvents: () =>
-    axiosInstance.get('/solvents/list'),
+  // q 按中文名、英文名、缩写或CAS号检索（前缀/模糊匹配，用于输入联想）
+  listSolvents: (params?: { q?: string; limit?: number }) =>
+    axiosInstance.get('/solvents/list', { params }),
 
   // 完整评分系统
   calculateFullScore: (data: any) =>
     axiosInstance.post('/scoring/full-score', data),
 
+  calculateBatchScores: (methods: any[]) =>
+    axiosInstance.post('/scoring/batch', { methods }),
+
+  calculateSchemeSweep: (data: any) =>
+    axiosInstance.post('/scoring/sweep', data),
+
+  createScoringSession: (data: any) =>
+    axiosInstance.post('/scoring/sessions', data),
+
+  rescoreScoringSession: (token: string, data: any) =>
+    axiosInstance.post(`/scoring/sessions/${token}/rescore`, data),
+
+  submitScoringJob: (data: any) =>
+    axiosInstance.post('/scoring/jobs', data),
+
+  getScoringJob: (jobId: string) =>
+    axiosInstance.get(`/scoring/jobs/${jobId}`),
+
+  getScoringJobResult: (jobId: string) =>
+    axiosInstance.get(`/scoring/jobs/${jobId}/result`),
+
+  cancelScoringJob: (jobId: string) =>
+    axiosInstance.delete(`/scoring/jobs/${jobId}`),
+
+  calculateLibraryScore: (data: any) =>
+    axiosInstance.post('/scoring/library/full-score', data),
+
+  getReagentLibrary: () =>
+    axiosInstance.get('/reagents'),
+
+  // 多方法对比（methods 在前、analysis_ids 在后，一次请求完成）
+  compareMethods: (data: { methods?: any[]; analysis_ids?: number[]; labels?: string[]; baseline?: number }) =>
+    axiosInstance.post('/scoring/compare', data),
+
   getWeightSchemes: () =>
     axiosInstance.get('/scoring/weight-schemes'),
 